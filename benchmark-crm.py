@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+SaniCrete CRM Scalability Benchmarks
+Times each automation against synthetic books of growing size and records
+wall time, peak RSS and file I/O so runs can be compared for regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from crm_automations import CRMAutomations, np
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+RESULTS_FILE = "benchmark_results.json"
+
+# Run in this order against the same book; update-scores runs twice so the
+# second, incremental pass (nothing changed) is measured as well
+AUTOMATIONS = (
+    ('load', lambda crm: len(crm.load_crm_data())),
+    ('check-overdue', lambda crm: len(crm.check_overdue_followups())),
+    ('update-scores', lambda crm: crm.auto_score_update()),
+    ('update-scores-incremental', lambda crm: crm.auto_score_update()),
+    ('pipeline-automation', lambda crm: crm.pipeline_automation()),
+    ('weekly-report', lambda crm: len(crm.generate_weekly_report()))
+)
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate-data.py")
+
+def build_book(workspace, count, seed=0, backend='sqlite'):
+    """Generate filtered_crm_data.json and matching user data for `count` synthetic prospects"""
+    subprocess.run([sys.executable, GENERATOR, '--count', str(count), '--seed', str(seed),
+                    '--user-data', backend, '--no-snapshot', '--no-search-index',
+                    '--output', os.path.join(workspace, "filtered_crm_data.json")],
+                   check=True, stdout=subprocess.DEVNULL)
+
+def _io_counters():
+    """Cumulative file I/O for this process: /proc/self/io on Linux, block counts elsewhere"""
+    counters = {}
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                counters[name] = int(value)
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    counters['blocks_in'] = usage.ru_inblock
+    counters['blocks_out'] = usage.ru_oublock
+    return counters
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_child(workspace, automation, result_file, options):
+    """Run one automation in this (fresh) process and write its measurements"""
+    crm = CRMAutomations(workspace, compact=options.get('compact', False), stream=options.get('stream', False),
+                         workers=options.get('workers', 1))
+    step = dict(AUTOMATIONS)[automation]
+    baseline_rss = _peak_rss_kb()
+    before = _io_counters()
+    start = time.perf_counter()
+    result = step(crm)
+    seconds = time.perf_counter() - start
+    after = _io_counters()
+    crm.user_store.close()
+
+    with open(result_file, 'w') as f:
+        json.dump({
+            'seconds': round(seconds, 6),
+            'peak_rss_kb': _peak_rss_kb(),
+            'baseline_rss_kb': baseline_rss,
+            'io': {name: after[name] - before.get(name, 0) for name in after},
+            'result': result
+        }, f)
+
+def measure(workspace, automation, options):
+    """Run one automation in a child process so RSS and I/O are its own"""
+    fd, result_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    env = dict(os.environ, OPENCLAW_BIN=shutil.which('true') or 'true')
+    try:
+        command = [sys.executable, os.path.abspath(__file__), '--child', workspace, automation, result_file]
+        command += [f"--{name}" for name in ('compact', 'stream') if options.get(name)]
+        command += ['--workers', str(options.get('workers', 1))]
+        # Automations log a line per changed prospect; that output is not the point here
+        subprocess.run(command, check=True, env=env, stdout=subprocess.DEVNULL)
+        with open(result_file, 'r') as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+def run_benchmarks(sizes, options, workdir=None, keep=False):
+    results = []
+    for size in sizes:
+        workspace = tempfile.mkdtemp(prefix=f'crm_bench_{size}_', dir=workdir)
+        try:
+            print(f"\n📦 Building synthetic book of {size:,} prospects...")
+            start = time.perf_counter()
+            build_book(workspace, size, options['seed'], options['store'])
+            print(f"   built in {time.perf_counter() - start:.1f}s")
+
+            for automation, _ in AUTOMATIONS:
+                entry = dict(measure(workspace, automation, options), size=size, automation=automation)
+                results.append(entry)
+                print(f"   {automation:<26} {entry['seconds']:>9.3f}s  peak RSS {entry['peak_rss_kb'] / 1024:>8.1f} MB")
+        finally:
+            if keep:
+                print(f"   kept workspace {workspace}")
+            else:
+                shutil.rmtree(workspace, ignore_errors=True)
+    return results
+
+def compare_results(baseline, results, threshold):
+    """Print timing ratios against a previous results file; returns the regressions"""
+    previous = {(entry['size'], entry['automation']): entry for entry in baseline['results']}
+    regressions = []
+    print(f"\n📈 Compared with run from {baseline.get('generated_at', 'unknown')}:")
+    for entry in results:
+        old = previous.get((entry['size'], entry['automation']))
+        if not old or not old['seconds']:
+            continue
+        ratio = entry['seconds'] / old['seconds']
+        flag = "❌" if ratio > threshold else "  "
+        print(f"{flag} {entry['size']:>9,} {entry['automation']:<26} {ratio:>6.2f}x")
+        if ratio > threshold:
+            regressions.append(entry)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CRM automations against synthetic data")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated prospect counts (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--store', choices=('sqlite', 'json'), default='sqlite',
+                        help="user data backend for the synthetic books")
+    parser.add_argument('--compact', action='store_true', help="run automations with --compact")
+    parser.add_argument('--stream', action='store_true', help="run automations with --stream")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes for scoring and pipeline evaluation (default: %(default)s)")
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--compare', help="previous results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio reported as a regression (default: %(default)s)")
+    parser.add_argument('--workdir', help="where to build the synthetic books (default: system temp)")
+    parser.add_argument('--keep', action='store_true', help="keep the synthetic workspaces")
+    parser.add_argument('--child', nargs=3, metavar=('WORKSPACE', 'AUTOMATION', 'RESULT_FILE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    options = {'seed': args.seed, 'store': args.store, 'compact': args.compact, 'stream': args.stream,
+               'workers': args.workers}
+    if args.child:
+        run_child(*args.child, options)
+        return
+
+    print("⏱️  SaniCrete CRM Scalability Benchmarks")
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = run_benchmarks(sizes, options, args.workdir, args.keep)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np is not None,
+        'options': options,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Wrote {len(results)} measurements to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare_results(baseline, results, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,21 @@ class SaniCreteCRM {
             sort: 'priority'
         };
         
+        // Set when crm_server.py answers /api/; filtering, sorting and
+        // paging then happen on the server and only one page is held here
+        this.api = false;
+        this.page = 1;
+        this.pageSize = 100;
+        this.totalMatches = 0;
+        this.requestSeq = 0;
+        this.pendingSave = Promise.resolve();
+        this.searchTimer = null;
+        // Local-mode stat card counters, kept in step by saveUserData()
+        this.aggregates = null;
+        // API mode polls the server's change feed from this version
+        this.feedVersion = 0;
+        this.changeTimer = null;
+        
         this.initialize();
     }
     
@@ -27,13 +42,31 @@ class SaniCreteCRM {
             this.updateSidebarStats();
             this.loadUserData();
             this.checkOverdueFollowups();
+            if (this.api) this.watchChanges();
         } catch (error) {
             console.error('Failed to initialize CRM:', error);
             this.showNotification('Failed to load CRM data', 'error');
         }
     }
     
+    async detectApi() {
+        try {
+            const response = await fetch('/api/stats');
+            return response.ok && (response.headers.get('Content-Type') || '').includes('application/json');
+        } catch (error) {
+            return false;
+        }
+    }
+    
     async loadData() {
+        this.api = await this.detectApi();
+        this.aggregates = null;
+        if (this.api) {
+            // Records arrive a page at a time from /api/prospects
+            this.prospects = {};
+            return;
+        }
+        
         try {
             const response = await fetch('filtered_crm_data.json');
             const data = await response.json();
@@ -92,7 +125,13 @@ class SaniCreteCRM {
         // Filters
         document.getElementById('searchInput').addEventListener('input', (e) => {
             this.filters.search = e.target.value;
-            this.renderProspects();
+            if (this.api) {
+                // One request per pause in typing rather than per keystroke
+                clearTimeout(this.searchTimer);
+                this.searchTimer = setTimeout(() => this.renderProspects(), 150);
+            } else {
+                this.renderProspects();
+            }
         });
         
         document.getElementById('statusFilter').addEventListener('change', (e) => {
@@ -238,7 +277,80 @@ class SaniCreteCRM {
         return new Date() > new Date(prospect.next_followup);
     }
     
+    apiQuery(page) {
+        const params = new URLSearchParams({
+            sort: this.filters.sort,
+            page: String(page),
+            page_size: String(this.pageSize)
+        });
+        if (this.currentView !== 'prospects' && this.currentView !== 'analytics') params.set('view', this.currentView);
+        if (this.filters.search) params.set('search', this.filters.search);
+        if (this.filters.status) params.set('status', this.filters.status);
+        if (this.filters.category) params.set('category', this.filters.category);
+        return params;
+    }
+    
+    async fetchProspectPage(page) {
+        // Let edits reach the server before asking for results that include them
+        await this.pendingSave;
+        const response = await fetch(`/api/prospects?${this.apiQuery(page)}`);
+        if (!response.ok) throw new Error(`Prospect query failed (${response.status})`);
+        return response.json();
+    }
+    
+    async renderProspectPage(append = false) {
+        const container = document.getElementById('prospectsGrid');
+        const seq = ++this.requestSeq;
+        const page = append ? this.page + 1 : 1;
+        
+        let result;
+        try {
+            result = await this.fetchProspectPage(page);
+        } catch (error) {
+            console.error('Error loading prospects:', error);
+            this.showNotification('Failed to load prospects', 'error');
+            return;
+        }
+        // A newer filter change has already been sent
+        if (seq !== this.requestSeq) return;
+        
+        if (!append) this.prospects = {};
+        result.items.forEach(item => { this.prospects[item.name] = item; });
+        this.page = result.page;
+        this.totalMatches = result.total;
+        
+        if (result.total === 0) {
+            container.innerHTML = '<div class="loading">No prospects match the current filters.</div>';
+            return;
+        }
+        
+        const cards = result.items.map(item => this.createProspectCard(item.name, item)).join('');
+        const shown = Object.keys(this.prospects).length;
+        const more = shown < result.total ? `
+            <div class="loading">
+                Showing ${shown} of ${result.total}
+                <button class="action-btn" onclick="crm.loadMoreProspects()">Load more</button>
+            </div>` : '';
+        
+        container.querySelectorAll('.load-more').forEach(el => el.remove());
+        if (append) {
+            container.insertAdjacentHTML('beforeend', cards);
+        } else {
+            container.innerHTML = cards;
+        }
+        if (more) container.insertAdjacentHTML('beforeend', `<div class="load-more">${more}</div>`);
+    }
+    
+    loadMoreProspects() {
+        this.renderProspectPage(true);
+    }
+    
     renderProspects() {
+        if (this.api) {
+            this.renderProspectPage();
+            return;
+        }
+        
         const container = document.getElementById('prospectsGrid');
         const filtered = this.getFilteredProspects();
         
@@ -681,8 +793,23 @@ SaniCrete Flooring Solutions
         this.showNotification('Bulk actions coming soon!', 'warning');
     }
     
-    exportData() {
-        const exportData = Object.entries(this.prospects).map(([name, prospect]) => ({
+    async exportData() {
+        if (this.api) {
+            // The server streams every match straight into the download
+            await this.pendingSave;
+            const params = this.apiQuery(1);
+            params.delete('page');
+            params.delete('page_size');
+            const a = document.createElement('a');
+            a.href = `/api/export?${params}`;
+            a.download = 'sanicrete-crm-prospects.csv';
+            a.click();
+            this.showNotification('Export started', 'success');
+            return;
+        }
+        const prospects = Object.entries(this.prospects);
+        
+        const exportData = prospects.map(([name, prospect]) => ({
             company: name,
             status: prospect.status,
             category: prospect.category,
@@ -734,6 +861,15 @@ SaniCrete Flooring Solutions
         const existing = JSON.parse(localStorage.getItem(key) || '{}');
         const updated = { ...existing, ...data, lastUpdated: new Date().toISOString() };
         localStorage.setItem(key, JSON.stringify(updated));
+        if (this.aggregates) this.updateAggregates(existing, updated);
+        
+        if (this.api) {
+            this.pendingSave = this.pendingSave.then(() => fetch(`/api/user-data/${encodeURIComponent(companyName)}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(data)
+            })).catch(error => console.error('Failed to save to server:', error));
+        }
     }
     
     getUserData(companyName, field) {
@@ -743,6 +879,9 @@ SaniCrete Flooring Solutions
     }
     
     loadUserData() {
+        // The server already merges user data into each record
+        if (this.api) return;
+        
         // Load any previously saved user data
         Object.keys(this.prospects).forEach(companyName => {
             const userData = JSON.parse(localStorage.getItem(`crm_${companyName}`) || '{}');
@@ -750,10 +889,107 @@ SaniCrete Flooring Solutions
         });
     }
     
-    checkOverdueFollowups() {
-        const overdue = Object.entries(this.prospects)
-            .filter(([_, prospect]) => this.hasOverdueFollowup(prospect))
-            .length;
+    async fetchChanges() {
+        const response = await fetch(`/api/changes?since=${this.feedVersion}`);
+        return response.json();
+    }
+    
+    // Poll the change feed and re-render only when something changed,
+    // so an idle dashboard costs one small request per interval
+    async watchChanges() {
+        clearInterval(this.changeTimer);
+        this.feedVersion = (await this.fetchChanges()).version;
+        this.changeTimer = setInterval(() => this.pullChanges(), 15000);
+    }
+    
+    async pullChanges() {
+        try {
+            await this.pendingSave;
+            const delta = await this.fetchChanges();
+            this.feedVersion = delta.version;
+            const changes = Object.keys(delta.upserts.prospects).length + Object.keys(delta.upserts.user_data).length
+                + delta.deletes.prospects.length + delta.deletes.user_data.length;
+            if (delta.reset || changes > 0) {
+                this.renderProspects();
+                this.updateSidebarStats();
+            }
+        } catch (error) {
+            console.error('Failed to pull changes:', error);
+        }
+    }
+    
+    async fetchStats() {
+        await this.pendingSave;
+        const response = await fetch('/api/stats');
+        return response.json();
+    }
+    
+    // Counts by status plus sorted follow-up and contact times, so the stat
+    // cards are a few lookups instead of a pass over every prospect
+    buildAggregates() {
+        const aggregates = { total: 0, statuses: {}, followups: [], contacts: [] };
+        Object.values(this.prospects).forEach(prospect => {
+            aggregates.total++;
+            aggregates.statuses[prospect.status] = (aggregates.statuses[prospect.status] || 0) + 1;
+            this.insertTime(aggregates.followups, prospect.next_followup, false);
+            this.insertTime(aggregates.contacts, prospect.latest_contact, false);
+        });
+        aggregates.followups.sort((a, b) => a - b);
+        aggregates.contacts.sort((a, b) => a - b);
+        return aggregates;
+    }
+    
+    updateAggregates(previous, updated) {
+        const statuses = this.aggregates.statuses;
+        const oldStatus = previous.status || 'new';
+        const newStatus = updated.status || 'new';
+        if (oldStatus !== newStatus) {
+            statuses[oldStatus] = (statuses[oldStatus] || 0) - 1;
+            statuses[newStatus] = (statuses[newStatus] || 0) + 1;
+        }
+        if (previous.next_followup !== updated.next_followup) {
+            this.removeTime(this.aggregates.followups, previous.next_followup);
+            this.insertTime(this.aggregates.followups, updated.next_followup, true);
+        }
+    }
+    
+    insertTime(times, value, sorted) {
+        const time = value ? new Date(value).getTime() : NaN;
+        if (Number.isNaN(time)) return;
+        if (sorted) times.splice(this.lowerBound(times, time), 0, time);
+        else times.push(time);
+    }
+    
+    removeTime(times, value) {
+        const time = value ? new Date(value).getTime() : NaN;
+        const position = this.lowerBound(times, time);
+        if (times[position] === time) times.splice(position, 1);
+    }
+    
+    lowerBound(times, time) {
+        let low = 0, high = times.length;
+        while (low < high) {
+            const middle = (low + high) >> 1;
+            if (times[middle] < time) low = middle + 1;
+            else high = middle;
+        }
+        return low;
+    }
+    
+    localStats() {
+        if (!this.aggregates) this.aggregates = this.buildAggregates();
+        const { total, statuses, followups, contacts } = this.aggregates;
+        const now = Date.now();
+        return {
+            total,
+            hot: statuses.hot || 0,
+            due: this.lowerBound(followups, now),
+            active: contacts.length - this.lowerBound(contacts, now - 30 * 24 * 60 * 60 * 1000)
+        };
+    }
+    
+    async checkOverdueFollowups() {
+        const overdue = (this.api ? await this.fetchStats() : this.localStats()).due;
             
         if (overdue > 0) {
             setTimeout(() => {
@@ -762,19 +998,8 @@ SaniCrete Flooring Solutions
         }
     }
     
-    updateSidebarStats() {
-        const stats = {
-            total: Object.keys(this.prospects).length,
-            hot: Object.values(this.prospects).filter(p => p.status === 'hot').length,
-            due: Object.values(this.prospects).filter(p => this.hasOverdueFollowup(p)).length,
-            active: Object.values(this.prospects).filter(p => {
-                if (!p.latest_contact) return false;
-                const lastContact = new Date(p.latest_contact);
-                const now = new Date();
-                const daysSince = (now - lastContact) / (1000 * 60 * 60 * 24);
-                return daysSince <= 30;
-            }).length
-        };
+    async updateSidebarStats() {
+        const stats = this.api ? await this.fetchStats() : this.localStats();
         
         document.getElementById('sidebarTotal').textContent = stats.total;
         document.getElementById('sidebarHot').textContent = stats.hot;
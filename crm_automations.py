@@ -4,61 +4,3600 @@ SaniCrete CRM Automations
 Integration with OpenClaw cron system for follow-up reminders and pipeline automation
 """
 
+import asyncio
+import bisect
+import cProfile
+import csv
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
 import json
+import math
+import mmap
+import operator
 import os
-import subprocess
+import re
+import shlex
+import signal
+import socket
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # Optional: batch scoring falls back to calculate_auto_score
+    np = None
+
+class ProspectCache:
+    """Process-wide cache of parsed prospect files, keyed on path + mtime/size"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path, loader):
+        """Return loader(path), re-running it only when the file has changed.
+
+        Entries are cached per (path, loader), so the same file can be held
+        both as a dict and as a ProspectTable.
+        """
+        path = os.path.abspath(path)
+        signature = self._signature(path)
+        key = (path, loader)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader(path)
+
+        with self._lock:
+            self._entries[key] = (signature, value)
+        return value
+
+    def invalidate(self, path=None):
+        """Drop one cached file, or everything when no path is given"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                path = os.path.abspath(path)
+                for key in [key for key in self._entries if key[0] == path]:
+                    del self._entries[key]
+
+    def stats(self):
+        """Hit/miss counters for reporting"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries)
+            }
+
+# Shared by every CRMAutomations instance so a process parses each export once
+prospect_cache = ProspectCache()
+
+class AutomationMetrics:
+    """Process-wide phase timers and counters for the automations.
+
+    Phases accumulate wall time per named step (parsing, user data I/O,
+    scoring, openclaw calls); counters track work done. begin_run() and
+    end_run() bracket one automation so its own share can be reported
+    alongside the process totals, as JSON or Prometheus text.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.phases = {}
+        self.runs = {}
+        self.last_run = None
+        self._run_start = None
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def phase(self, name):
+        """Add the time spent inside the block to phase `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                totals = self.phases.setdefault(name, [0.0, 0])
+                totals[0] += elapsed
+                totals[1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'phases': {name: {'seconds': seconds, 'calls': calls}
+                           for name, (seconds, calls) in self.phases.items()}
+            }
+
+    def begin_run(self, command):
+        self._run_start = (command, time.time(), time.perf_counter(), self.snapshot())
+
+    def end_run(self):
+        """Close the run begun by begin_run(); returns its own counters and phases"""
+        command, started_at, start, before = self._run_start
+        after = self.snapshot()
+        counters = {name: value - before['counters'].get(name, 0)
+                    for name, value in after['counters'].items()}
+        phases = {}
+        for name, totals in after['phases'].items():
+            previous = before['phases'].get(name, {'seconds': 0.0, 'calls': 0})
+            if totals['calls'] > previous['calls']:
+                phases[name] = {'seconds': round(totals['seconds'] - previous['seconds'], 6),
+                                'calls': totals['calls'] - previous['calls']}
+        with self._lock:
+            self.runs[command] = self.runs.get(command, 0) + 1
+            self.last_run = {
+                'command': command,
+                'started_at': datetime.fromtimestamp(started_at).isoformat(),
+                'finished_at_ts': time.time(),
+                'duration_seconds': round(time.perf_counter() - start, 6),
+                'counters': {name: value for name, value in counters.items() if value},
+                'phases': phases
+            }
+        self._run_start = None
+        return self.last_run
+
+    def to_dict(self):
+        totals = self.snapshot()
+        with self._lock:
+            totals['runs'] = dict(self.runs)
+            last_run = self.last_run
+        return {'last_run': last_run, 'totals': totals, 'prospect_cache': prospect_cache.stats()}
+
+    def to_prometheus(self):
+        """Totals in the Prometheus text exposition format"""
+        data = self.to_dict()
+        totals = data['totals']
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        metric('crm_phase_seconds_total', 'counter', 'Time spent in each automation phase',
+               [({'phase': name}, round(phase['seconds'], 6)) for name, phase in sorted(totals['phases'].items())])
+        metric('crm_phase_calls_total', 'counter', 'Times each automation phase ran',
+               [({'phase': name}, phase['calls']) for name, phase in sorted(totals['phases'].items())])
+        for name, value in sorted(totals['counters'].items()):
+            metric(f'crm_{name}_total', 'counter', f"Automation counter {name}", [({}, value)])
+        metric('crm_runs_total', 'counter', 'Completed automation runs',
+               [({'command': command}, count) for command, count in sorted(totals['runs'].items())])
+        for name in ('hits', 'misses'):
+            metric(f'crm_prospect_cache_{name}_total', 'counter', f"Prospect cache {name}",
+                   [({}, data['prospect_cache'][name])])
+        last_run = data['last_run']
+        if last_run:
+            metric('crm_last_run_duration_seconds', 'gauge', 'Duration of the most recent run',
+                   [({'command': last_run['command']}, last_run['duration_seconds'])])
+            metric('crm_last_run_timestamp_seconds', 'gauge', 'When the most recent run finished',
+                   [({'command': last_run['command']}, round(last_run['finished_at_ts'], 3))])
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        """Write crm_metrics.json and crm_metrics.prom (node_exporter textfile format)"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, payload in ((METRICS_JSON_FILE, json.dumps(self.to_dict(), indent=2, default=str)),
+                              (METRICS_PROM_FILE, self.to_prometheus())):
+            path = os.path.join(directory, name)
+            with open(path + '.tmp', 'w') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+            paths.append(path)
+        return paths
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.phases.clear()
+            self.runs.clear()
+            self.last_run = None
+
+METRICS_JSON_FILE = "crm_metrics.json"
+METRICS_PROM_FILE = "crm_metrics.prom"
+
+# Shared by every CRMAutomations instance, like prospect_cache
+metrics = AutomationMetrics()
+
+def _parse_prospect_file(path):
+    with metrics.phase('parse_prospects'):
+        with open(path, 'r') as f:
+            data = json.load(f)
+            metrics.incr('files_read')
+            metrics.incr('bytes_parsed', f.tell())
+    return data['filtered_prospects']
+
+class _JsonObjectStream:
+    """Incremental reader for the top-level object of a large JSON file"""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f, chunk_size):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size=None):
+        chunk = self._file.read(size or self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop consumed text so the buffer stays around one value long
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_char(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\n\r':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON data")
+
+    def expect(self, chars):
+        char = self._next_char()
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self._pos}, found {char!r}")
+        self._pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self._next_char()
+        read_size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill(read_size):
+                continue
+            read_size *= 2
+
+    def members(self):
+        """Yield (key, value-reader) pairs; the caller must consume each value"""
+        self.expect('{')
+        if self._next_char() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+def iter_prospect_file(path, chunk_size=1 << 16):
+    """Stream (company_name, prospect) pairs out of filtered_crm_data.json.
+
+    Only one prospect (plus one read chunk) is held in memory at a time, so
+    memory use does not grow with the size of the export.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        metrics.incr('files_read')
+        metrics.incr('bytes_parsed', os.fstat(f.fileno()).st_size)
+        stream = _JsonObjectStream(f, chunk_size)
+        for key in stream.members():
+            if key != 'filtered_prospects':
+                stream.value()
+                continue
+            for company_name in stream.members():
+                yield company_name, stream.value()
+            return
+
+_MISSING = object()
+
+class ProspectRecord(Mapping):
+    """Read-only view of one ProspectTable row; behaves like the prospect dict"""
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._table.value(self._row, key)
+
+    def __iter__(self):
+        return iter(self._table.row_keys(self._row))
+
+    def __len__(self):
+        return len(self._table.row_keys(self._row))
+
+    def __repr__(self):
+        return f"ProspectRecord({self._table.names[self._row]!r})"
+
+class ProspectTable(Mapping):
+    """Compact columnar representation of filtered_prospects.
+
+    Maps company name -> ProspectRecord. Numeric fields live in array('q')
+    columns, category/industry/relationship strings are interned, and the
+    nested email/contact structures are kept as compact JSON in one shared
+    buffer and only decoded when a record asks for them.
+    """
+
+    INT_FIELDS = ('total_emails', 'business_score', 'conversation_score',
+                  'overall_score', 'current_lead_score', 'first_contact_ts', 'latest_contact_ts')
+    INTERNED_FIELDS = ('category', 'industry', 'relationship_strength')
+    TEXT_FIELDS = ('first_contact', 'latest_contact')
+    NESTED_FIELDS = ('relevant_emails', 'contacts', 'emails_by_year', 'emails_by_month')
+    # Same key order generate-data.py writes, so records iterate like the JSON
+    FIELD_ORDER = ('category', 'total_emails', 'business_score', 'conversation_score',
+                   'overall_score', 'first_contact', 'latest_contact', 'relevant_emails',
+                   'contacts', 'relationship_strength', 'current_lead_score', 'industry',
+                   'emails_by_year', 'emails_by_month', 'first_contact_ts', 'latest_contact_ts')
+    FIELD_BITS = {field: 1 << i for i, field in enumerate(FIELD_ORDER)}
+
+    __slots__ = ('names', '_index', '_ints', '_strings', '_present', '_nested_blob',
+                 '_nested_offsets', '_extras', '_inexact', '_buffer', 'snapshot_source')
+
+    def __init__(self):
+        self.names = []
+        self._index = {}
+        self._ints = {field: array('q') for field in self.INT_FIELDS}
+        self._strings = {field: [] for field in self.INTERNED_FIELDS + self.TEXT_FIELDS}
+        self._present = array('I')
+        self._nested_blob = bytearray()
+        self._nested_offsets = array('Q', [0])
+        self._extras = {}
+        self._inexact = set()
+        # Set on tables opened from a binary snapshot (see open_prospect_snapshot)
+        self._buffer = None
+        self.snapshot_source = None
+
+    @classmethod
+    def from_prospects(cls, prospects):
+        """Build a table from a {company: prospect} mapping or (company, prospect) pairs"""
+        table = cls()
+        items = prospects.items() if isinstance(prospects, Mapping) else prospects
+        for company_name, prospect in items:
+            table.append(company_name, prospect)
+        return table
+
+    def append(self, company_name, prospect):
+        row = len(self.names)
+        self.names.append(company_name)
+        self._index[company_name] = row
+        present = 0
+        extras = {}
+
+        for field in self.INT_FIELDS:
+            value = prospect.get(field, _MISSING)
+            if type(value) is int and -2**63 <= value < 2**63:
+                self._ints[field].append(value)
+                present |= self.FIELD_BITS[field]
+            else:
+                self._ints[field].append(0)
+                if value is not _MISSING:
+                    extras[field] = value
+                    self._inexact.add(field)
+
+        for field in self.INTERNED_FIELDS + self.TEXT_FIELDS:
+            value = prospect.get(field, _MISSING)
+            if isinstance(value, str):
+                self._strings[field].append(sys.intern(value) if field in self.INTERNED_FIELDS else value)
+                present |= self.FIELD_BITS[field]
+            else:
+                self._strings[field].append(None)
+                if value is not _MISSING:
+                    extras[field] = value
+
+        nested = {}
+        for field in self.NESTED_FIELDS:
+            if field in prospect:
+                nested[field] = prospect[field]
+                present |= self.FIELD_BITS[field]
+        if nested:
+            self._nested_blob += json.dumps(nested, separators=(',', ':')).encode('utf-8')
+        self._nested_offsets.append(len(self._nested_blob))
+
+        for key, value in prospect.items():
+            if key not in self.FIELD_BITS:
+                extras[key] = value
+        if extras:
+            self._extras[row] = extras
+        self._present.append(present)
+
+    def _nested(self, row):
+        start, end = self._nested_offsets[row], self._nested_offsets[row + 1]
+        return json.loads(bytes(self._nested_blob[start:end])) if end > start else {}
+
+    def value(self, row, key):
+        extras = self._extras.get(row)
+        if extras and key in extras:
+            return extras[key]
+        bit = self.FIELD_BITS.get(key)
+        if bit is None or not self._present[row] & bit:
+            raise KeyError(key)
+        if key in self._ints:
+            return self._ints[key][row]
+        if key in self._strings:
+            return self._strings[key][row]
+        return self._nested(row)[key]
+
+    def row_keys(self, row):
+        present = self._present[row]
+        extras = self._extras.get(row, {})
+        keys = [field for field in self.FIELD_ORDER
+                if present & self.FIELD_BITS[field] or field in extras]
+        keys.extend(key for key in extras if key not in self.FIELD_BITS)
+        return keys
+
+    def column(self, field):
+        """Raw column for a numeric or string field (array('q') or list)"""
+        if field in self._ints:
+            return self._ints[field]
+        return self._strings[field]
+
+    def is_exact_int_column(self, field):
+        """True when every value of an integer field is stored in its array column"""
+        return field in self._ints and field not in self._inexact
+
+    def slice(self, start, stop):
+        """Table of rows start:stop that keeps the columnar layout.
+
+        Memory-mapped snapshot columns are sliced as views; in-memory
+        columns are copied, which for a batch is a few small arrays.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self.names))
+        stop = max(start, stop)
+        table = ProspectTable()
+
+        def rows(column):
+            return column.slice(start, stop) if isinstance(column, _SnapshotStrings) else column[start:stop]
+
+        table.names = rows(self.names)
+        table._index = None
+        table._ints = {field: rows(column) for field, column in self._ints.items()}
+        table._strings = {field: rows(column) for field, column in self._strings.items()}
+        table._present = rows(self._present)
+        # Offsets point into the shared blob, so only the offset column is sliced
+        table._nested_offsets = self._nested_offsets[start:stop + 1]
+        table._nested_blob = self._nested_blob
+        table._extras = {row - start: values for row, values in self._extras.items() if start <= row < stop}
+        table._inexact = set(self._inexact)
+        table._buffer = self._buffer
+        table.snapshot_source = self.snapshot_source
+        return table
+
+    def _row_index(self):
+        # Snapshot tables build the name index on first lookup
+        if self._index is None:
+            self._index = {company_name: row for row, company_name in enumerate(self.names)}
+        return self._index
+
+    def __getitem__(self, company_name):
+        return ProspectRecord(self, self._row_index()[company_name])
+
+    def __contains__(self, company_name):
+        return company_name in self._row_index()
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def keys(self):
+        return self._row_index().keys()
+
+    def items(self):
+        for row, company_name in enumerate(self.names):
+            yield company_name, ProspectRecord(self, row)
+
+    def values(self):
+        for row in range(len(self.names)):
+            yield ProspectRecord(self, row)
+
+def _load_prospect_table(path):
+    prospects = _parse_prospect_file(path)
+    with metrics.phase('build_table'):
+        return ProspectTable.from_prospects(prospects)
+
+# Binary snapshot of a ProspectTable, written next to filtered_crm_data.json.
+#
+# Layout: magic | version (u32) | metadata length (u32) | metadata JSON |
+# sections, each 8-byte aligned. Numeric columns are fixed-width int64,
+# string columns are u32 references into one shared string table, and the
+# nested email/contact JSON keeps the table's blob + offsets layout, so a
+# memory-mapped file can back a ProspectTable directly and a pass only
+# touches the columns it reads.
+SNAPSHOT_MAGIC = b'CRMSNAP\x00'
+SNAPSHOT_VERSION = 2  # 2: epoch columns for first/latest contact
+SNAPSHOT_SUFFIX = '.snap'
+_SNAPSHOT_HEADER = struct.Struct('<8sII')
+_NO_STRING = 0xFFFFFFFF
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or from another version"""
+
+class _SnapshotStrings:
+    """Lazily decoded string column of a memory-mapped snapshot"""
+
+    __slots__ = ('_refs', '_offsets', '_blob', '_cache')
+
+    def __init__(self, refs, offsets, blob, cache=None):
+        self._refs = refs
+        self._offsets = offsets
+        self._blob = blob
+        self._cache = cache
+
+    def __len__(self):
+        return len(self._refs)
+
+    @property
+    def refs(self):
+        return self._refs
+
+    def decode_ref(self, ref):
+        if self._cache is not None and ref in self._cache:
+            return self._cache[ref]
+        value = bytes(self._blob[self._offsets[ref]:self._offsets[ref + 1]]).decode('utf-8')
+        if self._cache is not None:
+            value = self._cache[ref] = sys.intern(value)
+        return value
+
+    def __getitem__(self, row):
+        ref = self._refs[row]
+        if ref == _NO_STRING:
+            return None
+        return self.decode_ref(ref)
+
+    def slice(self, start, stop):
+        """Rows start:stop, sharing the string table (and its decode cache)"""
+        return _SnapshotStrings(self._refs[start:stop], self._offsets, self._blob, self._cache)
+
+    def __iter__(self):
+        for row in range(len(self._refs)):
+            yield self[row]
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+def snapshot_path_for(data_file):
+    return os.path.splitext(data_file)[0] + SNAPSHOT_SUFFIX
+
+def write_prospect_snapshot(prospects, path, source_file=None):
+    """Write prospects (dict or ProspectTable) as a binary snapshot.
+
+    source_file is the JSON export the snapshot mirrors; its mtime and size
+    are recorded so readers can tell when the snapshot has gone stale.
+    """
+    table = prospects if isinstance(prospects, ProspectTable) else ProspectTable.from_prospects(prospects)
+
+    strings = {}
+    string_blob = bytearray()
+    string_offsets = array('Q', [0])
+
+    def string_ref(value):
+        if value is None:
+            return _NO_STRING
+        ref = strings.get(value)
+        if ref is None:
+            ref = strings[value] = len(string_offsets) - 1
+            string_blob.extend(value.encode('utf-8'))
+            string_offsets.append(len(string_blob))
+        return ref
+
+    sections = [('present', array('I', table._present).tobytes())]
+    for field in ProspectTable.INT_FIELDS:
+        sections.append((f'int:{field}', array('q', table.column(field)).tobytes()))
+    sections.append(('ref:names', array('I', map(string_ref, table.names)).tobytes()))
+    for field in ProspectTable.INTERNED_FIELDS + ProspectTable.TEXT_FIELDS:
+        sections.append((f'ref:{field}', array('I', map(string_ref, table.column(field))).tobytes()))
+    sections.append(('strings.offsets', string_offsets.tobytes()))
+    sections.append(('strings.blob', bytes(string_blob)))
+    sections.append(('nested.offsets', array('Q', table._nested_offsets).tobytes()))
+    sections.append(('nested.blob', bytes(table._nested_blob)))
+    extras = {str(row): values for row, values in table._extras.items()}
+    sections.append(('extras', json.dumps(extras).encode('utf-8')))
+
+    layout = {}
+    offset = 0
+    for name, payload in sections:
+        layout[name] = [offset, len(payload)]
+        offset += (len(payload) + 7) & ~7
+
+    meta = json.dumps({
+        'rows': len(table),
+        'byteorder': sys.byteorder,
+        'inexact': sorted(table._inexact),
+        'source': _file_signature(source_file) if source_file else None,
+        'generated_at': datetime.now().isoformat(),
+        'sections': layout
+    }).encode('utf-8')
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta)))
+        f.write(meta)
+        f.write(b'\x00' * (-f.tell() % 8))
+        for _, payload in sections:
+            f.write(payload)
+            f.write(b'\x00' * (-len(payload) % 8))
+    os.replace(temp_path, path)
+    return path
+
+def open_prospect_snapshot(path):
+    """Memory-map a snapshot as a read-only ProspectTable"""
+    metrics.incr('files_read')
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError(f"{path} is empty")
+
+    view = memoryview(buffer)
+    if len(view) < _SNAPSHOT_HEADER.size:
+        raise SnapshotError(f"{path} is truncated")
+    magic, version, meta_length = _SNAPSHOT_HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a prospect snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path} is snapshot version {version}, expected {SNAPSHOT_VERSION}")
+
+    meta_end = _SNAPSHOT_HEADER.size + meta_length
+    meta = json.loads(bytes(view[_SNAPSHOT_HEADER.size:meta_end]))
+    if meta['byteorder'] != sys.byteorder:
+        raise SnapshotError(f"{path} was written on a {meta['byteorder']}-endian machine")
+    data_start = meta_end + (-meta_end % 8)
+
+    def section(name, fmt=None):
+        start, length = meta['sections'][name]
+        start += data_start
+        if start + length > len(view):
+            raise SnapshotError(f"{path} is truncated")
+        chunk = view[start:start + length]
+        return chunk.cast(fmt) if fmt else chunk
+
+    string_offsets = section('strings.offsets', 'Q')
+    string_blob = section('strings.blob')
+
+    def strings(name, interned=False):
+        return _SnapshotStrings(section(f'ref:{name}', 'I'), string_offsets, string_blob,
+                                {} if interned else None)
+
+    table = ProspectTable()
+    table.names = strings('names')
+    table._index = None
+    table._ints = {field: section(f'int:{field}', 'q') for field in ProspectTable.INT_FIELDS}
+    table._strings = {field: strings(field, interned=True) for field in ProspectTable.INTERNED_FIELDS}
+    table._strings.update({field: strings(field) for field in ProspectTable.TEXT_FIELDS})
+    table._present = section('present', 'I')
+    table._nested_offsets = section('nested.offsets', 'Q')
+    table._nested_blob = section('nested.blob')
+    table._extras = {int(row): values for row, values in json.loads(bytes(section('extras'))).items()}
+    table._inexact = set(meta['inexact'])
+    table._buffer = buffer
+    table.snapshot_source = meta['source']
+    return table
+
+# Inverted index for full-text search, written next to filtered_crm_data.json.
+#
+# Same container as the prospect snapshot (header, metadata JSON, 8-byte
+# aligned sections). Terms are sorted so prefix lookups are a bisect over the
+# lazily decoded term table; each term's postings are (document, weighted
+# term frequency) pairs in document order.
+SEARCH_INDEX_MAGIC = b'CRMSRCH\x00'
+SEARCH_INDEX_VERSION = 1
+SEARCH_INDEX_SUFFIX = '.search'
+INTELLIGENCE_FILE = "deep-intelligence.json"
+_TOKEN = re.compile(r'[^\W_]+')
+
+# Per-field term weights: a hit in the company name counts for more than one in a subject line
+SEARCH_FIELD_WEIGHTS = {
+    'name': 3.0,
+    'keywords': 2.0,
+    'category': 1.5,
+    'subject': 1.0,
+    'commitment': 1.0
+}
+SEARCH_SOURCE_PROSPECT = 1
+SEARCH_SOURCE_INTELLIGENCE = 2
+# Terms a query word of at least MIN_PREFIX_LENGTH characters may expand to
+# by prefix, most frequent first
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_TERMS = 64
+# Prefix expansions score below an exact word match
+PREFIX_MATCH_WEIGHT = 0.7
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text):
+    """Lowercase words and numbers in text; punctuation and underscores separate them"""
+    return _TOKEN.findall(text.lower()) if text else []
+
+def search_index_path_for(data_file):
+    return os.path.splitext(data_file)[0] + SEARCH_INDEX_SUFFIX
+
+def iter_intelligence_entries(path):
+    """(company, entry) for every company entry in deep-intelligence.json"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    metrics.incr('files_read')
+    for entries in (data.get('categories') or {}).values():
+        for entry in entries or ():
+            company_name = entry.get('company') or entry.get('name')
+            if company_name:
+                yield company_name, entry
+
+def _prospect_fields(company_name, prospect):
+    fields = [(company_name, 'name'), (prospect.get('category'), 'category'), (prospect.get('industry'), 'category')]
+    for email in prospect.get('relevant_emails') or ():
+        fields.append((email.get('subject'), 'subject'))
+        fields.extend((keyword, 'keywords') for keyword in email.get('keywords') or ())
+    return fields
+
+def _intelligence_fields(company_name, entry):
+    fields = [(company_name, 'name'), (entry.get('subjects'), 'subject'), (entry.get('keywords'), 'keywords')]
+    fields.extend((commitment, 'commitment') for commitment in entry.get('commitments') or ())
+    return fields
+
+class SearchIndex:
+    """Ranked full-text search over prospects and deep-intelligence entries.
+
+    Documents are companies: a prospect's name, category, email subjects
+    and keywords, plus the subjects, keywords and commitments of any
+    deep-intelligence entry for the same company (entries for companies
+    outside the book become documents of their own). Every query word must
+    match, either exactly or as a prefix of an indexed word, and results
+    are ranked by BM25 over field-weighted term frequencies.
+    """
+
+    def __init__(self, terms, term_offsets, docs, impacts, names, sources, source_files=None):
+        self.terms = terms
+        self.names = names
+        self.sources = sources
+        self.source_files = source_files
+        self._term_offsets = term_offsets
+        self._docs = docs
+        self._impacts = impacts
+        self._buffer = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, prospects, intelligence=(), source_files=None):
+        """Index (company, prospect) pairs plus (company, entry) deep-intelligence pairs.
+
+        An entry joins a prospect's document when its company name or email
+        domain matches the prospect's name or one of its contacts' domains.
+        """
+        entries = list(intelligence)
+        by_name, by_domain = {}, {}
+        for position, (company_name, entry) in enumerate(entries):
+            by_name.setdefault(company_name.lower(), []).append(position)
+            if entry.get('domain'):
+                by_domain.setdefault(entry['domain'].lower(), []).append(position)
+        claimed = bytearray(len(entries))
+
+        postings = {}
+        names = []
+        sources = array('B')
+        lengths = []
+
+        def add(company_name, fields, source):
+            doc = len(names)
+            frequencies = {}
+            for text, field in fields:
+                weight = SEARCH_FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    frequencies[token] = frequencies.get(token, 0.0) + weight
+            for token, frequency in frequencies.items():
+                posting = postings.get(token)
+                if posting is None:
+                    posting = postings[token] = (array('I'), array('f'))
+                posting[0].append(doc)
+                posting[1].append(frequency)
+            names.append(company_name)
+            sources.append(source)
+            lengths.append(sum(frequencies.values()))
+
+        for company_name, prospect in prospects:
+            fields = _prospect_fields(company_name, prospect)
+            source = SEARCH_SOURCE_PROSPECT
+            if entries:
+                matches = list(by_name.get(company_name.lower(), ()))
+                for contact in (prospect.get('contacts') or {}).values():
+                    domain = (contact.get('email') or '').rpartition('@')[2].lower()
+                    matches.extend(by_domain.get(domain, ()))
+                for position in matches:
+                    if not claimed[position]:
+                        claimed[position] = 1
+                        fields.extend(_intelligence_fields(*entries[position]))
+                        source |= SEARCH_SOURCE_INTELLIGENCE
+            add(company_name, fields, source)
+
+        # Entries for companies outside the book are documents of their own
+        unclaimed = {}
+        for position, (company_name, entry) in enumerate(entries):
+            if not claimed[position]:
+                unclaimed.setdefault(company_name.lower(), []).append((company_name, entry))
+        for company_entries in unclaimed.values():
+            company_name = company_entries[0][0]
+            add(company_name, [field for _, entry in company_entries for field in _intelligence_fields(company_name, entry)],
+                SEARCH_SOURCE_INTELLIGENCE)
+
+        # Postings hold each word's BM25 term-frequency component, so a query
+        # only multiplies by the word's idf
+        average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) for length in lengths]
+        terms = sorted(postings)
+        term_offsets = array('Q', [0])
+        docs = array('I')
+        impacts = array('f')
+        for term in terms:
+            term_docs, frequencies = postings.pop(term)
+            docs.extend(term_docs)
+            impacts.extend(frequency * (BM25_K1 + 1) / (frequency + norms[doc])
+                           for doc, frequency in zip(term_docs, frequencies))
+            term_offsets.append(len(docs))
+        return cls(terms, term_offsets, docs, impacts, names, sources, source_files)
+
+    def write(self, path):
+        """Write the index in the memory-mappable search index format"""
+        def strings(values):
+            offsets = array('Q', [0])
+            blob = bytearray()
+            for value in values:
+                blob.extend(value.encode('utf-8'))
+                offsets.append(len(blob))
+            return offsets.tobytes(), bytes(blob)
+
+        term_offsets, term_blob = strings(self.terms)
+        name_offsets, name_blob = strings(self.names)
+        sections = [
+            ('terms.offsets', term_offsets),
+            ('terms.blob', term_blob),
+            ('postings.offsets', array('Q', self._term_offsets).tobytes()),
+            ('postings.docs', array('I', self._docs).tobytes()),
+            ('postings.impacts', array('f', self._impacts).tobytes()),
+            ('names.offsets', name_offsets),
+            ('names.blob', name_blob),
+            ('sources', array('B', self.sources).tobytes())
+        ]
+
+        layout = {}
+        offset = 0
+        for name, payload in sections:
+            layout[name] = [offset, len(payload)]
+            offset += (len(payload) + 7) & ~7
+
+        meta = json.dumps({
+            'documents': len(self.names),
+            'terms': len(self.terms),
+            'byteorder': sys.byteorder,
+            'sources': self.source_files,
+            'generated_at': datetime.now().isoformat(),
+            'sections': layout
+        }).encode('utf-8')
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_SNAPSHOT_HEADER.pack(SEARCH_INDEX_MAGIC, SEARCH_INDEX_VERSION, len(meta)))
+            f.write(meta)
+            f.write(b'\x00' * (-f.tell() % 8))
+            for _, payload in sections:
+                f.write(payload)
+                f.write(b'\x00' * (-len(payload) % 8))
+        os.replace(temp_path, path)
+        metrics.incr('files_written')
+        return path
+
+    def _expansions(self, token):
+        """[(term position, match weight)] for the indexed words a query word matches"""
+        terms = self.terms
+        start = bisect.bisect_left(terms, token)
+        stop = bisect.bisect_left(terms, token + '\U0010ffff', start)
+        exact = start < stop and terms[start] == token
+        prefixed = range(start + 1 if exact else start, stop if len(token) >= MIN_PREFIX_LENGTH else start)
+        if len(prefixed) > MAX_PREFIX_TERMS:
+            offsets = self._term_offsets
+            prefixed = heapq.nlargest(MAX_PREFIX_TERMS, prefixed, key=lambda term: offsets[term + 1] - offsets[term])
+        return ([(start, 1.0)] if exact else []) + [(term, PREFIX_MATCH_WEIGHT) for term in prefixed]
+
+    def _idf(self, term):
+        offsets = self._term_offsets
+        frequency = offsets[term + 1] - offsets[term]
+        return math.log(1 + (len(self.names) - frequency + 0.5) / (frequency + 0.5))
+
+    def _postings(self, term, candidates=None):
+        """{doc: impact} for one indexed word, optionally only for candidate docs"""
+        offsets, docs, impacts = self._term_offsets, self._docs, self._impacts
+        start, stop = offsets[term], offsets[term + 1]
+        if candidates is None or len(candidates) * 16 >= stop - start:
+            return dict(zip(docs[start:stop], impacts[start:stop]))
+        # Few candidates left: look each one up in the doc-sorted postings
+        found = {}
+        for doc in candidates:
+            position = bisect.bisect_left(docs, doc, start, stop)
+            if position < stop and docs[position] == doc:
+                found[doc] = impacts[position]
+        return found
+
+    def _match(self, query):
+        """({doc: score / scale}, scale) for documents matching every word of query, in doc order"""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return {}, 1.0
+        offsets = self._term_offsets
+        expanded = [self._expansions(word) for word in words]
+        # Rarest word first, so later words only look at the surviving documents
+        expanded.sort(key=lambda terms: sum(offsets[term + 1] - offsets[term] for term, _ in terms))
+
+        candidates = None
+        matches = []
+        for terms in expanded:
+            if len(terms) == 1:
+                term, match_weight = terms[0]
+                word = self._postings(term, candidates)
+                scale = self._idf(term) * match_weight
+            else:
+                # A word scores by its best-matching expansion
+                word, scale = {}, 1.0
+                for term, match_weight in terms:
+                    idf = self._idf(term) * match_weight
+                    for doc, impact in self._postings(term, candidates).items():
+                        if idf * impact > word.get(doc, 0.0):
+                            word[doc] = idf * impact
+                word = dict(sorted(word.items()))
+            matches.append((word, scale))
+            candidates = word.keys() if candidates is None else candidates & word.keys()
+            if not candidates:
+                return {}, 1.0
+
+        first, scale = matches[0]
+        if len(matches) == 1:
+            return first, scale
+        scores = {doc: impact * scale for doc, impact in first.items() if doc in candidates}
+        for word, scale in matches[1:]:
+            for doc in scores:
+                scores[doc] += word[doc] * scale
+        return scores, 1.0
+
+    def match(self, query):
+        """{doc: score} for documents matching every word of query"""
+        scores, scale = self._match(query)
+        return scores if scale == 1.0 else {doc: score * scale for doc, score in scores.items()}
+
+    def matching(self, query):
+        """Documents matching every word of query, unranked"""
+        return self._match(query)[0].keys()
+
+    def search(self, query, limit=20):
+        """Best matches for query as [{'name', 'score', 'sources'}], highest score first"""
+        scores, scale = self._match(query)
+        if limit is None:
+            ranked = sorted(scores.items(), key=operator.itemgetter(1), reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, scores.items(), key=operator.itemgetter(1))
+        return [{
+            'name': self.names[doc],
+            'score': round(score * scale, 4),
+            'sources': [label for flag, label in ((SEARCH_SOURCE_PROSPECT, 'prospect'),
+                                                  (SEARCH_SOURCE_INTELLIGENCE, 'intelligence'))
+                        if self.sources[doc] & flag]
+        } for doc, score in ranked]
+
+def search_index_sources(data_file, intelligence_file):
+    """Signatures of the files a search index is built from, to tell when it is stale"""
+    return {
+        'prospects': _file_signature(data_file),
+        'intelligence': _file_signature(intelligence_file) if os.path.exists(intelligence_file) else None
+    }
+
+def build_search_index(data_file, intelligence_file, prospects=None):
+    """SearchIndex for a prospect export plus deep-intelligence.json (if present).
+
+    prospects may be (company, prospect) pairs already in memory; otherwise
+    the export is streamed from disk.
+    """
+    sources = search_index_sources(data_file, intelligence_file)
+    intelligence = ()
+    if sources['intelligence'] is not None:
+        try:
+            intelligence = list(iter_intelligence_entries(intelligence_file))
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error loading {os.path.basename(intelligence_file)}: {e}")
+    if prospects is None:
+        prospects = iter_prospect_file(data_file)
+    return SearchIndex.build(prospects, intelligence, sources)
+
+def open_search_index(path):
+    """Memory-map a search index written by SearchIndex.write()"""
+    metrics.incr('files_read')
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError(f"{path} is empty")
+
+    view = memoryview(buffer)
+    if len(view) < _SNAPSHOT_HEADER.size:
+        raise SnapshotError(f"{path} is truncated")
+    magic, version, meta_length = _SNAPSHOT_HEADER.unpack_from(view)
+    if magic != SEARCH_INDEX_MAGIC:
+        raise SnapshotError(f"{path} is not a search index")
+    if version != SEARCH_INDEX_VERSION:
+        raise SnapshotError(f"{path} is search index version {version}, expected {SEARCH_INDEX_VERSION}")
+
+    meta_end = _SNAPSHOT_HEADER.size + meta_length
+    meta = json.loads(bytes(view[_SNAPSHOT_HEADER.size:meta_end]))
+    if meta['byteorder'] != sys.byteorder:
+        raise SnapshotError(f"{path} was written on a {meta['byteorder']}-endian machine")
+    data_start = meta_end + (-meta_end % 8)
+
+    def section(name, fmt=None):
+        start, length = meta['sections'][name]
+        start += data_start
+        if start + length > len(view):
+            raise SnapshotError(f"{path} is truncated")
+        chunk = view[start:start + length]
+        return chunk.cast(fmt) if fmt else chunk
+
+    def strings(name, count):
+        return _SnapshotStrings(range(count), section(f'{name}.offsets', 'Q'), section(f'{name}.blob'))
+
+    index = SearchIndex(strings('terms', meta['terms']), section('postings.offsets', 'Q'),
+                        section('postings.docs', 'I'), section('postings.impacts', 'f'),
+                        strings('names', meta['documents']), section('sources', 'B'), meta['sources'])
+    index._buffer = buffer
+    return index
+
+class FollowupIndex:
+    """Persistent next_followup index: company -> epoch seconds, kept sorted by due time.
+
+    Overdue and due-soon queries bisect the sorted list, so they only touch
+    the entries that are actually due instead of every user record. state
+    stamps the user data it was built from (see
+    JsonDirUserDataStore.directory_state), so files written around the
+    store are noticed and the index rebuilt.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._due = {}
+        self._order = []
+        self.state = None
+
+    def load(self):
+        """Read the index file; returns False if it is missing or unusable"""
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            metrics.incr('files_read')
+            if saved.get('version') != self.VERSION:
+                return False
+            self._due = {company_name: int(ts) for company_name, ts in saved['due'].items()}
+            self.state = saved.get('state')
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        self._order = sorted((ts, company_name) for company_name, ts in self._due.items())
+        return True
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'version': self.VERSION, 'state': self.state, 'due': self._due}, f, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+        metrics.incr('files_written')
+
+    def rebuild(self, records):
+        """Rebuild from (company, user_data) pairs"""
+        self._due = {}
+        for company_name, data in records:
+            ts = to_epoch(data.get('next_followup'))
+            if ts is not None:
+                self._due[company_name] = ts
+        self._order = sorted((ts, company_name) for company_name, ts in self._due.items())
+
+    def update(self, company_name, ts):
+        """Set (or clear, with ts=None) one company's due time; True if it changed"""
+        old = self._due.get(company_name)
+        if old == ts:
+            return False
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (old, company_name))]
+            del self._due[company_name]
+        if ts is not None:
+            bisect.insort(self._order, (ts, company_name))
+            self._due[company_name] = ts
+        return True
+
+    def due_before(self, ts):
+        """[(due_ts, company)] strictly before ts, oldest first"""
+        return self._order[:bisect.bisect_left(self._order, (ts,))]
+
+    def due_between(self, start, end):
+        """[(due_ts, company)] with start <= due_ts < end, soonest first"""
+        return self._order[bisect.bisect_left(self._order, (start,)):bisect.bisect_left(self._order, (end,))]
+
+    def __len__(self):
+        return len(self._order)
+
+FOLLOWUP_INDEX_FILE = '.followup_index.json'
+
+class JsonDirUserDataStore:
+    """User data kept as one pretty-printed JSON file per company (original layout)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._followups = None
+
+    def _path(self, company_name):
+        return os.path.join(self.directory, f"{company_name}.json")
+
+    def _read(self, company_name):
+        user_file = self._path(company_name)
+        metrics.incr('user_records_read')
+        if os.path.exists(user_file):
+            metrics.incr('files_read')
+            with open(user_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def get(self, company_name):
+        with metrics.phase('user_data_read'):
+            return self._read(company_name)
+
+    def _write_temp(self, company_name, data):
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            os.unlink(temp_path)
+            raise
+        return temp_path
+
+    def _sync_directory(self):
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def put(self, company_name, data):
+        self.put_many({company_name: data})
+
+    def get_many(self, company_names):
+        with metrics.phase('user_data_read'):
+            return {name: self._read(name) for name in company_names}
+
+    def put_many(self, records):
+        with metrics.phase('user_data_write'):
+            self._put_many(records)
+        metrics.incr('user_records_written', len(records))
+        metrics.incr('files_written', len(records))
+
+    def _put_many(self, records):
+        index = self._followup_index()
+        # Write every temp file before renaming any, so a failure part-way
+        # through leaves the existing files untouched rather than torn
+        staged = []
+        try:
+            for company_name, data in records.items():
+                staged.append((self._write_temp(company_name, data), self._path(company_name)))
+        except Exception:
+            for temp_path, _ in staged:
+                os.unlink(temp_path)
+            raise
+
+        created = 0
+        latest = 0
+        for temp_path, user_file in staged:
+            created += not os.path.exists(user_file)
+            os.replace(temp_path, user_file)
+            latest = max(latest, os.stat(user_file).st_mtime_ns)
+        if not staged:
+            return
+        self._sync_directory()
+
+        # Keep the follow-up index and its stamp in step with our own writes,
+        # so only writes made around the store cause a rebuild
+        for company_name, data in records.items():
+            index.update(company_name, to_epoch(data.get('next_followup')))
+        if index.state:
+            index.state = [index.state[0] + created, max(index.state[1], latest)]
+        index.save()
+
+    def _followup_index(self):
+        if self._followups is None:
+            index = FollowupIndex(os.path.join(self.directory, FOLLOWUP_INDEX_FILE))
+            # Files written, restored or hand-edited outside the store change the stamp
+            if not index.load() or index.state != list(self.directory_state()):
+                self._rebuild_followup_index(index)
+            self._followups = index
+        return self._followups
+
+    def _rebuild_followup_index(self, index):
+        # Stamped before reading, so a write during the rebuild forces another one
+        index.state = list(self.directory_state())
+
+        def records():
+            for company_name in self.companies():
+                try:
+                    yield company_name, self._read(company_name)
+                except Exception as e:
+                    print(f"Skipping unreadable user data for {company_name}: {e}")
+        index.rebuild(records())
+        index.save()
+
+    def rebuild_followup_index(self):
+        """Rescan every user file, e.g. after files were edited outside the CRM"""
+        index = FollowupIndex(os.path.join(self.directory, FOLLOWUP_INDEX_FILE))
+        self._rebuild_followup_index(index)
+        self._followups = index
+        return len(index)
+
+    def followups_due_before(self, ts):
+        return self._followup_index().due_before(ts)
+
+    def followups_due_between(self, start, end):
+        return self._followup_index().due_between(start, end)
+
+    def companies(self):
+        # Dot-files are temp files and the follow-up index, not companies
+        return [name[:-5] for name in os.listdir(self.directory)
+                if name.endswith('.json') and not name.startswith('.')]
+
+    def directory_state(self):
+        """(company files, highest file mtime) - unlike the directory's own
+        mtime, this also moves when a file is edited in place"""
+        count = 0
+        latest = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and not entry.name.startswith('.'):
+                    try:
+                        latest = max(latest, entry.stat().st_mtime_ns)
+                    except OSError:
+                        continue
+                    count += 1
+        return count, latest
+
+    def change_signature(self):
+        """Changes whenever a record is written: our writes rename into the
+        directory, and edits made in place by other programs move the
+        highest file mtime. Costs one stat per user file."""
+        return (os.stat(self.directory).st_mtime_ns,) + self.directory_state()
+
+    def write_generation(self):
+        """Advances with every write and, unlike a WAL, never moves on its own.
+
+        A list, so it compares equal after a JSON round-trip (aggregates
+        file, change feed metadata).
+        """
+        return list(self.change_signature())
+
+    def refresh(self):
+        """Drop in-memory state so writes made by other processes are picked up"""
+        self._followups = None
+
+    def close(self):
+        pass
+
+class SQLiteUserDataStore:
+    """All user data in a single SQLite file (WAL mode, indexed on next_followup)"""
+
+    # Keeps IN (...) lists under SQLite's default host parameter limit
+    BATCH_SIZE = 500
+    # PRAGMA user_version; 1 added next_followup_ts (epoch seconds)
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS user_data (
+                company TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                next_followup TEXT,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_user_data_next_followup
+                ON user_data (next_followup);
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+        self._migrate_schema()
+
+    def _migrate_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        with self._conn:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(user_data)")]
+            if 'next_followup_ts' not in columns:
+                self._conn.execute("ALTER TABLE user_data ADD COLUMN next_followup_ts INTEGER")
+            # ISO strings with mixed offsets do not sort by time, so backfill epoch seconds
+            rows = self._conn.execute(
+                "SELECT company, next_followup FROM user_data WHERE next_followup IS NOT NULL"
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE user_data SET next_followup_ts = ? WHERE company = ?",
+                [(to_epoch(next_followup), company_name) for company_name, next_followup in rows]
+            )
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_user_data_next_followup_ts
+                    ON user_data (next_followup_ts)
+            """)
+            self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    @staticmethod
+    def _row(company_name, data, updated_at):
+        next_followup = data.get('next_followup')
+        return (company_name, json.dumps(data), next_followup, to_epoch(next_followup), updated_at)
+
+    def get(self, company_name):
+        metrics.incr('user_records_read')
+        with metrics.phase('user_data_read'), self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM user_data WHERE company = ?", (company_name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def put(self, company_name, data):
+        self.put_many({company_name: data})
+
+    def get_many(self, company_names):
+        company_names = list(company_names)
+        found = {}
+        metrics.incr('user_records_read', len(company_names))
+        with metrics.phase('user_data_read'), self._lock:
+            for start in range(0, len(company_names), self.BATCH_SIZE):
+                batch = company_names[start:start + self.BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT company, data FROM user_data WHERE company IN ({placeholders})", batch
+                )
+                for company_name, data in rows:
+                    found[company_name] = json.loads(data)
+        return {name: found.get(name, {}) for name in company_names}
+
+    def put_many(self, records):
+        updated_at = datetime.now().isoformat()
+        rows = [self._row(name, data, updated_at) for name, data in records.items()]
+        metrics.incr('user_records_written', len(rows))
+        with metrics.phase('user_data_write'), self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO user_data (company, data, next_followup, next_followup_ts, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (company) DO UPDATE SET
+                    data = excluded.data,
+                    next_followup = excluded.next_followup,
+                    next_followup_ts = excluded.next_followup_ts,
+                    updated_at = excluded.updated_at
+            """, rows)
+            self._conn.execute("""
+                INSERT INTO store_meta (key, value) VALUES ('generation', 1)
+                ON CONFLICT (key) DO UPDATE SET value = value + 1
+            """)
+
+    def followups_due_before(self, ts):
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT next_followup_ts, company FROM user_data
+                WHERE next_followup_ts < ? ORDER BY next_followup_ts, company
+            """, (ts,)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def followups_due_between(self, start, end):
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT next_followup_ts, company FROM user_data
+                WHERE next_followup_ts >= ? AND next_followup_ts < ?
+                ORDER BY next_followup_ts, company
+            """, (start, end)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def companies(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT company FROM user_data")]
+
+    def change_signature(self):
+        """Changes whenever the database or its write-ahead log is written"""
+        signature = []
+        for path in (self.path, self.path + '-wal'):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def write_generation(self):
+        """Counts put_many() calls; checkpoints and restarts leave it alone"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def refresh(self):
+        # Every query reads the database directly, so there is nothing to drop
+        pass
+
+    def migrate_from_dir(self, directory):
+        """One-shot import of a user_data/ directory; the directory is left as-is"""
+        source = JsonDirUserDataStore(directory)
+        records = {}
+        migrated = 0
+        for company_name in source.companies():
+            try:
+                records[company_name] = source.get(company_name)
+            except Exception as e:
+                print(f"Skipping unreadable user data for {company_name}: {e}")
+                continue
+            if len(records) >= self.BATCH_SIZE:
+                self.put_many(records)
+                migrated += len(records)
+                records = {}
+        if records:
+            self.put_many(records)
+            migrated += len(records)
+        return migrated
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+USER_DATA_DB = "user_data.db"
+
+def diff_user_data(old, new):
+    """Field-level diff between two user records: (changed fields, removed keys)"""
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+class UserDataUnitOfWork:
+    """Collects user data changes during a run and flushes them once at the end.
+
+    Records handed out by get()/get_many() are working copies; save() only
+    marks them dirty. commit() diffs each dirty record against what was
+    originally read, skips records whose content did not change, re-applies
+    the field-level diffs onto the latest stored version and writes all of
+    them with a single store.put_many() call. After a commit, written and
+    replaced hold the records it stored and the versions they overwrote.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._working = {}
+        self._originals = {}
+        self._dirty = set()
+        self.writes = 0
+        self.unchanged = 0
+        self.written = {}
+        self.replaced = {}
+
+    def _track(self, company_name, data):
+        # A JSON round-trip is a cheap deep copy for plain JSON records
+        self._originals[company_name] = json.loads(json.dumps(data))
+        self._working[company_name] = data
+        return data
+
+    def get(self, company_name):
+        if company_name not in self._working:
+            self._track(company_name, self.store.get(company_name))
+        return self._working[company_name]
+
+    def get_many(self, company_names):
+        company_names = list(company_names)
+        missing = [name for name in company_names if name not in self._working]
+        if missing:
+            for company_name, data in self.store.get_many(missing).items():
+                self._track(company_name, data)
+        return {name: self._working[name] for name in company_names}
+
+    def adopt(self, records):
+        """get_many() for records the caller already read from the store"""
+        for company_name, data in records.items():
+            if company_name not in self._working:
+                self._track(company_name, data)
+        return {name: self._working[name] for name in records}
+
+    def save(self, company_name, data):
+        self._working[company_name] = data
+        self._dirty.add(company_name)
+
+    def release_clean(self, company_names=None):
+        """Forget records that were read but never saved (they are re-read on demand).
+
+        company_names limits this to one batch's records.
+        """
+        company_names = self._working if company_names is None else company_names
+        for company_name in [name for name in company_names if name in self._working and name not in self._dirty]:
+            del self._working[company_name]
+            self._originals.pop(company_name, None)
+
+    def _read_stored(self, company_names):
+        """store.get_many(), one record at a time if that fails; unreadable records are left out"""
+        company_names = list(company_names)
+        try:
+            return self.store.get_many(company_names)
+        except Exception as e:
+            print(f"Error loading user data: {e}")
+        records = {}
+        for company_name in company_names:
+            try:
+                records[company_name] = self.store.get(company_name)
+            except Exception as e:
+                print(f"Skipping unreadable user data for {company_name}: {e}")
+        return records
+
+    def pending_changes(self):
+        """{company: (changed fields, removed keys)} for records that really changed.
+
+        A record whose stored version cannot be read is left out (and its
+        file left as-is), so one corrupt record cannot block the flush.
+        """
+        changes = {}
+        missing = [name for name in self._dirty if self._originals.get(name) is None]
+        if missing:
+            self._originals.update(self._read_stored(missing))
+        for company_name in self._dirty:
+            original = self._originals.get(company_name)
+            if original is None:
+                continue
+            changed, removed = diff_user_data(original, self._working[company_name])
+            if changed or removed:
+                changes[company_name] = (changed, removed)
+        return changes
+
+    def commit(self):
+        """Write every changed record in one batch; returns the number written"""
+        changes = self.pending_changes()
+        self.unchanged = len(self._dirty) - len(changes)
+
+        self.written, self.replaced = {}, {}
+        if changes:
+            latest = self._read_stored(changes.keys())
+            records = {}
+            for company_name, (changed, removed) in changes.items():
+                if company_name not in latest:
+                    continue
+                record = dict(latest[company_name])
+                record.update(changed)
+                for key in removed:
+                    record.pop(key, None)
+                records[company_name] = record
+            if records:
+                self.store.put_many(records)
+            self.written = records
+            self.replaced = {company_name: latest[company_name] for company_name in records}
+
+        self.writes = len(self.written)
+        self._dirty.clear()
+        return self.writes
+
+def open_user_data_store(workspace_dir, backend=None):
+    """Open the user data store for a workspace.
+
+    backend is 'json' or 'sqlite'; when omitted it comes from CRM_USER_STORE,
+    falling back to SQLite if user_data.db exists and the JSON directory otherwise.
+    """
+    db_path = os.path.join(workspace_dir, USER_DATA_DB)
+    backend = backend or os.environ.get('CRM_USER_STORE')
+    if not backend:
+        backend = 'sqlite' if os.path.exists(db_path) else 'json'
+
+    if backend == 'sqlite':
+        return SQLiteUserDataStore(db_path)
+    if backend == 'json':
+        return JsonDirUserDataStore(os.path.join(workspace_dir, "user_data"))
+    raise ValueError(f"Unknown user data store backend: {backend}")
+
+CHANGE_FEED_DB = "crm_changes.db"
+# Deletions are remembered this long; clients further behind reload everything
+CHANGE_FEED_RETENTION_DAYS = 30
+
+def prospect_digest(prospect):
+    """Content hash of one prospect, for telling which ones a regenerated export changed"""
+    return hashlib.sha1(json.dumps(prospect, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class ChangeFeed:
+    """Versioned log of prospect and user data changes, for clients that pull deltas.
+
+    Each (kind, key) keeps one row stamped with the version of its latest
+    change, so the log never holds more rows than there are records and
+    "changes since V" is a range scan on the version. Deletions stay as
+    tombstones until compact() drops old ones and raises the floor;
+    clients behind the floor are told to reload everything.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS changes (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                changed_at INTEGER NOT NULL,
+                UNIQUE (kind, key)
+            );
+            CREATE TABLE IF NOT EXISTS feed_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS prospect_digests (
+                company TEXT PRIMARY KEY,
+                digest TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _version(self):
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    def version(self):
+        """The latest version handed out"""
+        with self._lock:
+            return self._version()
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM feed_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO feed_meta (key, value) VALUES (?, ?)",
+                               (key, json.dumps(value)))
+
+    def floor(self):
+        """Clients synced to a version below this must reload everything"""
+        return self.get_meta('floor', 0)
+
+    def record(self, kind, keys, deleted=False, now=None):
+        """Stamp each key with a new version; returns the latest version"""
+        now = epoch_now(now)
+        with self._lock, self._conn:
+            # REPLACE drops the key's previous row, so it gets a fresh version
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO changes (kind, key, deleted, changed_at) VALUES (?, ?, ?, ?)",
+                [(kind, key, int(deleted), now) for key in keys]
+            )
+            return self._version()
+
+    def raise_floor(self):
+        """Skip a version and make it the floor: changes before it cannot be replayed"""
+        with self._lock, self._conn:
+            version = self._version() + 1
+            # sqlite_sequence has no unique key, so update its row when there is one
+            if not self._conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'changes'",
+                                      (version,)).rowcount:
+                self._conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('changes', ?)", (version,))
+            self._conn.execute("INSERT OR REPLACE INTO feed_meta (key, value) VALUES ('floor', ?)",
+                               (json.dumps(version),))
+        return version
+
+    def changes_since(self, since, limit=None):
+        """(rows, version, reset): [(version, kind, key, deleted)] after since, oldest first.
+
+        With a limit, version is that of the last row returned. reset is
+        True when since is below the floor or ahead of the feed.
+        """
+        floor = self.floor()
+        with self._lock:
+            current = self._version()
+            if since < floor or since > current:
+                return [], current, True
+            rows = self._conn.execute(
+                "SELECT version, kind, key, deleted FROM changes WHERE version > ? ORDER BY version LIMIT ?",
+                (since, -1 if limit is None else limit)
+            ).fetchall()
+        if limit is not None and len(rows) == limit:
+            current = rows[-1][0]
+        return rows, current, False
+
+    def sync_prospects(self, prospects, now=None):
+        """Record the prospects a regenerated export added, changed or dropped.
+
+        prospects yields (company, prospect) pairs; the first sync only
+        stores their digests and raises the floor. Returns the number of
+        changes recorded.
+        """
+        with self._lock:
+            known = dict(self._conn.execute("SELECT company, digest FROM prospect_digests"))
+        digests = {company_name: prospect_digest(prospect) for company_name, prospect in prospects}
+        if not known:
+            changed, dropped = [], []
+        else:
+            changed = [name for name, digest in digests.items() if known.get(name) != digest]
+            dropped = [name for name in known if name not in digests]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM prospect_digests")
+            self._conn.executemany("INSERT INTO prospect_digests (company, digest) VALUES (?, ?)",
+                                   digests.items())
+        if not known:
+            self.raise_floor()
+        self.record('prospects', changed, now=now)
+        self.record('prospects', dropped, deleted=True, now=now)
+        return len(changed) + len(dropped)
+
+    def compact(self, retention_days=CHANGE_FEED_RETENTION_DAYS, now=None):
+        """Drop tombstones older than retention_days; returns how many went"""
+        cutoff = epoch_now(now) - retention_days * SECONDS_PER_DAY
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT COUNT(*), MAX(version) FROM changes WHERE deleted = 1 AND changed_at < ?", (cutoff,)
+            ).fetchone()
+            if row[0]:
+                self._conn.execute("DELETE FROM changes WHERE deleted = 1 AND changed_at < ?", (cutoff,))
+                floor = json.loads((self._conn.execute(
+                    "SELECT value FROM feed_meta WHERE key = 'floor'").fetchone() or ['0'])[0])
+                self._conn.execute("INSERT OR REPLACE INTO feed_meta (key, value) VALUES ('floor', ?)",
+                                   (json.dumps(max(floor, row[1])),))
+        with self._lock:
+            self._conn.execute("VACUUM")
+        return row[0]
+
+    def close(self):
+        self._conn.close()
+
+SECONDS_PER_DAY = 86400
+
+@lru_cache(maxsize=1 << 16)
+def _parse_epoch(value):
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() // 1)
+    except (ValueError, TypeError, OverflowError, OSError):
+        return None
+
+def to_epoch(value):
+    """Normalize an ISO-8601 timestamp to integer epoch seconds (None if unusable).
+
+    Timezone-aware values are converted exactly; naive ones are read as local
+    time, which is how the dashboard writes them. Each distinct string is only
+    parsed once per process.
+    """
+    if isinstance(value, bool) or value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value // 1)
+    if isinstance(value, str):
+        return _parse_epoch(value)
+    return None
+
+def epoch_now(now=None):
+    """Run-level "now" as epoch seconds; accepts None, a datetime or epoch seconds"""
+    if now is None:
+        return int(time.time())
+    if isinstance(now, datetime):
+        return int(now.timestamp() // 1)
+    return int(now)
+
+def prospect_epoch(prospect, field):
+    """Epoch seconds for a prospect timestamp, preferring the pre-computed <field>_ts"""
+    value = prospect.get(f'{field}_ts')
+    if value is None:
+        value = to_epoch(prospect.get(field))
+    return value
+
+# Lead scoring weights, shared by calculate_auto_score and the batch scorer
+RECENCY_BONUS = ((7, 50), (30, 25), (90, 10))  # (days since contact below, bonus)
+STATUS_BONUS = {
+    'hot': 100,
+    'warm': 50,
+    'new': 25,
+    'cold': 0
+}
+PRIORITY_TAG_BONUS = 15
+BUSINESS_SCORE_THRESHOLD, BUSINESS_BONUS = 10, 30
+CONVERSATION_SCORE_THRESHOLD, CONVERSATION_BONUS = 5, 20
+HIGH_VALUE_CATEGORIES = ['Food Processing', 'Construction', 'Industrial/Manufacturing']
+CATEGORY_BONUS = 25
+SCORE_CAP = 500
+
+# Changes whenever a weight above changes, so stored fingerprints go stale
+SCORING_VERSION = hashlib.sha1(repr((
+    RECENCY_BONUS, sorted(STATUS_BONUS.items()), PRIORITY_TAG_BONUS,
+    BUSINESS_SCORE_THRESHOLD, BUSINESS_BONUS, CONVERSATION_SCORE_THRESHOLD,
+    CONVERSATION_BONUS, HIGH_VALUE_CATEGORIES, CATEGORY_BONUS, SCORE_CAP
+)).encode('utf-8')).hexdigest()[:8]
+
+def _days_since_contact(prospect, now):
+    """Whole days between the prospect's latest contact and now (epoch seconds)"""
+    last_contact = prospect_epoch(prospect, 'latest_contact')
+    if last_contact is None:
+        return None
+    return (now - last_contact) // SECONDS_PER_DAY
+
+def calculate_auto_score(prospect, user_data, now=None):
+    """Calculate automated lead score based on various factors"""
+    score = prospect.get('overall_score', 0)
+    
+    # Recent activity bonus
+    days_since = _days_since_contact(prospect, epoch_now(now))
+    if days_since is not None:
+        for days, bonus in RECENCY_BONUS:
+            if days_since < days:
+                score += bonus
+                break
+    
+    # Status bonus
+    score += STATUS_BONUS.get(user_data.get('status', 'cold'), 0)
+    
+    # Priority tags bonus
+    priority_tags = user_data.get('priority_tags', [])
+    score += len(priority_tags) * PRIORITY_TAG_BONUS
+    
+    # Business context bonus
+    business_score = prospect.get('business_score', 0)
+    conversation_score = prospect.get('conversation_score', 0)
+    
+    if business_score > BUSINESS_SCORE_THRESHOLD:
+        score += BUSINESS_BONUS
+    if conversation_score > CONVERSATION_SCORE_THRESHOLD:
+        score += CONVERSATION_BONUS
+    
+    # Industry relevance bonus
+    if prospect.get('category') in HIGH_VALUE_CATEGORIES:
+        score += CATEGORY_BONUS
+    
+    return min(score, SCORE_CAP)
+
+def recency_bucket(prospect, now=None):
+    """Index of the RECENCY_BONUS band the latest contact falls in (None if unusable)"""
+    days_since = _days_since_contact(prospect, epoch_now(now))
+    if days_since is None:
+        return None
+    for bucket, (days, _) in enumerate(RECENCY_BONUS):
+        if days_since < days:
+            return bucket
+    return len(RECENCY_BONUS)
+
+def score_fingerprint(prospect, user_data):
+    """Hash of every non-time input to calculate_auto_score plus the stored score.
+
+    The recency bonus is tracked separately through recency_bucket(), since
+    it changes with the passage of time rather than with the data.
+    """
+    inputs = [
+        SCORING_VERSION,
+        prospect.get('overall_score', 0),
+        prospect.get('business_score', 0),
+        prospect.get('conversation_score', 0),
+        prospect.get('category'),
+        user_data.get('status', 'cold'),
+        len(user_data.get('priority_tags', [])),
+        user_data.get('custom_score')
+    ]
+    return hashlib.sha1(json.dumps(inputs, default=str).encode('utf-8')).hexdigest()[:16]
+
+def needs_rescore(prospect, user_data, now=None):
+    """False when neither the score inputs nor the recency band changed since the last run"""
+    return (user_data.get('score_fingerprint') != score_fingerprint(prospect, user_data)
+            or user_data.get('score_recency_bucket') != recency_bucket(prospect, now))
+
+def build_scoring_columns(prospects, user_records, now=None):
+    """Load the scoring inputs of many prospects into columnar NumPy arrays"""
+    now = epoch_now(now)
+    if isinstance(prospects, ProspectTable):
+        return _table_scoring_columns(prospects, user_records, now)
+
+    names = list(prospects.keys())
+    overall, days_since, status_bonus, tag_count = [], [], [], []
+    business, conversation, high_value = [], [], []
+
+    for company_name in names:
+        prospect = prospects[company_name]
+        user_data = user_records.get(company_name) or {}
+        overall.append(prospect.get('overall_score', 0))
+        days = _days_since_contact(prospect, now)
+        days_since.append(np.nan if days is None else days)
+        status_bonus.append(STATUS_BONUS.get(user_data.get('status', 'cold'), 0))
+        tag_count.append(len(user_data.get('priority_tags', [])))
+        business.append(prospect.get('business_score', 0))
+        conversation.append(prospect.get('conversation_score', 0))
+        high_value.append(prospect.get('category') in HIGH_VALUE_CATEGORIES)
+
+    return {
+        'names': names,
+        'overall_score': np.array(overall) if overall else np.zeros(0, dtype=np.int64),
+        'days_since': np.array(days_since, dtype=np.float64),
+        'status_bonus': np.array(status_bonus, dtype=np.int64),
+        'tag_count': np.array(tag_count, dtype=np.int64),
+        'business_score': np.array(business),
+        'conversation_score': np.array(conversation),
+        'high_value': np.array(high_value, dtype=bool)
+    }
+
+def _table_scoring_columns(table, user_records, now):
+    """build_scoring_columns for a ProspectTable, reading its columns directly"""
+    def int_column(field):
+        if table.is_exact_int_column(field):
+            return np.frombuffer(table.column(field), dtype=np.int64)
+        return np.array([table[name].get(field, 0) for name in table.names])
+
+    # Rows carrying latest_contact_ts are handled in one vectorized step; only
+    # older exports without it fall back to parsing the ISO string
+    has_ts = (np.frombuffer(table._present, dtype=np.uint32)
+              & ProspectTable.FIELD_BITS['latest_contact_ts']).astype(bool)
+    if 'latest_contact_ts' in table._inexact:
+        has_ts[:] = False
+    latest_ts = np.frombuffer(table.column('latest_contact_ts'), dtype=np.int64)
+    days_since = np.where(has_ts, (now - latest_ts) // SECONDS_PER_DAY, np.nan)
+    latest_contact = table.column('latest_contact')
+    for row in np.flatnonzero(~has_ts).tolist():
+        last_contact = to_epoch(latest_contact[row])
+        if last_contact is not None:
+            days_since[row] = (now - last_contact) // SECONDS_PER_DAY
+
+    # Decode snapshot names once; in-memory tables already hold a list
+    names = table.names if isinstance(table.names, list) else list(table.names)
+    status_bonus = np.zeros(len(table), dtype=np.int64)
+    tag_count = np.zeros(len(table), dtype=np.int64)
+    if user_records:
+        for row, company_name in enumerate(names):
+            user_data = user_records.get(company_name)
+            if user_data:
+                status_bonus[row] = STATUS_BONUS.get(user_data.get('status', 'cold'), 0)
+                tag_count[row] = len(user_data.get('priority_tags', []))
+
+    return {
+        'names': names,
+        'overall_score': int_column('overall_score'),
+        'days_since': days_since,
+        'status_bonus': status_bonus,
+        'tag_count': tag_count,
+        'business_score': int_column('business_score'),
+        'conversation_score': int_column('conversation_score'),
+        'high_value': _high_value_mask(table.column('category'))
+    }
+
+def _high_value_mask(categories):
+    """Boolean mask of HIGH_VALUE_CATEGORIES, testing each distinct category once"""
+    if isinstance(categories, _SnapshotStrings):
+        refs = np.frombuffer(categories.refs, dtype=np.uint32)
+        wanted = [ref for ref in np.unique(refs).tolist()
+                  if ref != _NO_STRING and categories.decode_ref(ref) in HIGH_VALUE_CATEGORIES]
+        return np.isin(refs, wanted)
+
+    category_flags = {}
+    return np.fromiter(
+        (category_flags.setdefault(category, category in HIGH_VALUE_CATEGORIES)
+         for category in categories),
+        dtype=bool, count=len(categories))
+
+def score_columns(columns):
+    """Vectorized calculate_auto_score over columns from build_scoring_columns"""
+    days_since = columns['days_since']
+    score = columns['overall_score'] + columns['status_bonus']
+
+    # Comparisons against NaN are False, so prospects without a usable
+    # latest_contact get no recency bonus - same as the scalar path
+    conditions = [days_since < days for days, _ in RECENCY_BONUS]
+    score = score + np.select(conditions, [bonus for _, bonus in RECENCY_BONUS], default=0)
+
+    score = score + columns['tag_count'] * PRIORITY_TAG_BONUS
+    score = score + (columns['business_score'] > BUSINESS_SCORE_THRESHOLD) * BUSINESS_BONUS
+    score = score + (columns['conversation_score'] > CONVERSATION_SCORE_THRESHOLD) * CONVERSATION_BONUS
+    score = score + columns['high_value'] * CATEGORY_BONUS
+    return np.minimum(score, SCORE_CAP)
+
+def batch_auto_scores(prospects, user_records, now=None):
+    """Score many prospects in one pass; returns {company: score}.
+
+    Uses NumPy when it is installed and calculate_auto_score otherwise; both
+    produce identical results.
+    """
+    now = epoch_now(now)
+    if np is None:
+        return {
+            company_name: calculate_auto_score(prospect, user_records.get(company_name) or {}, now)
+            for company_name, prospect in prospects.items()
+        }
+
+    columns = build_scoring_columns(prospects, user_records, now)
+    return dict(zip(columns['names'], score_columns(columns).tolist()))
+
+def score_update(prospect, user_data, new_score, now=None):
+    """Fields re-scoring sets on user_data ({} when nothing changes).
+
+    custom_score only moves when the new score differs by 10 or more; the
+    fingerprint and recency band it was computed from are recorded so
+    unchanged prospects can be skipped next time.
+    """
+    changes = {}
+    current_score = user_data.get('custom_score', prospect.get('overall_score', 0))
+    if abs(new_score - current_score) >= 10:  # Only update if significant change
+        changes['custom_score'] = new_score
+        changes['score_updated'] = datetime.fromtimestamp(epoch_now(now)).isoformat()
+    
+    fingerprint = score_fingerprint(prospect, dict(user_data, **changes) if changes else user_data)
+    bucket = recency_bucket(prospect, now)
+    if user_data.get('score_fingerprint') != fingerprint or user_data.get('score_recency_bucket') != bucket:
+        changes['score_fingerprint'] = fingerprint
+        changes['score_recency_bucket'] = bucket
+    return changes
+
+def suggest_status_update(prospect, user_data, now=None):
+    """Suggest status updates based on activity patterns"""
+    current_status = user_data.get('status', 'new')
+    business_score = prospect.get('business_score', 0)
+    conversation_score = prospect.get('conversation_score', 0)
+    
+    # High activity = move to warm
+    if (business_score > 20 or conversation_score > 10) and current_status == 'new':
+        return 'warm'
+    
+    # Very high activity = move to hot
+    if (business_score > 50 or conversation_score > 20) and current_status in ['new', 'warm']:
+        return 'hot'
+    
+    # Recent contact activity
+    last_contact = to_epoch(user_data.get('last_contacted'))
+    if last_contact is not None:
+        days_since = (epoch_now(now) - last_contact) // SECONDS_PER_DAY
+        
+        if days_since <= 7 and current_status == 'cold':
+            return 'warm'
+    
+    return None
+
+def evaluate_prospects(prospects, user_records, now, force=False, score=True, pipeline=True):
+    """Re-scoring and pipeline decisions for a batch, without touching user data.
+
+    Returns (skipped, score_changes, status_changes): how many prospects
+    had unchanged score inputs, {company: score_update() fields} and
+    {company: new status}, holding only prospects that change, in batch
+    order. Pure, so shards of a batch can be evaluated in worker processes.
+    """
+    skipped = 0
+    score_changes = {}
+    if score:
+        dirty = prospects
+        if not force:
+            dirty = {company_name: prospect for company_name, prospect in prospects.items()
+                     if needs_rescore(prospect, user_records[company_name], now)}
+        skipped = len(prospects) - len(dirty)
+        # A columnar batch (ProspectTable slice) is scored whole in one
+        # vectorized pass over its columns rather than re-building per-row
+        # columns for the dirty subset; only the dirty scores are used
+        scored = prospects if np is not None and isinstance(prospects, ProspectTable) else dirty
+        new_scores = batch_auto_scores(scored, user_records, now)
+        for company_name, prospect in dirty.items():
+            changes = score_update(prospect, user_records[company_name], new_scores[company_name], now)
+            if changes:
+                score_changes[company_name] = changes
+    
+    status_changes = {}
+    if pipeline:
+        for company_name, prospect in prospects.items():
+            user_data = user_records[company_name]
+            new_status = suggest_status_update(prospect, user_data, now)
+            if new_status and new_status != user_data.get('status', 'new'):
+                status_changes[company_name] = new_status
+    return skipped, score_changes, status_changes
+
+# The only fields evaluate_prospects() reads, so batches sent to workers stay small
+EVALUATION_PROSPECT_FIELDS = ('overall_score', 'business_score', 'conversation_score', 'category',
+                              'latest_contact', 'latest_contact_ts')
+EVALUATION_USER_FIELDS = ('status', 'priority_tags', 'custom_score', 'score_fingerprint',
+                          'score_recency_bucket', 'last_contacted')
+# Batches queued per worker process, bounding how much of the book is in flight
+EVALUATION_QUEUE_DEPTH = 2
+
+def evaluation_inputs(prospects, user_records):
+    """A batch trimmed to the fields evaluate_prospects() reads"""
+    slim_prospects = {}
+    slim_records = {}
+    for company_name, prospect in prospects.items():
+        user_data = user_records[company_name]
+        slim_prospects[company_name] = {field: prospect[field] for field in EVALUATION_PROSPECT_FIELDS
+                                        if field in prospect}
+        slim_records[company_name] = {field: user_data[field] for field in EVALUATION_USER_FIELDS
+                                      if field in user_data}
+    return slim_prospects, slim_records
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+# Ranges covering more than 1/N of the rows are answered with bitmaps
+NARROW_RANGE_FRACTION = 16
+RANGE_MASK_CACHE_SIZE = 32
+
+def _bitmap(rows, size):
+    """Python int with bit n set for every row n"""
+    bits = bytearray((size + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, 'little')
+
+def iter_bitmap_rows(mask, size):
+    """Rows set in a bitmap, in ascending order"""
+    bits = mask.to_bytes((size + 7) // 8 or 1, 'little')
+    for match in _NONZERO_BYTE.finditer(bits):
+        base = match.start() << 3
+        byte = bits[match.start()]
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+def _custom_score(user_data, auto_score):
+    """The dashboard's score: a stored custom_score, else the automatic one"""
+    custom_score = user_data.get('custom_score')
+    return custom_score if isinstance(custom_score, (int, float)) else auto_score
+
+def _sort_number(value, missing):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else missing
+
+def _equality_pairs(equals):
+    """[(field, values)] from a mapping or pairs of field=value or field=collection"""
+    if not equals:
+        return []
+    items = equals.items() if isinstance(equals, Mapping) else equals
+    return [(field, tuple(wanted) if isinstance(wanted, (set, frozenset, list, tuple)) else (wanted,))
+            for field, wanted in items]
+
+class ProspectIndex:
+    """Secondary indexes over a loaded set of prospects, numbered by row.
+
+    Equality fields keep one bitmap per distinct value (a Python int with
+    bit n set for row n), so combined filters are a few big-int ANDs and
+    counts are bit_count(). Sorted fields keep (key, row) pairs in order
+    for range filters and top-K; descending fields store negated keys, so
+    every walk is ascending and ties stay in row (book) order.
+    """
+
+    PROSPECT_FIELDS = ('category', 'industry', 'relationship_strength')
+    # (field, descending, value when missing)
+    SORTED_FIELDS = (('overall_score', True, 0), ('current_lead_score', True, 0),
+                     ('latest_contact', True, 0), ('next_followup', False, float('inf')),
+                     ('custom_score', True, 0))
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.rows = {company_name: row for row, company_name in enumerate(self.names)}
+        self.all_rows = (1 << len(self.names)) - 1
+        self.prospects = None
+        self._values = {}
+        self._bitmaps = {}
+        self._keys = {}
+        self._entries = {}
+        self._descending = {}
+        self._range_masks = {}
+        # (order field, equality field, value) -> sorted entries of just those rows
+        self._partitions = {}
+
+    @classmethod
+    def build(cls, prospects, user_records, now=None):
+        """Index prospects plus their user data (status, next follow-up and score)"""
+        now = epoch_now(now)
+        index = cls(prospects.keys())
+        index.prospects = prospects
+        records = [user_records.get(company_name) or {} for company_name in index.names]
+        for field in cls.PROSPECT_FIELDS:
+            index.add_equality_field(field, (prospects[name].get(field) for name in index.names))
+        index.add_equality_field('status', (data.get('status') or None for data in records))
+
+        scores = batch_auto_scores(prospects, user_records, now)
+        rows = [prospects[company_name] for company_name in index.names]
+        columns = {
+            'overall_score': (prospect.get('overall_score') for prospect in rows),
+            'current_lead_score': (prospect.get('current_lead_score') for prospect in rows),
+            'latest_contact': (prospect_epoch(prospect, 'latest_contact') for prospect in rows),
+            'next_followup': (to_epoch(data.get('next_followup')) for data in records),
+            'custom_score': (_custom_score(data, scores[company_name]) for company_name, data in zip(index.names, records))
+        }
+        for field, descending, missing in cls.SORTED_FIELDS:
+            index.add_sorted_field(field, (_sort_number(value, missing) for value in columns[field]), descending)
+        return index
+
+    def add_equality_field(self, field, values):
+        values = list(values)
+        rows_by_value = {}
+        for row, value in enumerate(values):
+            rows_by_value.setdefault(value, []).append(row)
+        self._values[field] = values
+        self._bitmaps[field] = {value: _bitmap(rows, len(values)) for value, rows in rows_by_value.items()}
+
+    def add_sorted_field(self, field, values, descending=False):
+        keys = [-value if descending else value for value in values]
+        self._keys[field] = keys
+        self._entries[field] = sorted(zip(keys, range(len(keys))))
+        self._descending[field] = descending
+
+    def set_value(self, row, field, value):
+        """Change one row's value for a field, keeping its index in step"""
+        if field in self._bitmaps:
+            values = self._values[field]
+            old = values[row]
+            if old == value:
+                return
+            bit = 1 << row
+            bitmaps = self._bitmaps[field]
+            bitmaps[old] &= ~bit
+            if not bitmaps[old]:
+                del bitmaps[old]
+            bitmaps[value] = bitmaps.get(value, 0) | bit
+            values[row] = value
+            for (order_by, other, partition_value), entries in self._partitions.items():
+                if other == field and partition_value in (old, value):
+                    entry = (self._keys[order_by][row], row)
+                    if partition_value == old:
+                        del entries[bisect.bisect_left(entries, entry)]
+                    else:
+                        bisect.insort(entries, entry)
+        else:
+            keys = self._keys[field]
+            key = -value if self._descending[field] else value
+            old = keys[row]
+            if old == key:
+                return
+            entries = self._entries[field]
+            del entries[bisect.bisect_left(entries, (old, row))]
+            bisect.insort(entries, (key, row))
+            keys[row] = key
+            self._range_masks = {cached: mask for cached, mask in self._range_masks.items() if cached[0] != field}
+            for (order_by, other, partition_value), entries in self._partitions.items():
+                if order_by == field and self._values[other][row] == partition_value:
+                    del entries[bisect.bisect_left(entries, (old, row))]
+                    bisect.insort(entries, (key, row))
+
+    def update_user_data(self, company_name, user_data, now=None):
+        """Re-index the user data fields of one company after it was edited"""
+        row = self.rows[company_name]
+        prospect = self.prospects[company_name]
+        self.set_value(row, 'status', user_data.get('status') or None)
+        self.set_value(row, 'next_followup', _sort_number(to_epoch(user_data.get('next_followup')), float('inf')))
+        custom_score = _custom_score(user_data, None)
+        if custom_score is None:
+            custom_score = calculate_auto_score(prospect, user_data, now)
+        self.set_value(row, 'custom_score', _sort_number(custom_score, 0))
+
+    def value(self, row, field):
+        if field in self._values:
+            return self._values[field][row]
+        key = self._keys[field][row]
+        return -key if self._descending[field] else key
+
+    def mask(self, **equals):
+        """Bitmap of rows matching every field=value (a set/list/tuple matches any of its values)"""
+        return self._equals_mask(_equality_pairs(equals))
+
+    def _equals_mask(self, pairs):
+        mask = self.all_rows
+        for field, values in pairs:
+            bitmaps = self._bitmaps[field]
+            matched = 0
+            for value in values:
+                matched |= bitmaps.get(value, 0)
+            mask &= matched
+        return mask
+
+    def _partition(self, order_by, field, value):
+        """Entries of order_by for just the rows where field == value (a composite index)"""
+        key = (order_by, field, value)
+        entries = self._partitions.get(key)
+        if entries is None:
+            bits = self._bitmaps[field].get(value, 0).to_bytes((len(self.names) + 7) // 8 or 1, 'little')
+            entries = self._partitions[key] = [entry for entry in self._entries[order_by]
+                                               if bits[entry[1] >> 3] >> (entry[1] & 7) & 1]
+        return entries
+
+    def _narrowest(self, pairs):
+        """(row count, field, values) of the most selective equality constraint"""
+        best = (len(self.names), None, ())
+        for field, values in pairs:
+            count = sum(self._bitmaps[field].get(value, 0).bit_count() for value in values)
+            if count < best[0]:
+                best = (count, field, values)
+        return best
+
+    def bitmap(self, rows):
+        """Bitmap with the given rows set, for combining with mask()"""
+        return _bitmap(rows, len(self.names))
+
+    def value_counts(self, field, mask=None):
+        """{value: number of rows} for an equality field, optionally within a mask"""
+        return {value: (bitmap if mask is None else bitmap & mask).bit_count()
+                for value, bitmap in self._bitmaps[field].items()}
+
+    def _span(self, field, low, high):
+        """(start, stop, low key, high key) of the sorted entries with low <= value <= high"""
+        if self._descending[field]:
+            low, high = (None if high is None else -high), (None if low is None else -low)
+        entries = self._entries[field]
+        start = 0 if low is None else bisect.bisect_left(entries, (low,))
+        stop = len(entries) if high is None else bisect.bisect_right(entries, (high, float('inf')))
+        return start, stop, low, high
+
+    def range_count(self, field, low=None, high=None):
+        start, stop, _, _ = self._span(field, low, high)
+        return stop - start
+
+    def range_mask(self, field, low=None, high=None):
+        """Bitmap of rows whose value for a sorted field lies in [low, high] (None = open)"""
+        start, stop, _, _ = self._span(field, low, high)
+        return self.bitmap(row for _, row in self._entries[field][start:stop])
+
+    def _cached_range_mask(self, field, low, high):
+        # Wide ranges are re-used while paging, so keep their bitmaps until the field changes
+        key = (field, low, high)
+        mask = self._range_masks.get(key)
+        if mask is None:
+            if len(self._range_masks) >= RANGE_MASK_CACHE_SIZE:
+                self._range_masks.clear()
+            mask = self._range_masks[key] = self.range_mask(field, low, high)
+        return mask
+
+    def query(self, mask=None, ranges=None, order_by=None, offset=0, limit=None, equals=None):
+        """(total, rows) for rows in mask matching equals whose sorted fields lie in ranges, ordered by order_by.
+
+        equals maps an equality field to a value or collection of values
+        (pairs are accepted too, to constrain one field twice); ranges maps
+        a sorted field to an inclusive (low, high) pair. Without order_by
+        rows come back in row order. Narrow ranges are scanned in index
+        order; wide ones become (cached) bitmaps. The cheaper of walking
+        the sorted index and sorting the extracted matches is used for
+        top-K, and a walk only visits rows with the most selective equals
+        value, so filters correlated with the sort order stay cheap.
+        """
+        pairs = _equality_pairs(equals)
+        mask = (self.all_rows if mask is None else mask) & self._equals_mask(pairs)
+        size = len(self.names)
+        stop_at = None if limit is None else offset + limit
+
+        if ranges:
+            spans = {field: self._span(field, low, high) for field, (low, high) in ranges.items()}
+            field, (start, stop, _, _) = min(spans.items(), key=lambda item: item[1][1] - item[1][0])
+            if stop - start > size // NARROW_RANGE_FRACTION:
+                for other, (low, high) in ranges.items():
+                    mask &= self._cached_range_mask(other, low, high)
+                return self.query(mask, None, order_by, offset, limit, pairs)
+            if stop - start < mask.bit_count():
+                bits = mask.to_bytes((size + 7) // 8 or 1, 'little')
+                matches = [row for _, row in self._entries[field][start:stop] if bits[row >> 3] >> (row & 7) & 1]
+                in_key_order = field
+            else:
+                matches = list(iter_bitmap_rows(mask, size))
+                in_key_order = None
+            for other, (_, _, low, high) in spans.items():
+                if other != in_key_order:
+                    keys = self._keys[other]
+                    matches = [row for row in matches
+                               if (low is None or keys[row] >= low) and (high is None or keys[row] <= high)]
+            total = len(matches)
+            if order_by is None:
+                if in_key_order is not None:
+                    matches.sort()
+            elif order_by != in_key_order:
+                keys = self._keys[order_by]
+                if stop_at is None:
+                    matches.sort(key=lambda row: (keys[row], row))
+                else:
+                    matches = heapq.nsmallest(stop_at, matches, key=lambda row: (keys[row], row))
+            return total, matches[offset:stop_at]
+
+        total = mask.bit_count()
+        if order_by is None:
+            return total, list(itertools.islice(iter_bitmap_rows(mask, size), offset, stop_at))
+
+        # Walking the index finds the top K after ~K*walked/total entries
+        walked, field, values = self._narrowest(pairs)
+        if stop_at is not None and 0 < stop_at * walked < total * total:
+            if field is None:
+                entries = self._entries[order_by]
+            else:
+                partitions = [self._partition(order_by, field, value) for value in values]
+                entries = partitions[0] if len(partitions) == 1 else heapq.merge(*partitions)
+            bits = mask.to_bytes((size + 7) // 8 or 1, 'little')
+            found = []
+            for _, row in entries:
+                if bits[row >> 3] >> (row & 7) & 1:
+                    found.append(row)
+                    if len(found) == stop_at:
+                        break
+            return total, found[offset:]
+
+        keys = self._keys[order_by]
+        matches = iter_bitmap_rows(mask, size)
+        if stop_at is None:
+            ordered = sorted(matches, key=lambda row: (keys[row], row))
+        else:
+            ordered = heapq.nsmallest(stop_at, matches, key=lambda row: (keys[row], row))
+        return total, ordered[offset:]
+
+    def top(self, field, k, mask=None, **equals):
+        """Names of the k rows (in mask, matching equals) ranking first by a sorted field"""
+        return [self.names[row] for row in self.query(mask, order_by=field, limit=k, equals=equals)[1]]
+
+AGGREGATES_FILE = "crm_aggregates.json"
+# Status bucket for prospects whose user data sets none
+UNSET_STATUS = 'unset'
+
+def _group(value):
+    return 'Unknown' if value is None else value
+
+def _tally(counts, key, step):
+    count = counts.get(key, 0) + step
+    if count:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+def _move_sorted(values, old, new):
+    """Swap one occurrence of old for new in a sorted list (None is absent)"""
+    if old == new:
+        return
+    if old is not None:
+        del values[bisect.bisect_left(values, old)]
+    if new is not None:
+        bisect.insort(values, new)
+
+class DashboardAggregates:
+    """Materialized counters for the weekly report and the dashboard stat cards.
+
+    Counts by category, relationship strength and status plus the email
+    total are plain tallies; follow-up due times and latest contacts are
+    kept sorted, so overdue and recently-contacted counts are a bisect.
+    User data writes apply the difference between a record's old and new
+    version instead of recounting the book. sources records the export and
+    user data generation the counters describe, so a regenerated export or
+    another process's writes are detected and the counters rebuilt.
+    """
+
+    VERSION = 1
+    COUNTERS = ('categories', 'relationship_strength', 'statuses')
+
+    def __init__(self):
+        self.total = 0
+        self.total_emails = 0
+        self.categories = {}
+        self.relationship_strength = {}
+        self.statuses = {}
+        self.followups = []
+        self.latest_contacts = []
+        self.sources = None
+
+    @classmethod
+    def build(cls, batches):
+        """Count (prospects, user_records) batches, as iter_prospect_batches() yields them"""
+        aggregates = cls()
+        for prospects, user_records in batches:
+            for company_name, prospect in prospects.items():
+                aggregates.total += 1
+                aggregates.total_emails += prospect.get('total_emails') or 0
+                _tally(aggregates.categories, _group(prospect.get('category')), 1)
+                _tally(aggregates.relationship_strength, _group(prospect.get('relationship_strength')), 1)
+                latest_ts = prospect_epoch(prospect, 'latest_contact')
+                if latest_ts is not None:
+                    aggregates.latest_contacts.append(latest_ts)
+                user_data = user_records.get(company_name) or {}
+                _tally(aggregates.statuses, user_data.get('status') or UNSET_STATUS, 1)
+                followup_ts = to_epoch(user_data.get('next_followup'))
+                if followup_ts is not None:
+                    aggregates.followups.append(followup_ts)
+        aggregates.followups.sort()
+        aggregates.latest_contacts.sort()
+        return aggregates
+
+    def replace_user_data(self, old, new):
+        """Apply one prospect's user record changing from old to new ({} when it had none)"""
+        old_status, new_status = old.get('status') or UNSET_STATUS, new.get('status') or UNSET_STATUS
+        if old_status != new_status:
+            _tally(self.statuses, old_status, -1)
+            _tally(self.statuses, new_status, 1)
+        _move_sorted(self.followups, to_epoch(old.get('next_followup')), to_epoch(new.get('next_followup')))
+
+    def overdue(self, now=None):
+        """Prospects whose next follow-up is before now"""
+        return bisect.bisect_left(self.followups, epoch_now(now))
+
+    def contacted_since(self, ts):
+        """Prospects whose latest contact is at or after ts"""
+        return len(self.latest_contacts) - bisect.bisect_left(self.latest_contacts, ts)
+
+    @classmethod
+    def load(cls, path):
+        """Read an aggregates file; None if it is missing or unusable"""
+        try:
+            with open(path, 'r') as f:
+                saved = json.load(f)
+            metrics.incr('files_read')
+            if saved.get('version') != cls.VERSION:
+                return None
+            aggregates = cls()
+            aggregates.total = int(saved['total'])
+            aggregates.total_emails = saved['total_emails']
+            for name in cls.COUNTERS:
+                setattr(aggregates, name, dict(saved[name]))
+            aggregates.followups = [int(ts) for ts in saved['followups']]
+            aggregates.latest_contacts = [int(ts) for ts in saved['latest_contacts']]
+            aggregates.sources = saved['sources']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return aggregates
+
+    def save(self, path):
+        saved = {'version': self.VERSION, 'sources': self.sources, 'total': self.total,
+                 'total_emails': self.total_emails, 'followups': self.followups,
+                 'latest_contacts': self.latest_contacts}
+        saved.update((name, getattr(self, name)) for name in self.COUNTERS)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(saved, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+        metrics.incr('files_written')
+
+# Dashboard views that narrow the book to one category
+VIEW_CATEGORIES = {
+    'food': 'Food Processing',
+    'construction': 'Construction',
+    'industrial': 'Industrial/Manufacturing'
+}
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+# The columns exportData() in crm-system.js writes, in its order
+EXPORT_COLUMNS = ('company', 'status', 'category', 'total_emails', 'business_score', 'custom_score',
+                  'latest_contact', 'notes', 'next_action', 'priority_tags', 'next_followup')
+# Bytes buffered before an export chunk is handed to the output
+EXPORT_CHUNK_SIZE = 64 << 10
+
+def dashboard_record(prospect, user_data, custom_score):
+    """The prospect merged with its user data, as loadData() in crm-system.js builds it"""
+    record = dict(prospect)
+    record.update({
+        'status': 'new',
+        'priority_tags': [],
+        'notes': '',
+        'next_action': '',
+        'followups': [],
+        'last_contacted': None,
+        'next_followup': None
+    })
+    record.update(user_data)
+    record['status'] = user_data.get('status') or 'new'
+    record['custom_score'] = custom_score
+    return record
+
+def dashboard_filter(view='', search='', status='', category='', overdue=False, min_score=None,
+                     search_index=None, now=None):
+    """predicate(company, record) for the dashboard's filters, applied to one record at a time.
+
+    Matches what the API server answers from its indexes: search needs
+    the SearchIndex (notes are matched as substrings on top of it).
+    """
+    now = epoch_now(now)
+    search = (search or '').strip().lower()
+    found = {search_index.names[doc] for doc in search_index.matching(search)} if search else None
+    statuses = [wanted for wanted in ('hot' if view == 'hot' else '', status) if wanted]
+    categories = [wanted for wanted in (VIEW_CATEGORIES.get(view), category) if wanted]
+
+    def predicate(company_name, record):
+        if any(record['status'] != wanted for wanted in statuses):
+            return False
+        if any(record.get('category') != wanted for wanted in categories):
+            return False
+        if view == 'followups' or overdue:
+            followup_ts = to_epoch(record.get('next_followup'))
+            if followup_ts is None or followup_ts >= now:
+                return False
+        if min_score is not None and not record['custom_score'] >= min_score:
+            return False
+        return found is None or company_name in found or search in (record.get('notes') or '').lower()
+    return predicate
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return ', '.join(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def export_format_for(path):
+    """'ndjson' for .ndjson/.jsonl paths (optionally .gz), else 'csv'"""
+    base = path[:-3] if path.endswith('.gz') else path
+    return 'ndjson' if base.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+def iter_export_chunks(records, fmt='csv', columns=EXPORT_COLUMNS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encoded export chunks for (company, record) pairs, about chunk_size bytes each.
+
+    Only one chunk is buffered at a time, so exporting the whole book
+    takes as much memory as exporting a page. The 'company' column is
+    the company name; other columns are record fields.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n') if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    for company_name, record in records:
+        values = [company_name if column == 'company' else record.get(column) for column in columns]
+        if writer:
+            writer.writerow([_csv_value(value) for value in values])
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values)), default=str) + '\n')
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+MAIL_TEMPLATES_FILE = "email-templates.json"
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+# Filled in from each prospect; any other placeholder (project_name, ...) must be a campaign variable
+PROSPECT_PLACEHOLDERS = frozenset(('company_name', 'category_lower', 'contact_name'))
+# Emails rendered per job, and jobs queued per worker, when a campaign fans out
+MAIL_MERGE_BATCH_SIZE = 2000
+MAIL_MERGE_QUEUE_DEPTH = 2
+
+class TemplateError(ValueError):
+    """Raised for an unknown template or placeholders a campaign cannot resolve"""
+
+class MailTemplate:
+    """An email template compiled once into literal and placeholder segments.
+
+    subject and body are split on {{name}} into alternating literal text
+    and placeholder names, then joined back into str.format patterns (with
+    literal braces escaped), so rendering an email is two format_map()
+    calls instead of a string replace per placeholder.
+    """
+
+    def __init__(self, name, subject, body, tags=()):
+        self.name = name
+        self.tags = tuple(tags)
+        self.segments = {'subject': _PLACEHOLDER.split(subject), 'body': _PLACEHOLDER.split(body)}
+        self.placeholders = frozenset(name for parts in self.segments.values() for name in parts[1::2])
+        self._subject, self._body = (
+            ''.join('{' + part + '}' if i % 2 else part.replace('{', '{{').replace('}', '}}')
+                    for i, part in enumerate(parts))
+            for parts in self.segments.values()
+        )
+
+    def unresolved(self, variables=()):
+        """Placeholders neither a prospect nor the given campaign variables fill in"""
+        return sorted(self.placeholders - PROSPECT_PLACEHOLDERS - set(variables))
+
+    def render(self, values):
+        """(subject, body); raises KeyError naming a placeholder values lacks"""
+        return self._subject.format_map(values), self._body.format_map(values)
+
+def load_mail_templates(path):
+    """{name: MailTemplate} for an email-templates.json file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        templates = json.load(f)['templates']
+    metrics.incr('files_read')
+    return {name: MailTemplate(name, template['subject'], template['body'], template.get('tags', ()))
+            for name, template in templates.items()}
+
+def _primary_contact(contacts):
+    """(name, email) of the contact with the most emails, or (None, None)"""
+    if not contacts:
+        return None, None
+    name, details = max(contacts.items(), key=lambda item: (item[1] or {}).get('email_count') or 0)
+    return name, (details or {}).get('email')
+
+def mail_merge_values(company_name, record, variables=None):
+    """Placeholder values for one prospect's dashboard record, over the campaign variables"""
+    values = dict(variables or ())
+    values['company_name'] = company_name
+    if record.get('category'):
+        values['category_lower'] = record['category'].lower()
+    contact_name, _ = _primary_contact(record.get('contacts'))
+    if contact_name:
+        values['contact_name'] = contact_name
+    return values
+
+def render_mail_batch(template, batch):
+    """NDJSON lines (bytes) for [(company, to, values)], plus {company: missing placeholder}"""
+    lines = []
+    skipped = {}
+    for company_name, to, values in batch:
+        try:
+            subject, body = template.render(values)
+        except KeyError as e:
+            skipped[company_name] = e.args[0]
+            continue
+        lines.append(json.dumps({'company': company_name, 'to': to, 'subject': subject, 'body': body},
+                                ensure_ascii=False))
+    return ('\n'.join(lines) + '\n' if lines else '').encode('utf-8'), skipped
+
+def iter_mail_batches(template, batches, workers=None):
+    """render_mail_batch() results for each batch, in order, fanned out over worker processes.
+
+    At most MAIL_MERGE_QUEUE_DEPTH batches per worker are in flight, so a
+    campaign over the whole book holds only a few batches in memory.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    batches = iter(batches)
+    first = next(batches, None)
+    second = next(batches, None)
+    if first is None:
+        return
+    if workers == 1 or second is None:
+        for batch in itertools.chain([first], [second] if second is not None else [], batches):
+            yield render_mail_batch(template, batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(render_mail_batch, template, batch) for batch in (first, second))
+        for batch in batches:
+            if len(pending) >= workers * MAIL_MERGE_QUEUE_DEPTH:
+                yield pending.popleft().result()
+            pending.append(pool.submit(render_mail_batch, template, batch))
+        while pending:
+            yield pending.popleft().result()
+
+# Prospects per user data round-trip when streaming
+STREAM_BATCH_SIZE = 1000
+
+class OpenClawDispatcher:
+    """Queue of openclaw CLI calls, sent concurrently as asyncio subprocesses.
+
+    At most max_workers calls are in flight at once. Each call gets a
+    timeout and is retried with exponential backoff; calls that still fail
+    are appended to a JSONL spool file so a later retry_spool() can deliver
+    them. OPENCLAW_BIN overrides the executable, which lets tests point the
+    dispatcher at a local fake.
+    """
+
+    def __init__(self, spool_file, binary=None, max_workers=8, timeout=30, retries=3, backoff=1.0):
+        self.spool_file = spool_file
+        self.binary = binary or os.environ.get('OPENCLAW_BIN', 'openclaw')
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._queue = []
+        self._spool_lock = threading.Lock()
+
+    def submit(self, args, label=None):
+        """Queue one call (args exclude the executable); sent on the next flush()"""
+        self._queue.append({'args': list(args), 'label': label or ' '.join(args[:2])})
+
+    async def flush_async(self):
+        """Send everything queued, max_workers at a time; returns one result per call"""
+        jobs, self._queue = self._queue, []
+        in_flight = asyncio.Semaphore(self.max_workers)
+        with metrics.phase('openclaw'):
+            return list(await asyncio.gather(*(self._deliver(job, in_flight) for job in jobs)))
+
+    async def send_async(self, args, label=None):
+        """Send one call now; True if it was delivered"""
+        self.submit(args, label)
+        return (await self.flush_async())[-1]['ok']
+
+    def flush(self):
+        """Blocking flush_async()"""
+        return asyncio.run(self.flush_async())
+
+    def send(self, args, label=None):
+        """Blocking send_async()"""
+        return asyncio.run(self.send_async(args, label))
+
+    async def _run(self, args, in_flight):
+        async with in_flight:
+            metrics.incr('subprocesses_spawned')
+            process = await asyncio.create_subprocess_exec(
+                self.binary, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise
+        return process.returncode, stderr.decode(errors='replace').strip()
+
+    async def _deliver(self, job, in_flight):
+        error = None
+        for attempt in range(1, self.retries + 1):
+            try:
+                returncode, stderr = await self._run(job['args'], in_flight)
+                if returncode == 0:
+                    return {'label': job['label'], 'ok': True, 'attempts': attempt, 'error': None}
+                error = stderr or f"exit status {returncode}"
+            except asyncio.TimeoutError:
+                error = f"timed out after {self.timeout}s"
+            except OSError as e:
+                # A missing or unusable executable will not fix itself between retries
+                error = str(e)
+                break
+            if attempt < self.retries:
+                metrics.incr('openclaw_retries')
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+        self._spool(job, error)
+        return {'label': job['label'], 'ok': False, 'attempts': attempt, 'error': error}
+
+    def _spool(self, job, error):
+        metrics.incr('openclaw_spooled')
+        entry = dict(job, error=error, spooled_at=datetime.now().isoformat())
+        with self._spool_lock:
+            with open(self.spool_file, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def spooled(self):
+        """Calls waiting in the spool file"""
+        if not os.path.exists(self.spool_file):
+            return []
+        with open(self.spool_file, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def retry_spool(self):
+        """Re-send every spooled call; ones that fail again are spooled again"""
+        with self._spool_lock:
+            jobs = self.spooled()
+            if os.path.exists(self.spool_file):
+                os.remove(self.spool_file)
+        for job in jobs:
+            self.submit(job['args'], job.get('label'))
+        return self.flush()
+
+OPENCLAW_SPOOL_FILE = "openclaw_spool.jsonl"
+
 class CRMAutomations:
-    def __init__(self, workspace_dir=None):
+    def __init__(self, workspace_dir=None, user_store=None, compact=False, stream=False, workers=1):
         self.workspace_dir = workspace_dir or "/Users/sanicreteassistant/.openclaw/workspace/sanicrete-crm-dashboard"
         self.data_file = os.path.join(self.workspace_dir, "filtered_crm_data.json")
+        self.snapshot_file = snapshot_path_for(self.data_file)
+        self.search_index_file = search_index_path_for(self.data_file)
+        self.intelligence_file = os.path.join(self.workspace_dir, INTELLIGENCE_FILE)
+        self.aggregates_file = os.path.join(self.workspace_dir, AGGREGATES_FILE)
+        self.change_feed_file = os.path.join(self.workspace_dir, CHANGE_FEED_DB)
+        self.mail_templates_file = os.path.join(self.workspace_dir, MAIL_TEMPLATES_FILE)
         self.user_data_dir = os.path.join(self.workspace_dir, "user_data")
         
         # Create user data directory if it doesn't exist
         os.makedirs(self.user_data_dir, exist_ok=True)
+        
+        self.user_store = user_store or open_user_data_store(self.workspace_dir)
+        self._unit_of_work = None
+        self.last_score_skipped = 0
+        self.dispatcher = OpenClawDispatcher(os.path.join(self.workspace_dir, OPENCLAW_SPOOL_FILE))
+        # Hold prospects as a ProspectTable instead of nested dicts
+        self.compact = compact
+        # Stream prospects from disk instead of loading the whole export
+        self.stream = stream
+        # Processes that score and evaluate the pipeline for large batches
+        self.workers = max(1, workers or 1)
+        self.metrics = metrics
+        self.metrics_dir = os.environ.get('CRM_METRICS_DIR', self.workspace_dir)
+        self._prospect_index = None
+        self._prospect_index_signature = None
+        self._search_index = None
+        self._aggregates = None
+        self._change_feed = None
     
     def load_crm_data(self):
-        """Load CRM prospect data"""
+        """Load CRM prospect data (parsed once per process, reloaded on change)"""
+        snapshot = self.load_snapshot()
+        if snapshot is not None:
+            return snapshot
+        if self.compact:
+            return self.load_prospect_table()
         try:
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-            return data['filtered_prospects']
+            return prospect_cache.get(self.data_file, _parse_prospect_file)
         except Exception as e:
             print(f"Error loading CRM data: {e}")
             return {}
     
+    def prospect_index(self, now=None):
+        """ProspectIndex over the loaded prospects and their user data.
+
+        Kept in step with save_user_data(), and rebuilt when the prospect
+        export or the user data store changes underneath it.
+        """
+        prospects = self.load_crm_data()
+        signature = (id(prospects), self.user_store.change_signature())
+        if self._prospect_index is None or self._prospect_index_signature != signature:
+            with metrics.phase('build_index'):
+                self._prospect_index = ProspectIndex.build(prospects, self.get_many_user_data(prospects.keys()), now)
+            self._prospect_index_signature = signature
+        return self._prospect_index
+    
+    def _index_user_data(self, records):
+        """Apply saved user data to the prospect index, if one has been built"""
+        index = self._prospect_index
+        if index is None:
+            return
+        for company_name, data in records.items():
+            if company_name in index.rows:
+                index.update_user_data(company_name, data)
+        if not self._unit_of_work:
+            self._index_own_writes()
+    
+    def _index_own_writes(self):
+        # Our own writes are already in the index; don't rebuild it for them
+        if self._prospect_index is not None:
+            self._prospect_index_signature = (self._prospect_index_signature[0], self.user_store.change_signature())
+    
+    def dashboard_aggregates(self):
+        """DashboardAggregates for the current export and user data.
+
+        Read from the aggregates file while it matches both, otherwise
+        rebuilt from the book and saved; user data writes made through this
+        object keep it in step.
+        """
+        aggregates = self._current_aggregates(from_disk=True)
+        if aggregates is None:
+            sources = self._aggregate_sources()
+            with metrics.phase('build_aggregates'):
+                aggregates = DashboardAggregates.build(self._read_prospect_batches(STREAM_BATCH_SIZE))
+            aggregates.sources = sources
+            self._save_aggregates(aggregates)
+        return aggregates
+    
+    def _aggregate_sources(self):
+        try:
+            export = _file_signature(self.data_file)
+        except OSError:
+            export = None
+        return {'prospects': export, 'user_data': self.user_store.write_generation()}
+    
+    def _current_aggregates(self, from_disk=False):
+        """The aggregates held (or, with from_disk, saved) if they still match the data files"""
+        sources = self._aggregate_sources()
+        if self._aggregates is not None and self._aggregates.sources != sources:
+            self._aggregates = None
+        if self._aggregates is None and from_disk and os.path.exists(self.aggregates_file):
+            aggregates = DashboardAggregates.load(self.aggregates_file)
+            if aggregates is not None and aggregates.sources == sources:
+                self._aggregates = aggregates
+        return self._aggregates
+    
+    def _aggregate_user_data(self, aggregates, replaced, records):
+        """Apply written user records to the aggregates and save them"""
+        # Telling book prospects apart needs the loaded export; streamed runs rebuild instead
+        if self.stream:
+            self._aggregates = None
+            return
+        prospects = self.load_crm_data()
+        for company_name, data in records.items():
+            if company_name in prospects:
+                aggregates.replace_user_data(replaced.get(company_name) or {}, data)
+        aggregates.sources = self._aggregate_sources()
+        self._save_aggregates(aggregates)
+    
+    def _save_aggregates(self, aggregates):
+        self._aggregates = aggregates
+        try:
+            aggregates.save(self.aggregates_file)
+        except OSError as e:
+            print(f"⚠️  Could not save dashboard aggregates: {e}")
+    
+    def load_prospect_table(self):
+        """Load CRM prospect data as a compact ProspectTable"""
+        try:
+            return prospect_cache.get(self.data_file, _load_prospect_table)
+        except Exception as e:
+            print(f"Error loading CRM data: {e}")
+            return ProspectTable()
+    
+    def load_snapshot(self):
+        """Memory-mapped prospect snapshot, or None if it is absent or stale"""
+        if not os.path.exists(self.snapshot_file):
+            return None
+        try:
+            table = prospect_cache.get(self.snapshot_file, open_prospect_snapshot)
+            if table.snapshot_source != _file_signature(self.data_file):
+                return None
+            return table
+        except (SnapshotError, OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Ignoring prospect snapshot, falling back to JSON: {e}")
+            return None
+    
+    def build_snapshot(self):
+        """Write the binary snapshot for the current filtered_crm_data.json"""
+        prospects = prospect_cache.get(self.data_file, _load_prospect_table)
+        write_prospect_snapshot(prospects, self.snapshot_file, self.data_file)
+        print(f"✅ Wrote snapshot of {len(prospects)} prospects to {os.path.basename(self.snapshot_file)}")
+        return self.snapshot_file
+    
+    def load_search_index(self):
+        """SearchIndex over prospects and deep-intelligence.json.
+
+        Uses the index file generate-data.py writes when it matches the
+        current data files, and otherwise builds one in memory. Either way
+        it is kept until the data files change.
+        """
+        sources = search_index_sources(self.data_file, self.intelligence_file)
+        if self._search_index is not None and self._search_index.source_files == sources:
+            return self._search_index
+        index = None
+        if os.path.exists(self.search_index_file):
+            try:
+                index = prospect_cache.get(self.search_index_file, open_search_index)
+            except (SnapshotError, OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Ignoring search index, rebuilding it in memory: {e}")
+        if index is None or index.source_files != sources:
+            with metrics.phase('build_search_index'):
+                index = self._build_search_index()
+        self._search_index = index
+        return index
+    
+    def _build_search_index(self):
+        prospects = None if self.stream else self.load_crm_data().items()
+        return build_search_index(self.data_file, self.intelligence_file, prospects)
+    
+    def build_search_index(self):
+        """Write the search index file for the current prospects and deep-intelligence.json"""
+        index = self._build_search_index()
+        index.write(self.search_index_file)
+        self._search_index = index
+        print(f"✅ Indexed {len(index.terms):,} words across {len(index):,} companies in "
+              f"{os.path.basename(self.search_index_file)}")
+        return self.search_index_file
+    
+    def iter_dashboard_records(self, predicate=None, now=None):
+        """(company, dashboard record) pairs in book order, optionally only those predicate accepts.
+
+        Prospects are read a batch at a time (streamed from disk with
+        stream=True), so memory stays bounded by the batch size.
+        """
+        now = epoch_now(now)
+        for prospects, user_records in self._read_prospect_batches(STREAM_BATCH_SIZE):
+            scores = batch_auto_scores(prospects, user_records, now)
+            for company_name, prospect in prospects.items():
+                user_data = user_records.get(company_name) or {}
+                record = dashboard_record(prospect, user_data, _custom_score(user_data, scores[company_name]))
+                if predicate is None or predicate(company_name, record):
+                    yield company_name, record
+    
+    def export_prospects(self, path, fmt=None, columns=EXPORT_COLUMNS, compress=None, **filters):
+        """Stream the dashboard records matching filters to path as CSV or NDJSON.
+
+        fmt and compress default from the file name (.ndjson/.jsonl, .gz);
+        filters are dashboard_filter()'s. Rows are written a chunk at a
+        time and the file is renamed into place once complete. Returns the
+        number of rows written.
+        """
+        fmt = fmt or export_format_for(path)
+        compress = path.endswith('.gz') if compress is None else compress
+        search_index = self.load_search_index() if filters.get('search') else None
+        predicate = dashboard_filter(search_index=search_index, **filters) if filters else None
+        rows = 0
+        
+        def counted(records):
+            nonlocal rows
+            for item in records:
+                rows += 1
+                yield item
+        
+        temp_path = path + '.tmp'
+        try:
+            with (gzip.open if compress else open)(temp_path, 'wb') as f:
+                for chunk in iter_export_chunks(counted(self.iter_dashboard_records(predicate)), fmt, columns):
+                    f.write(chunk)
+                    metrics.incr('bytes_exported', len(chunk))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        print(f"📤 Exported {rows} prospects to {path}")
+        return rows
+    
+    def mail_templates(self):
+        """{name: MailTemplate} compiled from email-templates.json, cached until the file changes"""
+        return prospect_cache.get(self.mail_templates_file, load_mail_templates)
+    
+    def render_campaign(self, template_name, path, variables=None, workers=None, **filters):
+        """Mail-merge template_name for every prospect matching filters into path as NDJSON.
+
+        Every placeholder must be filled in from the prospect or variables,
+        else TemplateError is raised before anything is rendered; prospects
+        missing a value (e.g. no contacts for {{contact_name}}) are skipped
+        and reported. Emails are rendered a batch at a time across workers
+        processes and written in book order, gzipped if path ends in .gz,
+        then renamed into place. Returns the rendered/skipped counts.
+        """
+        templates = self.mail_templates()
+        if template_name not in templates:
+            raise TemplateError(f"Unknown template {template_name!r} (have: {', '.join(sorted(templates))})")
+        template = templates[template_name]
+        variables = dict(variables or ())
+        unresolved = template.unresolved(variables)
+        if unresolved:
+            raise TemplateError(f"Template {template_name!r} needs --var for: {', '.join(unresolved)}")
+        
+        search_index = self.load_search_index() if filters.get('search') else None
+        predicate = dashboard_filter(search_index=search_index, **filters) if filters else None
+        
+        def batches():
+            batch = []
+            for company_name, record in self.iter_dashboard_records(predicate):
+                _, to = _primary_contact(record.get('contacts'))
+                batch.append((company_name, to, mail_merge_values(company_name, record, variables)))
+                if len(batch) >= MAIL_MERGE_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        
+        rendered = 0
+        skipped = {}
+        temp_path = path + '.tmp'
+        try:
+            with (gzip.open if path.endswith('.gz') else open)(temp_path, 'wb') as f:
+                for chunk, batch_skipped in iter_mail_batches(template, batches(), workers):
+                    f.write(chunk)
+                    rendered += chunk.count(b'\n')
+                    skipped.update(batch_skipped)
+                    metrics.incr('bytes_exported', len(chunk))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        metrics.incr('emails_rendered', rendered)
+        
+        print(f"✉️  Rendered {rendered} '{template_name}' emails to {path}")
+        if skipped:
+            print(f"⚠️  Skipped {len(skipped)} prospects with missing values:")
+            for company_name, placeholder in itertools.islice(skipped.items(), 10):
+                print(f"• {company_name}: no {placeholder}")
+        return {'rendered': rendered, 'skipped': len(skipped)}
+    
+    def print_search(self, query, limit=20):
+        """Print the best matches for a full-text query"""
+        hits = self.load_search_index().search(query, limit)
+        print(f"🔎 {len(hits)} matches for {query!r}")
+        for hit in hits:
+            print(f"• {hit['name']} ({hit['score']:.2f}, {', '.join(hit['sources'])})")
+        return hits
+    
+    def iter_prospect_batches(self, batch_size=STREAM_BATCH_SIZE):
+        """Yield (prospects, user_records) batches covering every prospect.
+
+        With stream=True prospects are read incrementally from disk and
+        arrive in batches of batch_size; otherwise the loaded data set comes
+        back as a single batch. Inside a unit of work, records that were
+        only read are released after each batch so memory stays bounded.
+        """
+        if not self.stream:
+            prospects = self.load_crm_data()
+            metrics.incr('prospects_scanned', len(prospects))
+            yield prospects, self.get_many_user_data(prospects.keys())
+            return
+        
+        batch = {}
+        try:
+            for company_name, prospect in iter_prospect_file(self.data_file):
+                batch[company_name] = prospect
+                if len(batch) >= batch_size:
+                    metrics.incr('prospects_scanned', len(batch))
+                    yield batch, self.get_many_user_data(batch.keys())
+                    self._release_clean_user_data()
+                    batch = {}
+        except Exception as e:
+            print(f"Error streaming CRM data: {e}")
+        if batch:
+            metrics.incr('prospects_scanned', len(batch))
+            yield batch, self.get_many_user_data(batch.keys())
+            self._release_clean_user_data()
+    
+    def _read_prospect_batches(self, batch_size):
+        """Yield (prospects, stored user records) batches straight from disk.
+
+        Unlike iter_prospect_batches() this bypasses the unit of work, so it
+        is safe to advance from a worker thread; loaded data sets are split
+        into batch_size chunks as well. A ProspectTable (compact or snapshot
+        data) is split into row-range tables, so batches keep the columnar
+        fast paths.
+        """
+        if not self.stream:
+            prospects = self.load_crm_data()
+            names = None if isinstance(prospects, ProspectTable) else list(prospects.keys())
+            for start in range(0, len(prospects), batch_size):
+                if names is None:
+                    batch = prospects.slice(start, start + batch_size)
+                else:
+                    batch = {company_name: prospects[company_name]
+                             for company_name in names[start:start + batch_size]}
+                metrics.incr('prospects_scanned', len(batch))
+                yield batch, self._read_user_records(batch.keys())
+            return
+        
+        batch = {}
+        try:
+            for company_name, prospect in iter_prospect_file(self.data_file):
+                batch[company_name] = prospect
+                if len(batch) >= batch_size:
+                    metrics.incr('prospects_scanned', len(batch))
+                    yield batch, self._read_user_records(batch.keys())
+                    batch = {}
+        except Exception as e:
+            print(f"Error streaming CRM data: {e}")
+        if batch:
+            metrics.incr('prospects_scanned', len(batch))
+            yield batch, self._read_user_records(batch.keys())
+    
+    def _read_user_records(self, company_names):
+        """user_store.get_many() that reads one record at a time if the batch fails.
+
+        Like get_user_data(), an unreadable record is logged and read as {}
+        so the rest of the batch is still processed.
+        """
+        try:
+            return self.user_store.get_many(company_names)
+        except Exception as e:
+            print(f"Error loading user data: {e}")
+        records = {}
+        for company_name in company_names:
+            try:
+                records[company_name] = self.user_store.get(company_name)
+            except Exception as e:
+                print(f"Error loading user data for {company_name}: {e}")
+                records[company_name] = {}
+        return records
+    
+    async def aiter_prospect_batches(self, batch_size=STREAM_BATCH_SIZE):
+        """Async iter_prospect_batches() that reads the next batch while this one is processed.
+
+        Prospect parsing and user data reads run in a worker thread, one
+        batch ahead, so store I/O overlaps with scoring on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        batches = self._read_prospect_batches(batch_size)
+        pending = loop.run_in_executor(None, next, batches, None)
+        while True:
+            batch = await pending
+            if batch is None:
+                return
+            pending = loop.run_in_executor(None, next, batches, None)
+            yield self._adopt_batch(*batch)
+            self._release_clean_user_data()
+    
+    async def aiter_evaluated_batches(self, now, force=False, score=True, pipeline=True):
+        """(prospects, user_records, evaluate_prospects() result) for every batch, in book order.
+
+        With workers > 1 batches are trimmed to the fields the rules read
+        and evaluated in worker processes, up to EVALUATION_QUEUE_DEPTH per
+        worker in flight, while later batches are read; results only hold
+        the prospects that change and are yielded in the order read, so
+        they match the in-process evaluation exactly.
+        """
+        if self.workers <= 1:
+            async for prospects, user_records in self.aiter_prospect_batches():
+                with metrics.phase('scoring'):
+                    result = evaluate_prospects(prospects, user_records, now, force, score, pipeline)
+                if score:
+                    metrics.incr('prospects_scored', len(prospects) - result[0])
+                yield prospects, user_records, result
+            return
+        
+        loop = asyncio.get_running_loop()
+        batches = self._read_prospect_batches(STREAM_BATCH_SIZE)
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                batch = await loop.run_in_executor(None, next, batches, None)
+                if batch is not None:
+                    prospects, user_records = self._adopt_batch(*batch)
+                    future = pool.submit(evaluate_prospects, *evaluation_inputs(prospects, user_records),
+                                         now, force, score, pipeline)
+                    in_flight.append((prospects, user_records, asyncio.wrap_future(future)))
+                    if len(in_flight) < self.workers * EVALUATION_QUEUE_DEPTH:
+                        continue
+                if not in_flight:
+                    return
+                prospects, user_records, future = in_flight.popleft()
+                with metrics.phase('scoring'):
+                    result = await future
+                if score:
+                    metrics.incr('prospects_scored', len(prospects) - result[0])
+                yield prospects, user_records, result
+                # Later batches are still in flight, so only this one's records are released
+                if self._unit_of_work:
+                    self._unit_of_work.release_clean(prospects.keys())
+    
+    def _adopt_batch(self, prospects, stored):
+        """(prospects, user_records) with stored records tracked by the current unit of work"""
+        try:
+            user_records = self._unit_of_work.adopt(stored) if self._unit_of_work else stored
+        except Exception as e:
+            print(f"Error loading user data: {e}")
+            user_records = {name: self.get_user_data(name) for name in prospects.keys()}
+        return prospects, user_records
+    
+    def _release_clean_user_data(self):
+        if self._unit_of_work:
+            self._unit_of_work.release_clean()
+    
     def get_user_data(self, company_name):
         """Load user-specific data for a company"""
-        user_file = os.path.join(self.user_data_dir, f"{company_name}.json")
         try:
-            if os.path.exists(user_file):
-                with open(user_file, 'r') as f:
-                    return json.load(f)
+            if self._unit_of_work:
+                return self._unit_of_work.get(company_name)
+            return self.user_store.get(company_name)
         except Exception as e:
             print(f"Error loading user data for {company_name}: {e}")
         return {}
     
     def save_user_data(self, company_name, data):
-        """Save user-specific data for a company"""
-        user_file = os.path.join(self.user_data_dir, f"{company_name}.json")
+        """Save user-specific data for a company (deferred inside a unit of work)"""
         try:
-            with open(user_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if self._unit_of_work:
+                self._unit_of_work.save(company_name, data)
+            else:
+                self.write_user_data({company_name: data})
+            self._index_user_data({company_name: data})
         except Exception as e:
             print(f"Error saving user data for {company_name}: {e}")
     
-    def create_followup_reminder(self, company_name, followup_data):
-        """Create OpenClaw cron reminder for follow-up"""
+    def get_many_user_data(self, company_names):
+        """Load user data for several companies in one store round-trip"""
         try:
-            followup_date = datetime.fromisoformat(followup_data['datetime'].replace('Z', '+00:00'))
-            
-            # Create cron schedule (minute hour day month weekday)
-            cron_schedule = f"{followup_date.minute} {followup_date.hour} {followup_date.day} {followup_date.month} *"
-            
-            # Create reminder message
-            message = f"""🔔 CRM FOLLOW-UP REMINDER
+            if self._unit_of_work:
+                return self._unit_of_work.get_many(company_names)
+            return self.user_store.get_many(company_names)
+        except Exception as e:
+            print(f"Error loading user data: {e}")
+            return {name: self.get_user_data(name) for name in company_names}
+    
+    def save_many_user_data(self, records):
+        """Save user data for several companies in one store round-trip"""
+        try:
+            if self._unit_of_work:
+                for company_name, data in records.items():
+                    self._unit_of_work.save(company_name, data)
+            else:
+                self.write_user_data(records)
+            self._index_user_data(records)
+        except Exception as e:
+            print(f"Error saving user data: {e}")
+    
+    def write_user_data(self, records, replaced=None):
+        """Write user records straight to the store, keeping the dashboard aggregates in step.
+
+        replaced holds the versions being overwritten when the caller has
+        already read them. Unlike save_many_user_data(), errors propagate.
+        """
+        aggregates = self._current_aggregates()
+        if aggregates is not None and replaced is None:
+            replaced = self.user_store.get_many(records.keys())
+        feed = self.change_feed(create=False)
+        generation = feed and self.user_store.write_generation()
+        self.user_store.put_many(records)
+        if feed:
+            self._log_user_data(feed, records.keys(), generation)
+        if aggregates is not None:
+            self._aggregate_user_data(aggregates, replaced, records)
+    
+    def change_feed(self, create=True):
+        """The workspace's ChangeFeed; without create, None until a client first asks for changes"""
+        if self._change_feed is None and (create or os.path.exists(self.change_feed_file)):
+            self._change_feed = ChangeFeed(self.change_feed_file)
+        return self._change_feed
+    
+    def _log_user_data(self, feed, company_names, generation):
+        """Record written user data in the change feed.
+
+        generation is the store's write generation from before the write;
+        if the feed last saw a different one, something wrote around it and
+        clients synced before that point have to reload.
+        """
+        if feed.get_meta('user_data_generation') != generation:
+            feed.raise_floor()
+        feed.record('user_data', company_names)
+        feed.set_meta('user_data_generation', self.user_store.write_generation())
+    
+    def _sync_change_feed(self, feed):
+        """Record a regenerated export's changes, and raise the floor past unlogged writes"""
+        try:
+            export = _file_signature(self.data_file)
+        except OSError:
+            export = None
+        if feed.get_meta('prospects_source') != export:
+            with metrics.phase('sync_change_feed'):
+                feed.sync_prospects(iter_prospect_file(self.data_file) if export else ())
+            feed.set_meta('prospects_source', export)
+        generation = self.user_store.write_generation()
+        if feed.get_meta('user_data_generation') != generation:
+            feed.raise_floor()
+            feed.set_meta('user_data_generation', generation)
+    
+    def changes_since(self, since=0, limit=None):
+        """Prospects and user data changed after change feed version `since`.
+
+        Returns {'version', 'reset', 'more', 'upserts': {'prospects',
+        'user_data'}, 'deletes': {'prospects', 'user_data'}}. A client
+        applies it and asks again from version (straight away while more
+        is set). reset means it is too far behind to catch up by deltas and
+        must reload everything, then continue from version.
+        """
+        feed = self.change_feed()
+        self._sync_change_feed(feed)
+        rows, version, reset = feed.changes_since(since, limit)
+        delta = {'version': version, 'reset': reset, 'more': limit is not None and len(rows) == limit,
+                 'upserts': {'prospects': {}, 'user_data': {}},
+                 'deletes': {'prospects': [], 'user_data': []}}
+        changed = {'prospects': [], 'user_data': []}
+        for _, kind, key, deleted in rows:
+            (delta['deletes'][kind] if deleted else changed[kind]).append(key)
+        
+        if changed['prospects']:
+            if self.stream:
+                wanted = set(changed['prospects'])
+                found = {name: prospect for name, prospect in iter_prospect_file(self.data_file) if name in wanted}
+            else:
+                prospects = self.load_crm_data()
+                found = {name: prospects[name] for name in changed['prospects'] if name in prospects}
+            for company_name in changed['prospects']:
+                if company_name in found:
+                    delta['upserts']['prospects'][company_name] = dict(found[company_name])
+                else:
+                    delta['deletes']['prospects'].append(company_name)
+        if changed['user_data']:
+            delta['upserts']['user_data'] = self.user_store.get_many(changed['user_data'])
+        return delta
+    
+    def compact_change_feed(self, retention_days=CHANGE_FEED_RETENTION_DAYS):
+        """Drop deletions older than retention_days from the change feed"""
+        feed = self.change_feed(create=False)
+        if feed is None:
+            print("📭 No change feed yet; nothing to compact")
+            return 0
+        dropped = feed.compact(retention_days)
+        print(f"🧹 Compacted change feed: {dropped} old deletions dropped, floor at version {feed.floor()}")
+        return dropped
+    
+    @contextmanager
+    def unit_of_work(self):
+        """Defer user data writes until the block exits, then flush them once.
+
+        Nested calls join the outermost unit of work. If the block raises,
+        nothing is written.
+        """
+        if self._unit_of_work:
+            yield self._unit_of_work
+            return
+        
+        self._unit_of_work = UserDataUnitOfWork(self.user_store)
+        try:
+            yield self._unit_of_work
+            unit_of_work, self._unit_of_work = self._unit_of_work, None
+            aggregates = self._current_aggregates(from_disk=True)
+            feed = self.change_feed(create=False)
+            generation = feed and self.user_store.write_generation()
+            written = unit_of_work.commit()
+            if written:
+                print(f"💾 Saved {written} changed user records")
+                self._index_own_writes()
+                if feed:
+                    self._log_user_data(feed, unit_of_work.written.keys(), generation)
+                if aggregates is not None:
+                    self._aggregate_user_data(aggregates, unit_of_work.replaced, unit_of_work.written)
+        finally:
+            self._unit_of_work = None
+    
+    @contextmanager
+    def instrumented(self, command, profile=False):
+        """Time one automation run, then write its metrics (and cProfile stats, if asked)"""
+        profiler = cProfile.Profile() if profile else None
+        self.metrics.begin_run(command)
+        if profiler:
+            profiler.enable()
+        try:
+            yield self.metrics
+        finally:
+            if profiler:
+                profiler.disable()
+                os.makedirs(self.metrics_dir, exist_ok=True)
+                profile_file = os.path.join(self.metrics_dir, f"crm_profile_{command}.prof")
+                profiler.dump_stats(profile_file)
+                print(f"🔬 Profile written to {profile_file}")
+            last_run = self.metrics.end_run()
+            try:
+                self.metrics.write(self.metrics_dir)
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+            phases = ", ".join(f"{name} {phase['seconds']:.3f}s"
+                               for name, phase in sorted(last_run['phases'].items()))
+            print(f"⏱️  {command} took {last_run['duration_seconds']:.3f}s" + (f" ({phases})" if phases else ""))
+    
+    def print_due_soon(self, hours=24):
+        """List follow-ups due in the next N hours"""
+        due = self.followups_due_within(hours)
+        print(f"📅 {len(due)} follow-ups due in the next {hours:g} hours")
+        for ts, company_name in due:
+            print(f"• {company_name} - {datetime.fromtimestamp(ts).strftime('%a %b %d %I:%M %p')}")
+        return due
+    
+    def rebuild_followup_index(self):
+        """Rescan the user_data/ files for follow-up dates, e.g. after restoring them.
+
+        The index notices outside edits on its own; this forces a rescan.
+        SQLite keeps its follow-up index in step itself.
+        """
+        if not hasattr(self.user_store, 'rebuild_followup_index'):
+            print("✅ SQLite user data indexes follow-ups itself; nothing to rebuild")
+            return 0
+        count = self.user_store.rebuild_followup_index()
+        print(f"📅 Rebuilt the follow-up index ({count} follow-ups)")
+        return count
+    
+    def migrate_user_data(self):
+        """Move the per-company user_data/ JSON files into user_data.db"""
+        store = SQLiteUserDataStore(os.path.join(self.workspace_dir, USER_DATA_DB))
+        migrated = store.migrate_from_dir(self.user_data_dir)
+        self.user_store.close()
+        self.user_store = store
+        print(f"✅ Migrated user data for {migrated} companies to {USER_DATA_DB}")
+        return migrated
+    
+    def _reminder_command(self, company_name, followup_data):
+        """openclaw arguments that schedule one follow-up reminder"""
+        followup_date = datetime.fromisoformat(followup_data['datetime'].replace('Z', '+00:00'))
+        
+        # Create cron schedule (minute hour day month weekday)
+        cron_schedule = f"{followup_date.minute} {followup_date.hour} {followup_date.day} {followup_date.month} *"
+        
+        # Create reminder message
+        message = f"""🔔 CRM FOLLOW-UP REMINDER
             
 Company: {company_name}
 Type: {followup_data['type'].replace('_', ' ').title()}
@@ -71,235 +3610,345 @@ Action Items:
 • Check for recent activity
 • Update CRM after contact
 """
-            
-            # Create OpenClaw cron job
-            cron_name = f"crm_followup_{company_name}_{followup_data['id']}"
-            
-            # Command to send reminder
-            command = [
-                "openclaw", "cron", "create",
-                "--name", cron_name,
-                "--schedule", cron_schedule,
-                "--command", f"openclaw message send --target='Tyler' --message='{message}'"
-            ]
-            
-            result = subprocess.run(command, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"✅ Created follow-up reminder for {company_name}")
-                return True
+        
+        # Create OpenClaw cron job
+        cron_name = f"crm_followup_{company_name}_{followup_data['id']}"
+        
+        return [
+            "cron", "create",
+            "--name", cron_name,
+            "--schedule", cron_schedule,
+            "--command", f"openclaw message send --target='Tyler' --message={shlex.quote(message)}"
+        ]
+    
+    def create_followup_reminder(self, company_name, followup_data):
+        """Create OpenClaw cron reminder for follow-up"""
+        return self.create_followup_reminders([(company_name, followup_data)]) == 1
+    
+    def create_followup_reminders(self, reminders):
+        """Create many follow-up reminders, sent concurrently; returns how many succeeded"""
+        return asyncio.run(self.create_followup_reminders_async(reminders))
+    
+    async def create_followup_reminders_async(self, reminders):
+        """Async create_followup_reminders()"""
+        for company_name, followup_data in reminders:
+            try:
+                self.dispatcher.submit(self._reminder_command(company_name, followup_data), company_name)
+            except Exception as e:
+                print(f"Error creating follow-up reminder: {e}")
+        
+        created = 0
+        for result in await self.dispatcher.flush_async():
+            if result['ok']:
+                created += 1
+                print(f"✅ Created follow-up reminder for {result['label']}")
             else:
-                print(f"❌ Failed to create reminder: {result.stderr}")
-                return False
-                
-        except Exception as e:
-            print(f"Error creating follow-up reminder: {e}")
-            return False
+                print(f"❌ Failed to create reminder for {result['label']} (spooled for retry): {result['error']}")
+        return created
+    
+    def retry_spooled_messages(self):
+        """Re-send openclaw calls that previously failed"""
+        results = self.dispatcher.retry_spool()
+        delivered = sum(1 for result in results if result['ok'])
+        print(f"📬 Delivered {delivered} of {len(results)} spooled openclaw calls")
+        return delivered
+    
+    def _overdue_entry(self, company_name, user_data, now=None):
+        """Overdue record for one company, or None if nothing is past due"""
+        now = epoch_now(now)
+        followup_ts = to_epoch(user_data.get('next_followup'))
+        
+        if followup_ts is not None and now > followup_ts:
+            return self._overdue_record(company_name, followup_ts, now)
+        return None
+    
+    @staticmethod
+    def _overdue_record(company_name, followup_ts, now):
+        return {
+            'company': company_name,
+            'due_date': datetime.fromtimestamp(followup_ts),
+            'days_overdue': (now - followup_ts) // SECONDS_PER_DAY
+        }
+    
+    def _can_use_followup_index(self):
+        # Pending (unflushed) edits and streamed runs fall back to a full scan
+        return (hasattr(self.user_store, 'followups_due_before')
+                and not self._unit_of_work and not self.stream)
+    
+    def overdue_followups(self, now=None):
+        """[(due_ts, company)] for prospects with a past-due follow-up, oldest first.
+
+        Answered from the store's due-date index, so the cost depends on the
+        number of overdue follow-ups rather than the size of the book.
+        """
+        prospects = self.load_crm_data()
+        return [(ts, company_name) for ts, company_name in self.user_store.followups_due_before(epoch_now(now))
+                if company_name in prospects]
+    
+    def followups_due_within(self, hours, now=None):
+        """[(due_ts, company)] for prospects with a follow-up due in the next N hours"""
+        now = epoch_now(now)
+        prospects = self.load_crm_data()
+        due = self.user_store.followups_due_between(now, now + int(hours * 3600))
+        return [(ts, company_name) for ts, company_name in due if company_name in prospects]
+    
+    async def _send_overdue_alert(self, overdue_companies):
+        """Send one OpenClaw alert listing every overdue company"""
+        if not overdue_companies:
+            return
+        
+        overdue_count = len(overdue_companies)
+        message = f"🚨 CRM OVERDUE ALERT - {overdue_count} Follow-ups Past Due\\n\\n"
+        
+        for company in sorted(overdue_companies, key=lambda x: x['days_overdue'], reverse=True):
+            message += f"• {company['company']} - {company['days_overdue']} days overdue\\n"
+        
+        message += "\\nRecommended Actions:\\n"
+        message += "• Review and contact overdue prospects\\n"
+        message += "• Update CRM status after contact\\n"
+        message += "• Reschedule follow-ups as needed"
+        
+        # Send alert via OpenClaw
+        if await self.dispatcher.send_async(["message", "send", "--target", "Tyler", "--message", message],
+                                            "overdue alert"):
+            print(f"📨 Sent overdue alert for {overdue_count} companies")
+        else:
+            print(f"❌ Overdue alert for {overdue_count} companies spooled for retry")
+    
+    def _apply_score_update(self, company_name, prospect, user_data, changes):
+        """Store score_update() fields for one prospect; returns a log line if its score changed.
+
+        A prospect without user data whose score did not move is left
+        alone: creating a record just to hold its fingerprint would write
+        one user file per prospect in the book. It is re-scored next run.
+        """
+        if not user_data and 'custom_score' not in changes:
+            return None
+        current_score = user_data.get('custom_score', prospect.get('overall_score', 0))
+        user_data.update(changes)
+        self.save_user_data(company_name, user_data)
+        if 'custom_score' in changes:
+            return f"📊 Updated score for {company_name}: {current_score} → {changes['custom_score']}"
+        return None
+    
+    def _apply_status_update(self, company_name, user_data, new_status, now=None):
+        """Store an auto-promoted status for one prospect; returns its log line"""
+        current_status = user_data.get('status', 'new')
+        user_data['status'] = new_status
+        user_data['status_auto_updated'] = datetime.fromtimestamp(epoch_now(now)).isoformat()
+        user_data['previous_status'] = current_status
+        self.save_user_data(company_name, user_data)
+        return f"📈 Pipeline update for {company_name}: {current_status} → {new_status}"
     
     def check_overdue_followups(self):
         """Check for overdue follow-ups and send alerts"""
-        prospects = self.load_crm_data()
-        overdue_count = 0
+        return asyncio.run(self.check_overdue_followups_async())
+    
+    async def check_overdue_followups_async(self):
+        """Async check_overdue_followups()"""
+        now = epoch_now()
         overdue_companies = []
         
-        for company_name in prospects.keys():
-            user_data = self.get_user_data(company_name)
-            next_followup = user_data.get('next_followup')
-            
-            if next_followup:
-                followup_date = datetime.fromisoformat(next_followup.replace('Z', '+00:00'))
-                if datetime.now() > followup_date:
-                    overdue_count += 1
-                    overdue_companies.append({
-                        'company': company_name,
-                        'due_date': followup_date,
-                        'days_overdue': (datetime.now() - followup_date).days
-                    })
-        
-        if overdue_companies:
-            # Send overdue alert
-            message = f"🚨 CRM OVERDUE ALERT - {overdue_count} Follow-ups Past Due\\n\\n"
-            
-            for company in sorted(overdue_companies, key=lambda x: x['days_overdue'], reverse=True):
-                message += f"• {company['company']} - {company['days_overdue']} days overdue\\n"
-            
-            message += "\\nRecommended Actions:\\n"
-            message += "• Review and contact overdue prospects\\n"
-            message += "• Update CRM status after contact\\n"
-            message += "• Reschedule follow-ups as needed"
-            
-            # Send alert via OpenClaw
-            subprocess.run([
-                "openclaw", "message", "send",
-                "--target", "Tyler", 
-                "--message", message
-            ])
-            
-            print(f"📨 Sent overdue alert for {overdue_count} companies")
+        if self._can_use_followup_index():
+            overdue_companies = [self._overdue_record(company_name, ts, now)
+                                 for ts, company_name in self.overdue_followups(now)]
+        else:
+            async for prospects, user_records in self.aiter_prospect_batches():
+                for company_name in prospects.keys():
+                    entry = self._overdue_entry(company_name, user_records[company_name], now)
+                    if entry:
+                        overdue_companies.append(entry)
         
+        await self._send_overdue_alert(overdue_companies)
         return overdue_companies
     
-    def auto_score_update(self):
-        """Automatically update lead scores based on activity"""
-        prospects = self.load_crm_data()
+    def auto_score_update(self, force=False):
+        """Automatically update lead scores based on activity.
+
+        Only prospects whose score inputs or recency band changed since the
+        last run are re-scored, unless force is set.
+        """
+        return asyncio.run(self.auto_score_update_async(force))
+    
+    async def auto_score_update_async(self, force=False):
+        """Async auto_score_update()"""
+        now = epoch_now()
         updates = 0
+        skipped = 0
         
-        for company_name, prospect in prospects.items():
-            user_data = self.get_user_data(company_name)
-            current_score = user_data.get('custom_score', prospect.get('overall_score', 0))
-            
-            new_score = self.calculate_auto_score(prospect, user_data)
-            
-            if abs(new_score - current_score) >= 10:  # Only update if significant change
-                user_data['custom_score'] = new_score
-                user_data['score_updated'] = datetime.now().isoformat()
-                self.save_user_data(company_name, user_data)
-                updates += 1
+        with self.unit_of_work():
+            async for prospects, user_records, (batch_skipped, score_changes, _) in \
+                    self.aiter_evaluated_batches(now, force, pipeline=False):
+                skipped += batch_skipped
                 
-                print(f"📊 Updated score for {company_name}: {current_score} → {new_score}")
+                for company_name, changes in score_changes.items():
+                    log_line = self._apply_score_update(company_name, prospects[company_name],
+                                                        user_records[company_name], changes)
+                    if log_line:
+                        updates += 1
+                        print(log_line)
         
         if updates > 0:
             print(f"✅ Updated scores for {updates} prospects")
+        if skipped > 0:
+            print(f"⏭️  Skipped {skipped} prospects with unchanged score inputs")
         
+        self.last_score_skipped = skipped
         return updates
     
-    def calculate_auto_score(self, prospect, user_data):
+    def calculate_auto_score(self, prospect, user_data, now=None):
         """Calculate automated lead score based on various factors"""
-        score = prospect.get('overall_score', 0)
-        
-        # Recent activity bonus
-        if prospect.get('latest_contact'):
-            try:
-                last_contact = datetime.fromisoformat(prospect['latest_contact'].replace('Z', '+00:00'))
-                days_since = (datetime.now() - last_contact).days
-                
-                if days_since < 7:
-                    score += 50
-                elif days_since < 30:
-                    score += 25
-                elif days_since < 90:
-                    score += 10
-            except:
-                pass
-        
-        # Status bonus
-        status_bonus = {
-            'hot': 100,
-            'warm': 50,
-            'new': 25,
-            'cold': 0
-        }
-        score += status_bonus.get(user_data.get('status', 'cold'), 0)
-        
-        # Priority tags bonus
-        priority_tags = user_data.get('priority_tags', [])
-        score += len(priority_tags) * 15
-        
-        # Business context bonus
-        business_score = prospect.get('business_score', 0)
-        conversation_score = prospect.get('conversation_score', 0)
-        
-        if business_score > 10:
-            score += 30
-        if conversation_score > 5:
-            score += 20
-        
-        # Industry relevance bonus
-        high_value_categories = ['Food Processing', 'Construction', 'Industrial/Manufacturing']
-        if prospect.get('category') in high_value_categories:
-            score += 25
-        
-        return min(score, 500)  # Cap at 500
+        return calculate_auto_score(prospect, user_data, now)
+    
+    def calculate_auto_scores(self, prospects=None, user_records=None, now=None):
+        """Batch version of calculate_auto_score for a whole book of prospects"""
+        prospects = self.load_crm_data() if prospects is None else prospects
+        if user_records is None:
+            user_records = self.get_many_user_data(prospects.keys())
+        metrics.incr('prospects_scored', len(prospects))
+        with metrics.phase('scoring'):
+            return batch_auto_scores(prospects, user_records, now)
     
     def pipeline_automation(self):
         """Automated pipeline stage management"""
-        prospects = self.load_crm_data()
+        return asyncio.run(self.pipeline_automation_async())
+    
+    async def pipeline_automation_async(self):
+        """Async pipeline_automation()"""
+        now = epoch_now()
         pipeline_updates = 0
         
-        for company_name, prospect in prospects.items():
-            user_data = self.get_user_data(company_name)
-            current_status = user_data.get('status', 'new')
-            
-            # Auto-promote based on activity
-            new_status = self.suggest_status_update(prospect, user_data)
-            
-            if new_status and new_status != current_status:
-                user_data['status'] = new_status
-                user_data['status_auto_updated'] = datetime.now().isoformat()
-                user_data['previous_status'] = current_status
-                self.save_user_data(company_name, user_data)
-                pipeline_updates += 1
-                
-                print(f"📈 Pipeline update for {company_name}: {current_status} → {new_status}")
+        with self.unit_of_work():
+            async for prospects, user_records, (_, _, status_changes) in \
+                    self.aiter_evaluated_batches(now, score=False):
+                for company_name, new_status in status_changes.items():
+                    pipeline_updates += 1
+                    print(self._apply_status_update(company_name, user_records[company_name], new_status, now))
         
         return pipeline_updates
     
-    def suggest_status_update(self, prospect, user_data):
-        """Suggest status updates based on activity patterns"""
-        current_status = user_data.get('status', 'new')
-        business_score = prospect.get('business_score', 0)
-        conversation_score = prospect.get('conversation_score', 0)
-        
-        # High activity = move to warm
-        if (business_score > 20 or conversation_score > 10) and current_status == 'new':
-            return 'warm'
-        
-        # Very high activity = move to hot
-        if (business_score > 50 or conversation_score > 20) and current_status in ['new', 'warm']:
-            return 'hot'
+    def run_full_automation(self, force=False):
+        """Overdue check, re-scoring and pipeline updates in a single pass.
+
+        Each prospect's user data is read once and run through the same
+        per-prospect steps, in the same order, as check_overdue_followups(),
+        auto_score_update() and pipeline_automation(); alerts and log output
+        are emitted in the order the three separate passes would produce them.
+        """
+        return asyncio.run(self.run_full_automation_async(force))
+    
+    async def run_full_automation_async(self, force=False):
+        """Async run_full_automation()"""
+        now = epoch_now()
+        overdue_companies = []
+        score_lines = []
+        pipeline_lines = []
+        skipped = 0
         
-        # Recent contact activity
-        if user_data.get('last_contacted'):
-            try:
-                last_contact = datetime.fromisoformat(user_data['last_contacted'])
-                days_since = (datetime.now() - last_contact).days
+        with self.unit_of_work():
+            # Scores only depend on each prospect's own pre-pipeline status, and
+            # the pipeline rules don't read scores, so a whole batch can be
+            # decided up front (in worker processes with workers > 1)
+            async for prospects, user_records, (batch_skipped, score_changes, status_changes) in \
+                    self.aiter_evaluated_batches(now, force):
+                skipped += batch_skipped
                 
-                if days_since <= 7 and current_status == 'cold':
-                    return 'warm'
-            except:
-                pass
+                for company_name, prospect in prospects.items():
+                    user_data = user_records[company_name]
+                    
+                    entry = self._overdue_entry(company_name, user_data, now)
+                    if entry:
+                        overdue_companies.append(entry)
+                    
+                    if company_name in score_changes:
+                        log_line = self._apply_score_update(company_name, prospect, user_data,
+                                                            score_changes[company_name])
+                        if log_line:
+                            score_lines.append(log_line)
+                    
+                    if company_name in status_changes:
+                        pipeline_lines.append(self._apply_status_update(company_name, user_data,
+                                                                        status_changes[company_name], now))
+            
+            await self._send_overdue_alert(overdue_companies)
+            for log_line in score_lines:
+                print(log_line)
+            if score_lines:
+                print(f"✅ Updated scores for {len(score_lines)} prospects")
+            if skipped > 0:
+                print(f"⏭️  Skipped {skipped} prospects with unchanged score inputs")
+            for log_line in pipeline_lines:
+                print(log_line)
         
-        return None
+        return {
+            'overdue': overdue_companies,
+            'score_updates': len(score_lines),
+            'score_skipped': skipped,
+            'pipeline_updates': len(pipeline_lines)
+        }
+    
+    def suggest_status_update(self, prospect, user_data, now=None):
+        """Suggest status updates based on activity patterns"""
+        return suggest_status_update(prospect, user_data, now)
     
     def generate_weekly_report(self):
         """Generate weekly CRM activity report"""
-        prospects = self.load_crm_data()
-        
         # Calculate metrics
-        total_prospects = len(prospects)
+        now = epoch_now()
+        total_prospects = 0
         hot_leads = 0
         overdue_followups = 0
         new_this_week = 0
         
         category_breakdown = {}
+        batches = ()
+        if not self._unit_of_work:
+            # Stored user data is counted by the materialized aggregates
+            aggregates = self.dashboard_aggregates()
+            total_prospects = aggregates.total
+            hot_leads = aggregates.statuses.get('hot', 0)
+            new_this_week = aggregates.statuses.get('new', 0)
+            overdue_followups = aggregates.overdue(now)
+            category_breakdown = dict(aggregates.categories)
+        elif not self.stream:
+            # Pending edits are only in the prospect index's bitmaps
+            index = self.prospect_index(now)
+            total_prospects = len(index.names)
+            hot_leads = index.mask(status='hot').bit_count()
+            new_this_week = index.mask(status='new').bit_count()
+            overdue_followups = index.range_count('next_followup', None, now - 1)
+            for category, count in index.value_counts('category').items():
+                category = 'Unknown' if category is None else category
+                category_breakdown[category] = category_breakdown.get(category, 0) + count
+        else:
+            batches = self.iter_prospect_batches()
         
-        for company_name, prospect in prospects.items():
-            user_data = self.get_user_data(company_name)
-            
-            # Count by status
-            if user_data.get('status') == 'hot':
-                hot_leads += 1
-            
-            # Count overdue
-            if user_data.get('next_followup'):
-                try:
-                    followup_date = datetime.fromisoformat(user_data['next_followup'].replace('Z', '+00:00'))
-                    if datetime.now() > followup_date:
-                        overdue_followups += 1
-                except:
-                    pass
-            
-            # Count new prospects
-            if user_data.get('status') == 'new':
-                new_this_week += 1
+        for prospects, user_records in batches:
+            total_prospects += len(prospects)
             
-            # Category breakdown
-            category = prospect.get('category', 'Unknown')
-            category_breakdown[category] = category_breakdown.get(category, 0) + 1
+            for company_name, prospect in prospects.items():
+                user_data = user_records[company_name]
+                
+                # Count by status
+                if user_data.get('status') == 'hot':
+                    hot_leads += 1
+                
+                # Count overdue
+                followup_ts = to_epoch(user_data.get('next_followup'))
+                if followup_ts is not None and now > followup_ts:
+                    overdue_followups += 1
+                
+                # Count new prospects
+                if user_data.get('status') == 'new':
+                    new_this_week += 1
+                
+                # Category breakdown
+                category = prospect.get('category', 'Unknown')
+                category_breakdown[category] = category_breakdown.get(category, 0) + 1
         
         # Generate report
         report = f"""📊 SaniCrete CRM Weekly Report
-Generated: {datetime.now().strftime('%B %d, %Y')}
+Generated: {datetime.fromtimestamp(now).strftime('%B %d, %Y')}
 
 OVERVIEW:
 • Total Prospects: {total_prospects}
@@ -323,50 +3972,384 @@ RECOMMENDED ACTIONS:
 Access your CRM: http://localhost:8000/crm-system.html"""
         
         # Send report
-        subprocess.run([
-            "openclaw", "message", "send",
-            "--target", "Tyler",
-            "--message", report
-        ])
-        
-        print("📨 Weekly report sent!")
+        if self.dispatcher.send(["message", "send", "--target", "Tyler", "--message", report], "weekly report"):
+            print("📨 Weekly report sent!")
+        else:
+            print("❌ Weekly report spooled for retry")
         return report
 
+# The cron jobs setup-crm.sh registers, run in-process by the daemon:
+# (job name, command, hour, minute, weekday), weekday 0 = Monday, None = daily
+DAEMON_SCHEDULE = (
+    ('crm_daily_full_automation', 'full-automation', 6, 0, None),
+    ('crm_daily_overdue_check', 'check-overdue', 9, 0, None),
+    ('crm_score_update_morning', 'update-scores', 10, 0, None),
+    ('crm_score_update_afternoon', 'update-scores', 15, 0, None),
+    ('crm_weekly_pipeline', 'pipeline-automation', 8, 0, 0),
+    ('crm_weekly_report', 'weekly-report', 17, 0, 4),
+    ('crm_change_feed_compaction', 'compact-changes', 2, 0, None)
+)
+DAEMON_SOCKET_FILE = ".crm_daemon.sock"
+
+def next_scheduled_run(hour, minute, weekday=None, after=None):
+    """Epoch seconds of the next local hour:minute (on weekday, if given) strictly after `after`"""
+    after = datetime.fromtimestamp(epoch_now(after))
+    candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    if weekday is not None:
+        candidate += timedelta(days=(weekday - candidate.weekday()) % 7)
+    return epoch_now(candidate)
+
+class AutomationDaemon:
+    """Long-running automation process with a built-in scheduler.
+
+    One CRMAutomations instance stays open for the life of the process, so
+    prospect data (via prospect_cache) and the user data store are loaded
+    once and kept warm. The schedule from setup-crm.sh runs in-process, the
+    data files are polled every poll_interval seconds and a change triggers
+    an incremental score update, and a Unix control socket accepts
+    on-demand runs. Jobs run one at a time.
+    """
+
+    def __init__(self, crm, socket_path=None, schedule=DAEMON_SCHEDULE, poll_interval=2.0, profile=False):
+        self.crm = crm
+        self.profile = profile
+        self.socket_path = socket_path or os.path.join(crm.workspace_dir, DAEMON_SOCKET_FILE)
+        self.schedule = schedule
+        self.poll_interval = poll_interval
+        self.next_runs = {}
+        self.last_runs = {}
+        self.started_at = None
+        self._seen_signature = None
+        self._stopping = None
+        self._run_lock = None
+
+    def _jobs(self):
+        crm = self.crm
+        return {
+            'check-overdue': crm.check_overdue_followups_async,
+            'update-scores': crm.auto_score_update_async,
+            'pipeline-automation': crm.pipeline_automation_async,
+            'full-automation': crm.run_full_automation_async,
+            # These block (the first two drive their own event loops), so they run in a worker thread
+            'weekly-report': lambda: asyncio.to_thread(crm.generate_weekly_report),
+            'flush-spool': lambda: asyncio.to_thread(crm.retry_spooled_messages),
+            'compact-changes': lambda: asyncio.to_thread(crm.compact_change_feed)
+        }
+
+    def _data_signature(self):
+        try:
+            prospects = _file_signature(self.crm.data_file)
+        except OSError:
+            prospects = None
+        return prospects, self.crm.user_store.change_signature()
+
+    async def run(self, command, reason="on demand"):
+        """Run one automation command, waiting for any job already in progress"""
+        job = self._jobs().get(command)
+        if job is None:
+            raise ValueError(f"Unknown command: {command}")
+        
+        async with self._run_lock:
+            print(f"🕑 Running {command} ({reason})")
+            started = time.time()
+            try:
+                with self.crm.instrumented(command, self.profile):
+                    return await job()
+            finally:
+                # The job's own writes must not look like an outside change
+                self._seen_signature = self._data_signature()
+                self.last_runs[command] = {
+                    'at': datetime.fromtimestamp(started).isoformat(),
+                    'seconds': round(time.time() - started, 3),
+                    'reason': reason
+                }
+
+    async def _sleep(self, seconds):
+        """Sleep, waking early if the daemon is stopping; True if it is"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self._stopping.is_set()
+
+    async def _watch_files(self):
+        """Re-score shortly after the prospect export or user data changes on disk"""
+        while True:
+            if self._data_signature() != self._seen_signature:
+                reason = "startup" if self._seen_signature is None else "data changed"
+                self.crm.user_store.refresh()
+                try:
+                    await self.run('update-scores', reason)
+                except Exception as e:
+                    print(f"❌ update-scores failed: {e}")
+            if await self._sleep(self.poll_interval):
+                return
+
+    async def _run_schedule(self):
+        now = epoch_now()
+        self.next_runs = {name: next_scheduled_run(hour, minute, weekday, now)
+                          for name, _, hour, minute, weekday in self.schedule}
+        while True:
+            for name, command, hour, minute, weekday in self.schedule:
+                if self.next_runs[name] <= epoch_now():
+                    try:
+                        await self.run(command, name)
+                    except Exception as e:
+                        print(f"❌ {name} failed: {e}")
+                    self.next_runs[name] = next_scheduled_run(hour, minute, weekday)
+            # Re-check at least once a minute so clock changes and sleep are noticed
+            wait = min(self.next_runs.values(), default=epoch_now() + 60) - epoch_now()
+            if await self._sleep(min(max(wait, 1), 60)):
+                return
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'next_runs': {name: datetime.fromtimestamp(ts).isoformat() for name, ts in self.next_runs.items()},
+            'last_runs': self.last_runs,
+            'prospect_cache': prospect_cache.stats()
+        }
+
+    async def _handle_client(self, reader, writer):
+        """Serve one newline-delimited JSON request: {"command": ...}"""
+        try:
+            request = json.loads(await reader.readline() or b'{}')
+            command = request.get('command')
+            if command == 'status':
+                result = self.status()
+            elif command == 'metrics':
+                result = self.crm.metrics.to_dict()
+            elif command == 'stop':
+                self.stop()
+                result = None
+            elif command == 'reload':
+                prospect_cache.invalidate()
+                self.crm.user_store.refresh()
+                result = await self.run('update-scores', "reload")
+            else:
+                result = await self.run(command, "control socket")
+            response = {'ok': True, 'result': result}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        writer.write((json.dumps(response, default=str) + '\n').encode('utf-8'))
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _claim_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            send_daemon_command(self.socket_path, 'status', timeout=5)
+        except OSError:
+            os.remove(self.socket_path)  # Left behind by a daemon that did not shut down cleanly
+            return
+        raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+
+    def stop(self):
+        if self._stopping:
+            self._stopping.set()
+
+    async def serve(self):
+        """Run until stop(), SIGINT/SIGTERM or a "stop" request; the current job is allowed to finish"""
+        self._stopping = asyncio.Event()
+        self._run_lock = asyncio.Lock()
+        self._claim_socket()
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except (ValueError, RuntimeError, NotImplementedError):
+                pass  # Only possible on the main thread
+        
+        self.started_at = datetime.now().isoformat()
+        tasks = [asyncio.create_task(self._watch_files()), asyncio.create_task(self._run_schedule())]
+        print(f"🛰️  CRM automation daemon listening on {self.socket_path}")
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            async with self._run_lock:
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            print("🛑 CRM automation daemon stopped")
+
+def send_daemon_command(socket_path, command, timeout=None):
+    """Send one command to a running daemon and return its decoded response"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((json.dumps({'command': command}) + '\n').encode('utf-8'))
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = client.recv(1 << 16)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response)
+
+def parse_cli_args(argv):
+    """Split argv into (command, options); options are --flag or --name value"""
+    command = None
+    options = {}
+    args = iter(argv)
+    for arg in args:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            name = name.replace('-', '_')
+            if not value and name in CLI_VALUE_OPTIONS:
+                value = next(args, '')
+            if name in CLI_LIST_OPTIONS:
+                options.setdefault(name, []).append(value)
+            else:
+                options[name] = value or True
+        elif command is None:
+            command = arg
+        else:
+            options.setdefault('args', []).append(arg)
+    return command, options
+
+# Options that take a value, e.g. --workers 8
+CLI_VALUE_OPTIONS = {'hours', 'send', 'poll_interval', 'metrics_dir', 'limit', 'since',
+                     'format', 'columns', 'view', 'search', 'status', 'category', 'min_score',
+                     'workers', 'var'}
+
+# Value options that may be repeated, collected into a list
+CLI_LIST_OPTIONS = {'var'}
+
+def cli_filters(options):
+    """dashboard_filter() keyword arguments from the --view/--search/... options"""
+    filters = {name: options[name] for name in ('view', 'search', 'status', 'category', 'overdue')
+               if options.get(name)}
+    if options.get('min_score'):
+        filters['min_score'] = float(options['min_score'])
+    return filters
+
+# Commands that run once and write metrics when they finish
+CLI_COMMANDS = ('check-overdue', 'update-scores', 'pipeline-automation', 'weekly-report', 'full-automation',
+                'migrate-user-data', 'build-snapshot', 'build-search-index', 'search', 'due-soon', 'flush-spool',
+                'compact-changes', 'export', 'mail-merge', 'rebuild-followup-index')
+
 def main():
     """Main automation function - can be called by cron"""
-    import sys
-    
-    crm = CRMAutomations()
-    
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-        
-        if command == "check-overdue":
-            crm.check_overdue_followups()
-        elif command == "update-scores":
-            crm.auto_score_update()
-        elif command == "pipeline-automation":
-            crm.pipeline_automation()
-        elif command == "weekly-report":
-            crm.generate_weekly_report()
-        elif command == "full-automation":
-            print("🤖 Running full CRM automation...")
-            crm.check_overdue_followups()
-            crm.auto_score_update()
-            crm.pipeline_automation()
-            print("✅ Full automation complete!")
+    command, options = parse_cli_args(sys.argv[1:])
+    
+    workers = int(options['workers']) if options.get('workers') else None
+    crm = CRMAutomations(compact=bool(options.get('compact')), stream=bool(options.get('stream')), workers=workers)
+    if options.get('metrics_dir'):
+        crm.metrics_dir = options['metrics_dir']
+    profile = bool(options.get('profile'))
+    
+    if command == "daemon":
+        daemon = AutomationDaemon(crm, poll_interval=float(options.get('poll_interval', 2)), profile=profile)
+        if options.get('send'):
+            try:
+                response = send_daemon_command(daemon.socket_path, options['send'])
+                print(json.dumps(response, indent=2, default=str))
+            except OSError as e:
+                print(f"❌ No daemon reachable at {daemon.socket_path}: {e}")
         else:
-            print(f"Unknown command: {command}")
-            print("Available commands: check-overdue, update-scores, pipeline-automation, weekly-report, full-automation")
+            asyncio.run(daemon.serve())
+    elif command == "changes":
+        # Plain JSON on stdout for sync jobs, so no metrics summary line
+        limit = int(options['limit']) if options.get('limit') else None
+        print(json.dumps(crm.changes_since(int(options.get('since', 0)), limit), default=str))
+    elif command in CLI_COMMANDS:
+        
+        with crm.instrumented(command, profile):
+            if command == "check-overdue":
+                crm.check_overdue_followups()
+            elif command == "update-scores":
+                crm.auto_score_update(force=bool(options.get('full_rescore')))
+            elif command == "pipeline-automation":
+                crm.pipeline_automation()
+            elif command == "weekly-report":
+                crm.generate_weekly_report()
+            elif command == "migrate-user-data":
+                crm.migrate_user_data()
+            elif command == "build-snapshot":
+                crm.build_snapshot()
+            elif command == "build-search-index":
+                crm.build_search_index()
+            elif command == "search":
+                crm.print_search(" ".join(options.get('args', [])), int(options.get('limit', 20)))
+            elif command == "due-soon":
+                crm.print_due_soon(float(options.get('hours', 24)))
+            elif command == "flush-spool":
+                crm.retry_spooled_messages()
+            elif command == "compact-changes":
+                crm.compact_change_feed()
+            elif command == "rebuild-followup-index":
+                crm.rebuild_followup_index()
+            elif command == "export":
+                filters = cli_filters(options)
+                columns = options['columns'].split(',') if options.get('columns') else EXPORT_COLUMNS
+                path = (options.get('args') or ['sanicrete-crm-prospects.csv'])[0]
+                crm.export_prospects(path, options.get('format'), columns,
+                                     True if options.get('gzip') else None, **filters)
+            elif command == "mail-merge":
+                args = options.get('args') or []
+                if not args:
+                    print("❌ mail-merge needs a template name")
+                    return
+                variables = dict(var.partition('=')[::2] for var in options.get('var', []))
+                path = args[1] if len(args) > 1 else f"campaign-{args[0]}.ndjson"
+                try:
+                    crm.render_campaign(args[0], path, variables, workers, **cli_filters(options))
+                except TemplateError as e:
+                    print(f"❌ {e}")
+            elif command == "full-automation":
+                print("🤖 Running full CRM automation...")
+                crm.run_full_automation(force=bool(options.get('full_rescore')))
+                cache_stats = prospect_cache.stats()
+                print(f"🗂️  Prospect data parsed {cache_stats['misses']}x, served from cache {cache_stats['hits']}x")
+                print("✅ Full automation complete!")
+    elif command:
+        print(f"Unknown command: {command}")
+        print(f"Available commands: {', '.join(CLI_COMMANDS + ('changes', 'daemon'))}")
     else:
         print("🤖 SaniCrete CRM Automations")
-        print("Usage: python3 crm-automations.py <command>")
+        print("Usage: python3 crm-automations.py <command> [--compact] [--stream]")
         print("Commands:")
         print("  check-overdue     - Check for overdue follow-ups")
         print("  update-scores     - Update lead scores automatically")
         print("  pipeline-automation - Automated pipeline management")
         print("  weekly-report     - Generate weekly activity report")
         print("  full-automation   - Run all automations")
+        print("  migrate-user-data - Move user_data/ files into user_data.db (SQLite)")
+        print("  build-snapshot    - Write the fast-loading binary prospect snapshot")
+        print("  build-search-index - Write the full-text search index for prospects and intelligence")
+        print("  search <words>    - Ranked full-text search (prefixes match; --limit N, default 20)")
+        print("  due-soon          - List follow-ups due in the next --hours (default 24)")
+        print("  flush-spool       - Retry openclaw calls that failed earlier")
+        print("  changes           - JSON delta of prospects and user data changed after --since V (--limit N)")
+        print("  compact-changes   - Drop old deletions from the change feed")
+        print("  rebuild-followup-index - Rescan user_data/ files for follow-up dates")
+        print("  export [FILE]     - Stream prospects with their user data to CSV or NDJSON (.ndjson, .gz)")
+        print("  mail-merge <template> [FILE] - Render an email-templates.json campaign to NDJSON (.gz)")
+        print("  daemon            - Keep data warm and run the schedule in one long-lived process")
+        print("Options:")
+        print("  --compact         - Hold prospects in a compact columnar table")
+        print("  --stream          - Stream prospects from disk with bounded memory")
+        print("  --full-rescore    - Re-score every prospect, not just changed ones")
+        print("  --send <command>  - With daemon: run a command (or status/reload/stop) in the running daemon")
+        print("  --poll-interval N - With daemon: seconds between data file change checks (default 2)")
+        print("  --metrics-dir DIR - Where crm_metrics.json/.prom are written (default: workspace)")
+        print("  --profile         - Also write cProfile stats (crm_profile_<command>.prof)")
+        print("  --format F, --columns a,b, --gzip - With export: csv or ndjson, the columns, gzip")
+        print("  --view/--search/--status/--category/--min-score V, --overdue - With export/mail-merge: dashboard filters")
+        print("  --var name=value  - With mail-merge: campaign placeholder value (repeatable)")
+        print("  --workers N       - Score, evaluate the pipeline and render mail-merge across N processes")
+        print("                      (default: 1; mail-merge: CPU count)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
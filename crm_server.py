@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+SaniCrete CRM API Server
+Serves the dashboard files plus filtered, sorted and paginated prospect
+pages answered from memory, replacing `python3 -m http.server`
+"""
+
+import argparse
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import posixpath
+import shutil
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from crm_automations import (AGGREGATES_FILE, EXPORT_COLUMNS, EXPORT_FORMATS, SEARCH_INDEX_SUFFIX, SECONDS_PER_DAY,
+                             SNAPSHOT_SUFFIX, VIEW_CATEGORIES, CRMAutomations, ProspectIndex, dashboard_record,
+                             iter_export_chunks)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+DEFAULT_CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 10000
+# Records built per lock acquisition while an export streams
+EXPORT_BATCH_SIZE = 500
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+# How often a request may stat the data files to look for changes
+RELOAD_CHECK_INTERVAL = 1.0
+QUERY_CACHE_SIZE = 64
+GZIP_MIN_SIZE = 1024
+# Static files above this are streamed as-is instead of cached and gzipped
+STATIC_CACHE_MAX_SIZE = 8 << 20
+ACTIVE_DAYS = 30
+
+# Same weights as getPriorityScore() in crm-system.js
+STATUS_PRIORITY = {'hot': 100, 'warm': 50, 'new': 25, 'cold': 10}
+PRIORITY_TAG_WEIGHT = 20
+OVERDUE_PRIORITY = 200
+
+SORTS = ('priority', 'score', 'recent', 'followup', 'name')
+
+# Never served as static files: user data, spools, profiles, dot-files and the
+# snapshot, search index and aggregates derived from the prospect data
+PRIVATE_DIRECTORIES = ('user_data',)
+PRIVATE_SUFFIXES = ('.db', '.db-wal', '.db-shm', '.jsonl', '.prof', '.log',
+                    SNAPSHOT_SUFFIX, SEARCH_INDEX_SUFFIX, '.tmp')
+PRIVATE_FILES = (AGGREGATES_FILE,)
+
+class QueryError(ValueError):
+    """Raised for a prospect query the server cannot answer (HTTP 400)"""
+
+def _param(params, name, default=''):
+    return (params.get(name) or [default])[0]
+
+class _Row:
+    """Notes and display fields for one prospect; filters and sorts go through the index"""
+
+    __slots__ = ('name', 'notes', 'status', 'custom_score', 'base_priority')
+
+    def __init__(self, name, user_data, custom_score):
+        self.name = name
+        self.status = user_data.get('status') or 'new'
+        self.notes = (user_data.get('notes') or '').lower()
+        self.custom_score = custom_score
+        self.base_priority = (STATUS_PRIORITY.get(self.status, 0)
+                              + len(user_data.get('priority_tags') or []) * PRIORITY_TAG_WEIGHT
+                              + custom_score / 10)
+
+class ProspectCatalog:
+    """In-memory prospects plus user data, answering dashboard queries.
+
+    Filters and sorts are answered from a ProspectIndex (bitmaps per
+    category and status, sorted score, contact and follow-up keys), so a
+    page costs about as much as the rows it returns rather than the size
+    of the book. Searches go through the full-text SearchIndex, plus a
+    substring match on the (few) prospects with notes. The prospect export
+    and user data store are re-read only when their files change.
+    """
+
+    def __init__(self, crm):
+        self.crm = crm
+        self.version = 0
+        self._lock = threading.RLock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._prospects = {}
+        self._user_records = {}
+        self._rows = []
+        self._index = ProspectIndex(())
+        self._overdue = (None, 0)
+        self._notes = {}
+        self._search_index = None
+        self._searches = OrderedDict()
+
+    def _data_signature(self):
+        try:
+            stat = os.stat(self.crm.data_file)
+            prospects = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            prospects = None
+        return prospects, self.crm.user_store.change_signature()
+
+    def refresh(self, force=False):
+        """Reload if the data files changed since the last check"""
+        now = time.monotonic()
+        if not force and self._signature is not None and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = self._data_signature()
+            if force or signature != self._signature:
+                self._load()
+                self._signature = signature
+
+    def _load(self):
+        self.crm.user_store.refresh()
+        prospects = self.crm.load_crm_data()
+        user_records = self.crm.user_store.get_many(prospects.keys())
+        index = ProspectIndex.build(prospects, user_records, int(time.time()))
+        self._prospects = prospects
+        self._user_records = user_records
+        self._rows = [_Row(name, user_records.get(name) or {}, index.value(row, 'custom_score'))
+                      for row, name in enumerate(index.names)]
+        self._notes = {position: row.notes for position, row in enumerate(self._rows) if row.notes}
+        index.add_sorted_field('priority', (row.base_priority for row in self._rows), descending=True)
+        index.add_sorted_field('name', (name.lower() for name in index.names))
+        self._index = index
+        self._changed()
+
+    def _changed(self):
+        self._overdue = (None, 0)
+        self._searches.clear()
+        self.version += 1
+
+    def update_user_data(self, company_name, changes):
+        """Merge changes into one company's user data (like saveUserData in crm-system.js)"""
+        with self._lock:
+            if company_name not in self._index.rows:
+                raise KeyError(company_name)
+            stored = self.crm.user_store.get(company_name)
+            record = dict(stored, **changes)
+            record['lastUpdated'] = datetime.now().isoformat()
+            self.crm.write_user_data({company_name: record}, replaced={company_name: stored})
+            self._user_records[company_name] = record
+            position = self._index.rows[company_name]
+            self._index.update_user_data(company_name, record)
+            row = _Row(company_name, record, self._index.value(position, 'custom_score'))
+            self._rows[position] = row
+            if row.notes:
+                self._notes[position] = row.notes
+            else:
+                self._notes.pop(position, None)
+            self._index.set_value(position, 'priority', row.base_priority)
+            self._changed()
+            # Our own write is not an outside change
+            self._signature = self._data_signature()
+            return record
+
+    def record(self, company_name):
+        """Dashboard record: the prospect merged with its user data (as loadData() builds it)"""
+        row = self._rows[self._index.rows[company_name]]
+        return dashboard_record(self._prospects[company_name], self._user_records.get(company_name) or {},
+                                row.custom_score)
+
+    def _overdue_mask(self, now):
+        # Follow-ups only become overdue as now passes their due time, so
+        # extend the cached bitmap with the newly overdue rows
+        cutoff, mask = self._overdue
+        if cutoff is None or now - 1 < cutoff:
+            mask = self._index.range_mask('next_followup', None, now - 1)
+        elif now - 1 > cutoff:
+            mask |= self._index.range_mask('next_followup', cutoff + 1, now - 1)
+        self._overdue = (now - 1, mask)
+        return mask
+
+    def _search_mask(self, search):
+        search_index = self.crm.load_search_index()
+        if search_index is not self._search_index:
+            self._search_index = search_index
+            self._searches.clear()
+        mask = self._searches.get(search)
+        if mask is None:
+            rows = self._index.rows
+            matched = (rows.get(search_index.names[doc]) for doc in search_index.match(search))
+            mask = self._index.bitmap(row for row in matched if row is not None)
+            mask |= self._index.bitmap(position for position, notes in self._notes.items() if search in notes)
+            self._searches[search] = mask
+            if len(self._searches) > QUERY_CACHE_SIZE:
+                self._searches.popitem(last=False)
+        else:
+            self._searches.move_to_end(search)
+        return mask
+
+    def _page(self, filters, sort, now, offset, limit):
+        """(total, row positions) for one page of the rows matching filters, in sort order"""
+        view, search, status, category, overdue, min_score = filters
+        index = self._index
+        mask = index.all_rows
+        equals = []
+        if view == 'hot':
+            equals.append(('status', 'hot'))
+        elif view == 'followups' or overdue:
+            mask &= self._overdue_mask(now)
+        if view in VIEW_CATEGORIES:
+            equals.append(('category', VIEW_CATEGORIES[view]))
+        if search:
+            mask &= self._search_mask(search)
+        if status:
+            # Records without a status show as new
+            equals.append(('status', (status, None) if status == 'new' else status))
+        if category:
+            equals.append(('category', category))
+        ranges = {'custom_score': (min_score, None)} if min_score is not None else None
+
+        # Index walks keep ties in book order, just like Array.prototype.sort
+        if sort in ('score', 'recent', 'name'):
+            order_by = {'score': 'custom_score', 'recent': 'latest_contact', 'name': 'name'}[sort]
+            return index.query(mask, ranges, order_by, offset, limit, equals)
+
+        overdue_mask = self._overdue_mask(now)
+        if sort == 'followup':
+            # Overdue follow-ups first, oldest due date first, then the rest in book order
+            due_total, due = index.query(mask & overdue_mask, ranges, 'next_followup', offset, limit, equals)
+            rest_total, rest = index.query(mask & ~overdue_mask, ranges, None,
+                                           max(0, offset - due_total), limit - len(due), equals)
+            return due_total + rest_total, due + rest
+
+        # priority: overdue rows rank OVERDUE_PRIORITY higher, so merge the two walks
+        due_total, due = index.query(mask & overdue_mask, ranges, 'priority', 0, offset + limit, equals)
+        rest_total, rest = index.query(mask & ~overdue_mask, ranges, 'priority', 0, offset + limit, equals)
+        rows = self._rows
+        merged = heapq.merge(((-(rows[i].base_priority + OVERDUE_PRIORITY), i) for i in due),
+                             ((-rows[i].base_priority, i) for i in rest))
+        return due_total + rest_total, [i for _, i in itertools.islice(merged, offset, offset + limit)]
+
+    def _filters(self, params):
+        """(filters, sort) from the dashboard's filter and sort parameters"""
+        sort = _param(params, 'sort', 'priority')
+        if sort not in SORTS:
+            raise QueryError(f"Unknown sort {sort!r}; expected one of {', '.join(SORTS)}")
+        try:
+            min_score = float(_param(params, 'min_score')) if _param(params, 'min_score') else None
+        except ValueError as e:
+            raise QueryError(str(e))
+        filters = (_param(params, 'view'), _param(params, 'search').strip().lower(), _param(params, 'status'),
+                   _param(params, 'category'), _param(params, 'overdue') in ('1', 'true'), min_score)
+        return filters, sort
+
+    def query(self, params, now=None):
+        """One page of prospects for the dashboard's filters; params as parsed from the query string"""
+        filters, sort = self._filters(params)
+        try:
+            page = max(1, int(_param(params, 'page', '1')))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(_param(params, 'page_size', str(DEFAULT_PAGE_SIZE)))))
+        except ValueError as e:
+            raise QueryError(str(e))
+
+        self.refresh()
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            total, positions = self._page(filters, sort, now, (page - 1) * page_size, page_size)
+            names = [self._index.names[i] for i in positions]
+            return {
+                'total': total,
+                'page': page,
+                'page_size': page_size,
+                'pages': (total + page_size - 1) // page_size,
+                'sort': sort,
+                'version': self.version,
+                'items': [dict(self.record(name), name=name) for name in names]
+            }
+
+    def export(self, params, now=None):
+        """(format, chunks) for every prospect matching the dashboard's filters, in its sort order.
+
+        The matching rows are fixed up front; records are then built a
+        batch at a time as the chunks are consumed, so a full-book export
+        neither holds the lock throughout nor buffers the output.
+        """
+        filters, sort = self._filters(params)
+        fmt = _param(params, 'format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            raise QueryError(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        columns = tuple(column for column in _param(params, 'columns').split(',') if column) or EXPORT_COLUMNS
+
+        self.refresh()
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            names = self._index.names
+            positions = self._page(filters, sort, now, 0, len(names))[1] if names else []
+            names = [names[i] for i in positions]
+
+        def records():
+            for start in range(0, len(names), EXPORT_BATCH_SIZE):
+                with self._lock:
+                    batch = [(name, self.record(name)) for name in names[start:start + EXPORT_BATCH_SIZE]
+                             if name in self._index.rows]
+                yield from batch
+        return fmt, iter_export_chunks(records(), fmt, columns)
+
+    def search(self, params):
+        """Ranked full-text matches across prospects and deep-intelligence entries"""
+        query = (params.get('q') or [''])[0].strip()
+        try:
+            limit = min(MAX_PAGE_SIZE, max(1, int((params.get('limit') or [str(DEFAULT_PAGE_SIZE)])[0])))
+        except ValueError as e:
+            raise QueryError(str(e))
+        self.refresh()
+        with self._lock:
+            hits = self.crm.load_search_index().search(query, limit)
+            for hit in hits:
+                hit['in_book'] = hit['name'] in self._index.rows
+            return {'query': query, 'items': hits}
+
+    def changes(self, params):
+        """Change feed delta after ?since=V, at most ?limit= changes (see CRMAutomations.changes_since)"""
+        try:
+            since = int((params.get('since') or ['0'])[0])
+            limit = min(MAX_CHANGES_LIMIT, max(1, int((params.get('limit') or [str(DEFAULT_CHANGES_LIMIT)])[0])))
+        except ValueError as e:
+            raise QueryError(str(e))
+        with self._lock:
+            return self.crm.changes_since(since, limit)
+
+    def get(self, company_name):
+        self.refresh()
+        with self._lock:
+            return dict(self.record(company_name), name=company_name)
+
+    def stats(self, now=None):
+        """Stat card counters and breakdowns, read from the CRM's materialized aggregates"""
+        self.refresh()
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            aggregates = self.crm.dashboard_aggregates()
+            return {
+                'total': aggregates.total,
+                'hot': aggregates.statuses.get('hot', 0),
+                'due': aggregates.overdue(now),
+                'active': aggregates.contacted_since(now - ACTIVE_DAYS * SECONDS_PER_DAY),
+                'total_emails': aggregates.total_emails,
+                'categories': aggregates.categories,
+                'statuses': aggregates.statuses,
+                'relationship_strength': aggregates.relationship_strength,
+                'version': self.version
+            }
+
+def _etag(body):
+    # Weak, so the same tag covers the gzip and identity encodings
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+class CRMRequestHandler(SimpleHTTPRequestHandler):
+    """Static dashboard files plus the /api/ endpoints, with gzip, ETags and keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+    catalog = None
+    quiet = False
+    _static_cache = {}
+    _static_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _accepts_gzip(self):
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+
+    def _not_modified(self, etag):
+        tags = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        return etag in tags or '*' in tags
+
+    def send_body(self, body, content_type, status=HTTPStatus.OK, etag=None, gzipped=None, head=False):
+        """Send a complete response; gzipped is a pre-compressed copy of body, if any"""
+        etag = etag or _etag(body)
+        if status == HTTPStatus.OK and self._not_modified(etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        encoding = None
+        if self._accepts_gzip() and len(body) >= GZIP_MIN_SIZE:
+            body = gzipped if gzipped is not None else gzip.compress(body, 6)
+            encoding = 'gzip'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', 'no-cache')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_stream(self, chunks, content_type, filename):
+        """Send chunks as they are produced (chunked encoding), gzipped if the client accepts it"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if self._accepts_gzip() else None
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', 'no-cache')
+        if compressor:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        for chunk in itertools.chain(chunks, [b''] if compressor else []):
+            if compressor:
+                chunk = compressor.compress(chunk) if chunk else compressor.flush()
+            if chunk:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def send_json(self, payload, status=HTTPStatus.OK):
+        body = json.dumps(payload, default=str, separators=(',', ':')).encode('utf-8')
+        self.send_body(body, 'application/json', status)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith('/api/'):
+            self.handle_api_get(url)
+        else:
+            self.serve_static(url.path)
+
+    def do_HEAD(self):
+        url = urlsplit(self.path)
+        if url.path.startswith('/api/'):
+            self.send_error(HTTPStatus.METHOD_NOT_ALLOWED)
+        else:
+            self.serve_static(url.path, head=True)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith('/api/user-data/'):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        company_name = unquote(url.path[len('/api/user-data/'):])
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            changes = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(changes, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self.send_json({'error': f"Invalid request body: {e}"}, HTTPStatus.BAD_REQUEST)
+            return
+        try:
+            record = self.catalog.update_user_data(company_name, changes)
+        except KeyError:
+            self.send_json({'error': f"Unknown company: {company_name}"}, HTTPStatus.NOT_FOUND)
+            return
+        self.send_json(record)
+
+    def handle_api_get(self, url):
+        params = parse_qs(url.query)
+        try:
+            if url.path == '/api/prospects':
+                self.send_json(self.catalog.query(params))
+            elif url.path.startswith('/api/prospects/'):
+                self.send_json(self.catalog.get(unquote(url.path[len('/api/prospects/'):])))
+            elif url.path == '/api/stats':
+                self.send_json(self.catalog.stats())
+            elif url.path == '/api/search':
+                self.send_json(self.catalog.search(params))
+            elif url.path == '/api/changes':
+                self.send_json(self.catalog.changes(params))
+            elif url.path == '/api/export':
+                fmt, chunks = self.catalog.export(params)
+                self.send_stream(chunks, EXPORT_CONTENT_TYPES[fmt], f"sanicrete-crm-prospects.{fmt}")
+            else:
+                self.send_json({'error': f"Unknown endpoint: {url.path}"}, HTTPStatus.NOT_FOUND)
+        except QueryError as e:
+            self.send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+        except KeyError as e:
+            self.send_json({'error': f"Unknown company: {e.args[0]}"}, HTTPStatus.NOT_FOUND)
+
+    def _private(self, path):
+        parts = [part for part in posixpath.normpath(unquote(path)).split('/') if part]
+        return (any(part.startswith('.') for part in parts)
+                or (parts and parts[0] in PRIVATE_DIRECTORIES)
+                or (parts and parts[-1] in PRIVATE_FILES)
+                or (parts and parts[-1].endswith(PRIVATE_SUFFIXES)))
+
+    def serve_static(self, path, head=False):
+        if self._private(path):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        file_path = self.translate_path(path)
+        if os.path.isdir(file_path):
+            file_path = os.path.join(file_path, 'index.html')
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        content_type = self.guess_type(file_path)
+
+        if stat.st_size > STATIC_CACHE_MAX_SIZE:
+            self._stream_file(file_path, stat, content_type, head)
+            return
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._static_lock:
+            entry = self._static_cache.get(file_path)
+        if entry is None or entry[0] != signature:
+            with open(file_path, 'rb') as f:
+                body = f.read()
+            gzipped = gzip.compress(body, 6) if len(body) >= GZIP_MIN_SIZE else None
+            entry = (signature, body, gzipped, _etag(body))
+            with self._static_lock:
+                self._static_cache[file_path] = entry
+        _, body, gzipped, etag = entry
+        self.send_body(body, content_type, etag=etag, gzipped=gzipped, head=head)
+
+    def _stream_file(self, file_path, stat, content_type, head):
+        etag = f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self._not_modified(etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(stat.st_size))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if not head:
+            with open(file_path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile)
+
+def make_server(crm, host='127.0.0.1', port=8000, directory=None, quiet=False):
+    """Build (but do not start) the HTTP server for a CRMAutomations workspace"""
+    catalog = ProspectCatalog(crm)
+    catalog.refresh(force=True)
+    directory = directory or crm.workspace_dir
+
+    class Handler(CRMRequestHandler):
+        pass
+
+    Handler.catalog = catalog
+    Handler.quiet = quiet
+    Handler._static_cache = {}
+
+    def handler(*args, **kwargs):
+        return Handler(*args, directory=directory, **kwargs)
+
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.catalog = catalog
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the CRM dashboard and its prospect API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workspace', default=os.path.dirname(os.path.abspath(__file__)),
+                        help="CRM workspace to serve (default: this directory)")
+    parser.add_argument('--compact', action='store_true', help="hold prospects in a compact columnar table")
+    parser.add_argument('--quiet', action='store_true', help="do not log every request")
+    args = parser.parse_args()
+
+    crm = CRMAutomations(args.workspace, compact=args.compact)
+    server = make_server(crm, args.host, args.port, quiet=args.quiet)
+    print(f"🌐 Serving {server.catalog.stats()['total']:,} prospects on http://{args.host}:{args.port}/crm-system.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        crm.user_store.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 """
-Generate filtered CRM data from original source
+Generate filtered CRM data from original source, or synthetic books of any
+size for load testing
 """
 
+import argparse
 import json
 import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from crm_automations import (INTELLIGENCE_FILE, SECONDS_PER_DAY, ProspectTable, build_search_index,
+                             iter_prospect_file, open_user_data_store, search_index_path_for, snapshot_path_for,
+                             to_epoch, write_prospect_snapshot)
+
 def create_sample_data():
     """Create sample CRM data for testing"""
     
@@ -219,6 +230,11 @@ def create_sample_data():
     # Combine all prospects
     all_prospects = {**sample_prospects, **business_prospects}
     
+    # Pre-computed epoch seconds so the automations never re-parse these dates
+    for prospect in all_prospects.values():
+        prospect["first_contact_ts"] = to_epoch(prospect["first_contact"])
+        prospect["latest_contact_ts"] = to_epoch(prospect["latest_contact"])
+    
     # Create summary stats
     summary_stats = {
         "total_prospects": len(all_prospects),
@@ -257,20 +273,318 @@ def create_sample_data():
     
     return crm_data
 
+# Synthetic books: prospects are generated in fixed-size shards, each from
+# its own seeded RNG, so the output for a given seed does not depend on how
+# many worker processes produced it
+DEFAULT_CATEGORY_MIX = {
+    "Food Processing": 3,
+    "Construction": 3,
+    "Industrial/Manufacturing": 2,
+    "Business Prospect": 1,
+    "Service Provider": 1
+}
+CATEGORY_INDUSTRIES = {
+    "Food Processing": "food_processing",
+    "Construction": "construction",
+    "Industrial/Manufacturing": "manufacturing"
+}
+NAME_PREFIXES = ("Summit", "Keystone", "Prairie", "Harbor", "Granite", "Pioneer", "Lakeside",
+                 "Redwood", "Union", "Northfield", "Riverbend", "Cascade", "Liberty", "Ironwood")
+CATEGORY_NOUNS = {
+    "Food Processing": ("Foods", "Meats", "Dairy", "Bakery", "Packing"),
+    "Construction": ("Builders", "Contracting", "Construction", "Concrete", "Development"),
+    "Industrial/Manufacturing": ("Industries", "Manufacturing", "Fabrication", "Plastics", "Metals"),
+    "Business Prospect": ("Group", "Holdings", "Partners", "Enterprises"),
+    "Service Provider": ("Services", "Solutions", "Maintenance", "Facilities")
+}
+EMAIL_SUBJECTS = ("Flooring quote request", "Site visit scheduling", "Epoxy coating install",
+                  "Urethane cement options", "Project timeline", "Signed agreement for flooring install",
+                  "Floor drain replacement", "Bid invitation")
+EMAIL_KEYWORDS = ("flooring", "floor", "coating", "epoxy", "urethane", "concrete", "install")
+CONTACT_ROLES = ("Project Manager", "Plant Manager", "Facilities Director", "Estimator", "Owner")
+USER_STATUSES = ("new", "new", "cold", "warm", "hot")
+PRIORITY_TAGS = ("urgent", "large_project", "repeat_customer", "decision_maker")
+DEFAULT_SHARD_SIZE = 50000
+USER_DATA_BATCH_SIZE = 5000
+
+def parse_range(text):
+    """'LOW-HIGH' (or a single number) -> (low, high), both inclusive"""
+    low, _, high = text.partition('-')
+    low = int(low)
+    high = int(high) if high else low
+    if high < low:
+        raise argparse.ArgumentTypeError(f"range {text!r} ends before it starts")
+    return low, high
+
+def parse_category_mix(text):
+    """'Food Processing=3,Construction=2' -> {category: weight}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip():
+            mix[name.strip()] = float(weight) if weight else 1.0
+    if not mix or not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("category mix needs at least one positive weight")
+    return mix
+
+def synthetic_prospect(i, rng, now, settings):
+    """One prospect in the same shape as create_sample_data(), dated relative to now"""
+    categories, weights = settings['categories']
+    category = rng.choices(categories, weights)[0]
+    name = f"{rng.choice(NAME_PREFIXES)} {rng.choice(CATEGORY_NOUNS.get(category, ('Company',)))} {i + 1:07d}"
+
+    latest_ts = now - rng.randrange(0, 400) * SECONDS_PER_DAY - rng.randrange(SECONDS_PER_DAY)
+    first_ts = latest_ts - rng.randrange(30, 3000) * SECONDS_PER_DAY
+    business_score = rng.randrange(0, 200)
+    conversation_score = rng.randrange(0, 30)
+    total_emails = rng.randint(*settings['total_emails'])
+
+    emails = []
+    for k in range(rng.randint(*settings['relevant_emails'])):
+        emails.append({
+            "date": datetime.fromtimestamp(latest_ts - k * 7 * SECONDS_PER_DAY).isoformat(),
+            "subject": rng.choice(EMAIL_SUBJECTS),
+            "type": "business",
+            "keywords": rng.sample(EMAIL_KEYWORDS, 2)
+        })
+    contacts = {}
+    for role in rng.sample(CONTACT_ROLES, min(rng.randint(*settings['contacts']), len(CONTACT_ROLES))):
+        contacts[role] = {
+            "email": f"{role.split()[0].lower()}{i + 1}@example.com",
+            "email_count": rng.randint(1, max(1, total_emails // 4)),
+            "last_contact": datetime.fromtimestamp(latest_ts - rng.randrange(0, 60) * SECONDS_PER_DAY).isoformat()
+        }
+
+    recent_year = datetime.fromtimestamp(latest_ts).year
+    emails_by_year = {str(recent_year - k): rng.randrange(0, max(1, total_emails // 3)) for k in range(3)}
+    latest_month = datetime.fromtimestamp(latest_ts).strftime('%Y-%m')
+
+    return name, {
+        "category": category,
+        "total_emails": total_emails,
+        "business_score": business_score,
+        "conversation_score": conversation_score,
+        "overall_score": business_score * 2 + conversation_score * 3 + rng.randrange(0, 100),
+        "first_contact": datetime.fromtimestamp(first_ts).isoformat(),
+        "latest_contact": datetime.fromtimestamp(latest_ts).isoformat(),
+        "relevant_emails": emails,
+        "contacts": contacts,
+        "relationship_strength": rng.choice(("cold", "warm", "new")),
+        "current_lead_score": rng.randrange(0, 100),
+        "industry": CATEGORY_INDUSTRIES.get(category, "general"),
+        "emails_by_year": emails_by_year,
+        "emails_by_month": {latest_month: rng.randrange(1, 10)},
+        "first_contact_ts": first_ts,
+        "latest_contact_ts": latest_ts
+    }
+
+def synthetic_user_data(rng, now):
+    """Dashboard user data; about a third have a follow-up, half of those overdue"""
+    data = {"status": rng.choice(USER_STATUSES)}
+    if rng.random() < 0.3:
+        data["priority_tags"] = rng.sample(PRIORITY_TAGS, rng.randint(1, 2))
+    if rng.random() < 0.33:
+        data["next_followup"] = datetime.fromtimestamp(now + rng.randrange(-30, 30) * SECONDS_PER_DAY).isoformat()
+    if rng.random() < 0.2:
+        data["last_contacted"] = datetime.fromtimestamp(now - rng.randrange(0, 30) * SECONDS_PER_DAY).isoformat()
+    return data
+
+def empty_summary_stats():
+    return {
+        "total_prospects": 0,
+        "categories": {},
+        "total_emails": 0,
+        "recent_activity": 0,
+        "active_prospects": 0,
+        "avg_emails_per_prospect": 0
+    }
+
+def add_to_summary_stats(stats, prospect, recent_years=("2025", "2026")):
+    """Fold one prospect into running summary_stats (same rules as create_sample_data)"""
+    stats["total_prospects"] += 1
+    stats["categories"][prospect["category"]] = stats["categories"].get(prospect["category"], 0) + 1
+    stats["total_emails"] += prospect["total_emails"]
+    recent_emails = sum(prospect["emails_by_year"].get(year, 0) for year in recent_years)
+    if recent_emails > 0:
+        stats["active_prospects"] += 1
+        stats["recent_activity"] += recent_emails
+
+def merge_summary_stats(stats, other):
+    for key in ("total_prospects", "total_emails", "recent_activity", "active_prospects"):
+        stats[key] += other[key]
+    for category, count in other["categories"].items():
+        stats["categories"][category] = stats["categories"].get(category, 0) + count
+
+def generate_shard(shard, start, stop, seed, now, settings, parts_dir):
+    """Write prospects start..stop-1 (and their user data) to part files; returns the shard's stats"""
+    rng = random.Random(f"{seed}:{shard}")
+    stats = empty_summary_stats()
+    prospect_part = os.path.join(parts_dir, f"prospects-{shard:06d}.part")
+    user_part = os.path.join(parts_dir, f"user_data-{shard:06d}.jsonl")
+
+    with open(prospect_part, 'w') as prospects_out, \
+            open(user_part, 'w') if settings['user_data'] else open(os.devnull, 'w') as users_out:
+        for i in range(start, stop):
+            name, prospect = synthetic_prospect(i, rng, now, settings)
+            add_to_summary_stats(stats, prospect)
+            prospects_out.write(f"{',' if i else ''}\n{json.dumps(name)}: {json.dumps(prospect)}")
+            if settings['user_data']:
+                users_out.write(json.dumps([name, synthetic_user_data(rng, now)]) + "\n")
+    return stats
+
+def generate_synthetic_data(output, count, seed=0, settings=None, workers=None,
+                            shard_size=DEFAULT_SHARD_SIZE, user_store=None, now=None):
+    """Stream a synthetic filtered_crm_data.json of `count` prospects to `output`.
+
+    Shards are generated in parallel worker processes into part files next
+    to the output, then concatenated in order, so memory use stays at one
+    prospect per worker however large the book is. With user_store set
+    ('sqlite' or 'json') matching user data is written to that backend in
+    the output's directory. Returns the summary_stats.
+    """
+    settings = dict(synthetic_settings(), **(settings or {}))
+    now = int(now if now is not None else time.time())
+    workers = max(1, workers or os.cpu_count() or 1)
+    shards = [(shard, start, min(start + shard_size, count))
+              for shard, start in enumerate(range(0, count, shard_size))]
+    settings['user_data'] = bool(user_store)
+
+    output_dir = os.path.dirname(os.path.abspath(output))
+    parts_dir = tempfile.mkdtemp(prefix='.generate-', dir=output_dir)
+    try:
+        jobs = [(shard, start, stop, seed, now, settings, parts_dir) for shard, start, stop in shards]
+        if workers == 1 or len(shards) == 1:
+            shard_stats = [generate_shard(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                shard_stats = list(pool.map(generate_shard, *zip(*jobs)))
+
+        summary_stats = empty_summary_stats()
+        for stats in shard_stats:
+            merge_summary_stats(summary_stats, stats)
+        if summary_stats["total_prospects"]:
+            summary_stats["avg_emails_per_prospect"] = summary_stats["total_emails"] / summary_stats["total_prospects"]
+
+        temp_output = output + '.tmp'
+        with open(temp_output, 'w') as f:
+            f.write('{"filtered_prospects": {')
+            for shard, _, _ in shards:
+                with open(os.path.join(parts_dir, f"prospects-{shard:06d}.part"), 'r') as part:
+                    shutil.copyfileobj(part, f)
+            f.write('\n},\n')
+            f.write(f'"summary_stats": {json.dumps(summary_stats)},\n')
+            f.write(f'"filter_criteria": {json.dumps({"synthetic": True, "seed": seed})},\n')
+            f.write(f'"generated_at": {json.dumps(datetime.now().isoformat())}}}\n')
+        os.replace(temp_output, output)
+
+        if user_store:
+            store = open_user_data_store(output_dir, user_store)
+            try:
+                for shard, _, _ in shards:
+                    load_user_data_part(store, os.path.join(parts_dir, f"user_data-{shard:06d}.jsonl"))
+            finally:
+                store.close()
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return summary_stats
+
+def load_user_data_part(store, path):
+    records = {}
+    with open(path, 'r') as f:
+        for line in f:
+            name, data = json.loads(line)
+            records[name] = data
+            if len(records) >= USER_DATA_BATCH_SIZE:
+                store.put_many(records)
+                records = {}
+    if records:
+        store.put_many(records)
+
+def synthetic_settings(category_mix=None, relevant_emails=(0, 3), contacts=(1, 3), total_emails=(2, 600)):
+    """Distribution settings for synthetic_prospect()"""
+    mix = category_mix or DEFAULT_CATEGORY_MIX
+    return {
+        'categories': (list(mix), list(mix.values())),
+        'relevant_emails': tuple(relevant_emails),
+        'contacts': tuple(contacts),
+        'total_emails': tuple(total_emails),
+        'user_data': False
+    }
+
+def write_streamed_snapshot(output):
+    """Binary snapshot built from a streamed read, without the dict form in memory"""
+    table = ProspectTable.from_prospects(iter_prospect_file(output))
+    return write_prospect_snapshot(table, snapshot_path_for(output), output)
+
+
 def main():
-    print("🔄 Generating CRM sample data...")
+    parser = argparse.ArgumentParser(description="Generate filtered_crm_data.json")
+    parser.add_argument('--count', type=int,
+                        help="generate a synthetic book of this many prospects instead of the sample data")
+    parser.add_argument('--output', default='filtered_crm_data.json')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--category-mix', type=parse_category_mix,
+                        help="weighted categories, e.g. 'Food Processing=3,Construction=2'")
+    parser.add_argument('--relevant-emails', type=parse_range, default=(0, 3),
+                        help="relevant emails per prospect, LOW-HIGH (default: 0-3)")
+    parser.add_argument('--contacts', type=parse_range, default=(1, 3),
+                        help="contacts per prospect, LOW-HIGH (default: 1-3)")
+    parser.add_argument('--total-emails', type=parse_range, default=(2, 600),
+                        help="total emails per prospect, LOW-HIGH (default: 2-600)")
+    parser.add_argument('--user-data', choices=('sqlite', 'json'),
+                        help="also generate dashboard user data in this backend")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help="prospects per worker job (default: %(default)s)")
+    parser.add_argument('--now', type=int,
+                        help="epoch seconds the synthetic dates are relative to (default: current time)")
+    parser.add_argument('--no-snapshot', action='store_true', help="skip the binary snapshot")
+    parser.add_argument('--no-search-index', action='store_true', help="skip the full-text search index")
+    args = parser.parse_args()
+    
+    if args.count is None:
+        print("🔄 Generating CRM sample data...")
+        
+        # Create sample data
+        data = create_sample_data()
+        summary_stats = data['summary_stats']
+        
+        # Write to file
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2)
+        
+        snapshot_data = data['filtered_prospects']
+    else:
+        print(f"🔄 Generating synthetic CRM data with {args.count:,} prospects...")
+        settings = synthetic_settings(args.category_mix, args.relevant_emails, args.contacts, args.total_emails)
+        summary_stats = generate_synthetic_data(args.output, args.count, args.seed, settings,
+                                                args.workers, args.shard_size, args.user_data, args.now)
+        snapshot_data = None
     
-    # Create sample data
-    data = create_sample_data()
+    # Fast-loading binary copy for the automations (falls back to the JSON if stale)
+    snapshot_file = None
+    if not args.no_snapshot:
+        if snapshot_data is not None:
+            snapshot_file = write_prospect_snapshot(snapshot_data, snapshot_path_for(args.output), args.output)
+        else:
+            snapshot_file = write_streamed_snapshot(args.output)
     
-    # Write to file
-    with open('filtered_crm_data.json', 'w') as f:
-        json.dump(data, f, indent=2)
+    # Full-text index over names, email subjects and keywords, plus deep-intelligence.json next to the output
+    search_index_file = None
+    if not args.no_search_index:
+        intelligence_file = os.path.join(os.path.dirname(os.path.abspath(args.output)), INTELLIGENCE_FILE)
+        index = build_search_index(args.output, intelligence_file,
+                                   snapshot_data.items() if snapshot_data is not None else None)
+        search_index_file = index.write(search_index_path_for(args.output))
     
-    print(f"✅ Generated CRM data with {data['summary_stats']['total_prospects']} prospects")
-    print(f"📊 Categories: {data['summary_stats']['categories']}")
-    print(f"📧 Total emails: {data['summary_stats']['total_emails']:,}")
-    print(f"✨ Active prospects: {data['summary_stats']['active_prospects']}")
+    print(f"✅ Generated CRM data with {summary_stats['total_prospects']} prospects")
+    print(f"📊 Categories: {summary_stats['categories']}")
+    print(f"📧 Total emails: {summary_stats['total_emails']:,}")
+    print(f"✨ Active prospects: {summary_stats['active_prospects']}")
+    if snapshot_file:
+        print(f"⚡ Binary snapshot: {snapshot_file}")
+    if search_index_file:
+        print(f"🔎 Search index: {search_index_file}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -20,58 +20,71 @@ chmod +x crm-automations.py
 mkdir -p user_data
 echo "📁 Created user data directory"
 
-# Setup OpenClaw cron jobs for automations
+# Setup OpenClaw cron jobs for automations, unless the automation daemon
+# (CRM_DAEMON=1, see start-crm.sh) runs the same schedule itself
 echo ""
-echo "⏰ Setting up automated CRM tasks..."
-
-# Daily overdue check (9:00 AM)
-echo "Setting up daily overdue follow-up check..."
-openclaw cron create \
-    --name "crm_daily_overdue_check" \
-    --schedule "0 9 * * *" \
-    --command "cd $(pwd) && python3 crm-automations.py check-overdue" \
-    --description "Daily check for overdue CRM follow-ups"
-
-# Twice-daily score updates (10:00 AM and 3:00 PM)
-echo "Setting up automated lead scoring..."
-openclaw cron create \
-    --name "crm_score_update_morning" \
-    --schedule "0 10 * * *" \
-    --command "cd $(pwd) && python3 crm-automations.py update-scores" \
-    --description "Morning CRM lead score updates"
-
-openclaw cron create \
-    --name "crm_score_update_afternoon" \
-    --schedule "0 15 * * *" \
-    --command "cd $(pwd) && python3 crm-automations.py update-scores" \
-    --description "Afternoon CRM lead score updates"
-
-# Weekly pipeline automation (Monday 8:00 AM)
-echo "Setting up weekly pipeline automation..."
-openclaw cron create \
-    --name "crm_weekly_pipeline" \
-    --schedule "0 8 * * 1" \
-    --command "cd $(pwd) && python3 crm-automations.py pipeline-automation" \
-    --description "Weekly CRM pipeline automation"
-
-# Weekly report (Friday 5:00 PM)
-echo "Setting up weekly reporting..."
-openclaw cron create \
-    --name "crm_weekly_report" \
-    --schedule "0 17 * * 5" \
-    --command "cd $(pwd) && python3 crm-automations.py weekly-report" \
-    --description "Weekly CRM activity report"
-
-# Full automation check (Daily at 6:00 AM)
-echo "Setting up comprehensive daily automation..."
-openclaw cron create \
-    --name "crm_daily_full_automation" \
-    --schedule "0 6 * * *" \
-    --command "cd $(pwd) && python3 crm-automations.py full-automation" \
-    --description "Comprehensive daily CRM automation"
-
-echo ""
-echo "✅ CRM automation tasks created successfully!"
+if [ "${CRM_DAEMON:-0}" = "1" ]; then
+    echo "⏰ CRM_DAEMON=1: the automation daemon runs the schedule, skipping OpenClaw cron jobs"
+else
+    echo "⏰ Setting up automated CRM tasks..."
+
+    # Daily overdue check (9:00 AM)
+    echo "Setting up daily overdue follow-up check..."
+    openclaw cron create \
+        --name "crm_daily_overdue_check" \
+        --schedule "0 9 * * *" \
+        --command "cd $(pwd) && python3 crm-automations.py check-overdue" \
+        --description "Daily check for overdue CRM follow-ups"
+
+    # Twice-daily score updates (10:00 AM and 3:00 PM)
+    echo "Setting up automated lead scoring..."
+    openclaw cron create \
+        --name "crm_score_update_morning" \
+        --schedule "0 10 * * *" \
+        --command "cd $(pwd) && python3 crm-automations.py update-scores" \
+        --description "Morning CRM lead score updates"
+
+    openclaw cron create \
+        --name "crm_score_update_afternoon" \
+        --schedule "0 15 * * *" \
+        --command "cd $(pwd) && python3 crm-automations.py update-scores" \
+        --description "Afternoon CRM lead score updates"
+
+    # Weekly pipeline automation (Monday 8:00 AM)
+    echo "Setting up weekly pipeline automation..."
+    openclaw cron create \
+        --name "crm_weekly_pipeline" \
+        --schedule "0 8 * * 1" \
+        --command "cd $(pwd) && python3 crm-automations.py pipeline-automation" \
+        --description "Weekly CRM pipeline automation"
+
+    # Weekly report (Friday 5:00 PM)
+    echo "Setting up weekly reporting..."
+    openclaw cron create \
+        --name "crm_weekly_report" \
+        --schedule "0 17 * * 5" \
+        --command "cd $(pwd) && python3 crm-automations.py weekly-report" \
+        --description "Weekly CRM activity report"
+
+    # Full automation check (Daily at 6:00 AM)
+    echo "Setting up comprehensive daily automation..."
+    openclaw cron create \
+        --name "crm_daily_full_automation" \
+        --schedule "0 6 * * *" \
+        --command "cd $(pwd) && python3 crm-automations.py full-automation" \
+        --description "Comprehensive daily CRM automation"
+
+    # Change feed compaction (Daily at 2:00 AM)
+    echo "Setting up nightly change feed compaction..."
+    openclaw cron create \
+        --name "crm_change_feed_compaction" \
+        --schedule "0 2 * * *" \
+        --command "cd $(pwd) && python3 crm_automations.py compact-changes" \
+        --description "Drop old deletions from the CRM change feed"
+
+    echo ""
+    echo "✅ CRM automation tasks created successfully!"
+fi
 
 # Test the system
 echo ""
@@ -114,7 +127,8 @@ echo ""
 echo "2. 📱 Access your CRM dashboard:"
 echo "   http://localhost:8000/crm-system.html"
 echo ""
-echo "3. 🤖 Automation Schedule:"
+echo "3. 🤖 Automation Schedule (OpenClaw cron, or the daemon with CRM_DAEMON=1):"
+echo "   • Daily at 2:00 AM - Change feed compaction"
 echo "   • Daily at 6:00 AM - Full automation check"
 echo "   • Daily at 9:00 AM - Overdue follow-up alerts"
 echo "   • Daily at 10:00 AM & 3:00 PM - Lead score updates"
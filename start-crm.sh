@@ -12,10 +12,21 @@ if [ ! -d "user_data" ]; then
     echo ""
 fi
 
-# Check for updates and run quick automation
-echo "🔄 Running quick system check..."
-python3 crm-automations.py update-scores > /dev/null 2>&1
-echo "✅ System check complete"
+# CRM_DAEMON=1 runs the schedule in the automation daemon instead of OpenClaw
+# cron (setup-crm.sh then skips the cron jobs), so only one of them fires
+if [ "${CRM_DAEMON:-0}" = "1" ]; then
+    echo "🔄 Starting automation daemon..."
+    python3 crm_automations.py daemon > crm_daemon.log 2>&1 &
+    DAEMON_PID=$!
+    trap 'kill $DAEMON_PID 2>/dev/null' EXIT
+    echo "✅ Automation daemon running (log: crm_daemon.log)"
+    SCHEDULER="automation daemon"
+else
+    echo "🔄 Running quick system check..."
+    python3 crm_automations.py update-scores > /dev/null 2>&1
+    echo "✅ System check complete"
+    SCHEDULER="OpenClaw cron"
+fi
 
 echo ""
 echo "🌐 Starting CRM web server..."
@@ -31,9 +42,12 @@ echo "   • Email template generation"
 echo "   • Search and advanced filtering"
 echo "   • Data export capabilities"
 echo ""
-echo "🤖 Automation Status:"
+echo "🤖 Automation Status (scheduled by $SCHEDULER):"
+echo "   • Change feed compaction: Daily at 2:00 AM"
+echo "   • Full automation: Daily at 6:00 AM"
 echo "   • Overdue alerts: Daily at 9:00 AM"
 echo "   • Score updates: 10:00 AM & 3:00 PM daily"
+echo "   • Pipeline automation: Monday at 8:00 AM"
 echo "   • Weekly reports: Friday at 5:00 PM"
 echo ""
 echo "🛑 Press Ctrl+C to stop the server"
@@ -41,5 +55,5 @@ echo ""
 echo "Starting server in 3 seconds..."
 sleep 3
 
-# Start the web server
-python3 -m http.server 8000
\ No newline at end of file
+# Start the web server (static files plus the filtered/paginated prospect API)
+python3 crm_server.py --port 8000
\ No newline at end of file
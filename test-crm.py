@@ -6,8 +6,22 @@ Validates all CRM functionality and demonstrates key features
 
 import json
 import os
+import random
+import shutil
 import sys
-from datetime import datetime
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def make_test_workspace():
+    """Create a throwaway workspace holding a copy of the prospect data"""
+    workspace = tempfile.mkdtemp(prefix='crm_test_')
+    shutil.copy('filtered_crm_data.json', workspace)
+    return workspace
+
+def user_files(workspace):
+    """Per-company user data files (dot-files are temp files and indexes)"""
+    return [name for name in os.listdir(os.path.join(workspace, 'user_data')) if not name.startswith('.')]
 
 def test_data_loading():
     """Test CRM data loading functionality"""
@@ -128,6 +142,1642 @@ def test_automation_functions():
         print(f"❌ Automation test failed: {e}")
         return False
 
+def test_prospect_cache():
+    """Test that prospect data is parsed once and reloaded on change"""
+    print("🗂️  Testing prospect cache...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        cache = crm_automations.prospect_cache
+        crm = crm_automations.CRMAutomations(workspace)
+        misses = cache.misses
+        
+        first = crm.load_crm_data()
+        second = crm_automations.CRMAutomations(workspace).load_crm_data()
+        if first is not second or cache.misses != misses + 1:
+            print("❌ Prospect data was parsed more than once")
+            return False
+        print("✅ Repeated loads served from cache")
+        
+        # Touch the file with a new mtime and size - must reload
+        data_file = os.path.join(workspace, 'filtered_crm_data.json')
+        with open(data_file, 'r') as f:
+            data = json.load(f)
+        data['filtered_prospects'].pop(next(iter(data['filtered_prospects'])))
+        with open(data_file, 'w') as f:
+            json.dump(data, f)
+        os.utime(data_file, (time.time() + 5, time.time() + 5))
+        
+        reloaded = crm.load_crm_data()
+        if len(reloaded) != len(first) - 1:
+            print("❌ Cache did not pick up the changed file")
+            return False
+        print("✅ Cache invalidated after file change")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Prospect cache test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_sqlite_user_store():
+    """Test the SQLite user data store and migration from user_data/"""
+    print("🗄️  Testing SQLite user data store...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        # Seed the legacy per-company JSON layout
+        legacy = crm_automations.JsonDirUserDataStore(os.path.join(workspace, 'user_data'))
+        legacy.put('CTI Foods', {'status': 'hot', 'next_followup': '2026-01-01T09:00:00'})
+        legacy.put('PlanHub', {'status': 'warm', 'priority_tags': ['urgent']})
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        if crm.migrate_user_data() != 2:
+            print("❌ Migration did not import every company")
+            return False
+        
+        # A fresh instance should pick the database up automatically
+        crm = crm_automations.CRMAutomations(workspace)
+        if not isinstance(crm.user_store, crm_automations.SQLiteUserDataStore):
+            print("❌ user_data.db was not selected after migration")
+            return False
+        
+        crm.save_many_user_data({'PlanHub': {'status': 'hot'}, 'Monogram Foods': {'status': 'new'}})
+        records = crm.get_many_user_data(['CTI Foods', 'PlanHub', 'Monogram Foods', 'Missing Co'])
+        expected = {
+            'CTI Foods': {'status': 'hot', 'next_followup': '2026-01-01T09:00:00'},
+            'PlanHub': {'status': 'hot'},
+            'Monogram Foods': {'status': 'new'},
+            'Missing Co': {}
+        }
+        if records != expected:
+            print(f"❌ Unexpected store contents: {records}")
+            return False
+        
+        print("✅ SQLite store read/write and migration successful")
+        crm.user_store.close()
+        return True
+        
+    except Exception as e:
+        print(f"❌ SQLite user store test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_unit_of_work():
+    """Test that automation writes are coalesced and flushed once"""
+    print("💾 Testing write coalescing...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.save_user_data('PlanHub', {'status': 'new', 'notes': 'call back'})
+        
+        with crm.unit_of_work() as unit:
+            crm.auto_score_update()
+            crm.pipeline_automation()
+            if user_files(workspace) != ['PlanHub.json']:
+                print("❌ User data was written before the end of the run")
+                return False
+        
+        planhub = crm.get_user_data('PlanHub')
+        if planhub.get('status') != 'warm' or planhub.get('notes') != 'call back':
+            print(f"❌ Unexpected flushed record: {planhub}")
+            return False
+        if unit.writes != len(user_files(workspace)):
+            print(f"❌ Expected one write per changed company, got {unit.writes}")
+            return False
+        print(f"✅ {unit.writes} companies flushed in a single commit")
+        
+        # Saving an identical record must not touch the file
+        user_file = os.path.join(workspace, 'user_data', 'PlanHub.json')
+        before = os.stat(user_file).st_mtime_ns
+        with crm.unit_of_work() as unit:
+            crm.save_user_data('PlanHub', dict(crm.get_user_data('PlanHub')))
+        if unit.writes != 0 or os.stat(user_file).st_mtime_ns != before:
+            print("❌ Unchanged record was rewritten")
+            return False
+        print("✅ Unchanged records skipped")
+        
+        # A corrupt record is skipped (and left as-is) instead of failing the whole flush
+        corrupt_file = os.path.join(workspace, 'user_data', 'CTI Foods.json')
+        with open(corrupt_file, 'w') as f:
+            f.write('{bad')
+        with crm.unit_of_work() as unit:
+            crm.save_user_data('CTI Foods', {'status': 'hot'})
+            crm.save_user_data('PlanHub', dict(crm.get_user_data('PlanHub'), notes='corrupt neighbour'))
+        with open(corrupt_file) as f:
+            corrupt = f.read()
+        if unit.writes != 1 or crm.get_user_data('PlanHub').get('notes') != 'corrupt neighbour' or corrupt != '{bad':
+            print("❌ A corrupt user file blocked or clobbered the flush")
+            return False
+        print("✅ Corrupt record skipped, the rest flushed")
+        
+        leftovers = [name for name in os.listdir(os.path.join(workspace, 'user_data')) if name.startswith('.tmp-')]
+        if leftovers:
+            print(f"❌ Temporary files left behind: {leftovers}")
+            return False
+        return True
+        
+    except Exception as e:
+        print(f"❌ Write coalescing test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_fused_full_automation():
+    """Test that the single-pass engine matches the three separate passes"""
+    print("🔀 Testing fused full automation...")
+    
+    workspaces = [make_test_workspace(), make_test_workspace()]
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        seed = {
+            'CTI Foods': {'status': 'cold', 'last_contacted': datetime.now().isoformat()},
+            'PlanHub': {'status': 'new', 'priority_tags': ['urgent', 'large_project']},
+            'Business Company 07': {'status': 'warm', 'custom_score': 120}
+        }
+        three_pass, fused = [crm_automations.CRMAutomations(w) for w in workspaces]
+        for crm in (three_pass, fused):
+            crm.save_many_user_data(seed)
+        
+        with three_pass.unit_of_work():
+            expected_overdue = three_pass.check_overdue_followups()
+            expected_scores = three_pass.auto_score_update()
+            expected_pipeline = three_pass.pipeline_automation()
+        result = fused.run_full_automation()
+        
+        if (result['overdue'], result['score_updates'], result['pipeline_updates']) != \
+                (expected_overdue, expected_scores, expected_pipeline):
+            print("❌ Fused engine counts differ from the three-pass run")
+            return False
+        
+        # Timestamps differ between runs; everything else must be identical
+        volatile = ('score_updated', 'status_auto_updated')
+        prospects = three_pass.load_crm_data()
+        expected = three_pass.get_many_user_data(prospects)
+        actual = fused.get_many_user_data(prospects)
+        for records in (expected, actual):
+            for record in records.values():
+                for key in volatile:
+                    record.pop(key, None)
+        if expected != actual:
+            print("❌ Fused engine saved different user data")
+            return False
+        
+        print(f"✅ Fused engine matches ({expected_scores} score, {expected_pipeline} pipeline updates)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Fused automation test failed: {e}")
+        return False
+    finally:
+        for workspace in workspaces:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+def test_batch_scoring_parity():
+    """Test that batch scoring matches calculate_auto_score exactly"""
+    print("🧮 Testing batch lead scoring parity...")
+    
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        if crm_automations.np is None:
+            print("⚠️  NumPy not installed - checking the scalar fallback only")
+        
+        rng = random.Random(42)
+        now = datetime.now()
+        categories = crm_automations.HIGH_VALUE_CATEGORIES + ['Business Prospect', 'Service Provider', None]
+        prospects = {}
+        user_records = {}
+        
+        for i in range(2000):
+            latest = rng.choice([
+                None, '', 'not a date',
+                (now - timedelta(days=rng.randint(-3, 200), hours=rng.randint(0, 23))).isoformat(),
+                (now - timedelta(days=rng.randint(0, 200))).isoformat() + '+00:00'
+            ])
+            prospects[f"Company {i}"] = {
+                'overall_score': rng.randint(0, 600),
+                'business_score': rng.randint(0, 30),
+                'conversation_score': rng.randint(0, 12),
+                'category': rng.choice(categories),
+                'latest_contact': latest
+            }
+            if rng.random() < 0.8:
+                user_records[f"Company {i}"] = {
+                    'status': rng.choice(['hot', 'warm', 'new', 'cold', 'archived']),
+                    'priority_tags': ['urgent'] * rng.randint(0, 4)
+                }
+        
+        batch = crm_automations.batch_auto_scores(prospects, user_records, now)
+        for company_name, prospect in prospects.items():
+            expected = crm_automations.calculate_auto_score(prospect, user_records.get(company_name, {}), now)
+            if batch[company_name] != expected or type(batch[company_name]) is not type(expected):
+                print(f"❌ {company_name}: batch {batch[company_name]!r} != scalar {expected!r}")
+                return False
+        
+        print(f"✅ Batch scores match the scalar function for {len(prospects)} prospects")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batch scoring test failed: {e}")
+        return False
+
+def test_prospect_table():
+    """Test the compact columnar prospect representation"""
+    print("🧱 Testing compact prospect table...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        with open('filtered_crm_data.json', 'r') as f:
+            prospects = json.load(f)['filtered_prospects']
+        
+        # Odd values must survive the round-trip too
+        prospects['Odd Co'] = {'overall_score': 12.5, 'category': None, 'notes': 'extra field'}
+        table = crm_automations.ProspectTable.from_prospects(prospects)
+        
+        for company_name, prospect in prospects.items():
+            record = table[company_name]
+            if dict(record) != prospect:
+                print(f"❌ {company_name} does not round-trip through the table")
+                return False
+        print(f"✅ {len(table)} prospects round-trip through the table")
+        
+        now = datetime.now()
+        if crm_automations.batch_auto_scores(table, {}, now) != crm_automations.batch_auto_scores(prospects, {}, now):
+            print("❌ Scores differ between the table and the dict")
+            return False
+        print("✅ Batch scoring reads the table directly")
+        
+        # Row-range slices stay tables, with re-numbered rows and extras
+        names = list(prospects)
+        for start, stop in ((0, 10), (50, len(names)), (len(names) - 1, len(names) + 5)):
+            part = table.slice(start, stop)
+            if not isinstance(part, crm_automations.ProspectTable) or list(part) != names[start:stop] or \
+                    {name: dict(record) for name, record in part.items()} != \
+                    {name: prospects[name] for name in names[start:stop]} or \
+                    crm_automations.batch_auto_scores(part, {}, now) != \
+                    {name: score for name, score in crm_automations.batch_auto_scores(table, {}, now).items()
+                     if name in part}:
+                print(f"❌ Table slice {start}:{stop} differs from the table")
+                return False
+        
+        compact = crm_automations.CRMAutomations(workspace, compact=True)
+        if not isinstance(compact.load_crm_data(), crm_automations.ProspectTable):
+            print("❌ compact=True did not load a ProspectTable")
+            return False
+        if not all(isinstance(batch, crm_automations.ProspectTable)
+                   for batch, _ in compact._read_prospect_batches(10)):
+            print("❌ Automation batches lost the columnar layout")
+            return False
+        result = compact.run_full_automation()
+        print(f"✅ Full automation runs on the table ({result['score_updates']} score updates)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Prospect table test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_streaming_reader():
+    """Test the streaming prospect reader and streamed automation runs"""
+    print("🌊 Testing streaming prospect reader...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        with open('filtered_crm_data.json', 'r') as f:
+            expected = list(json.load(f)['filtered_prospects'].items())
+        
+        # A tiny chunk size forces values to straddle chunk boundaries
+        for chunk_size in (7, 1 << 16):
+            streamed = list(crm_automations.iter_prospect_file('filtered_crm_data.json', chunk_size))
+            if streamed != expected:
+                print(f"❌ Streamed prospects differ (chunk size {chunk_size})")
+                return False
+        print(f"✅ Streamed {len(expected)} prospects identical to json.load")
+        
+        crm = crm_automations.CRMAutomations(workspace, stream=True)
+        batches = list(crm.iter_prospect_batches(batch_size=10))
+        if [len(prospects) for prospects, _ in batches] != [10] * 5 + [len(expected) - 50]:
+            print("❌ Streamed batches have unexpected sizes")
+            return False
+        
+        loaded = crm_automations.CRMAutomations(make_test_workspace())
+        if crm.run_full_automation()['score_updates'] != loaded.run_full_automation()['score_updates']:
+            print("❌ Streamed run differs from the in-memory run")
+            return False
+        shutil.rmtree(loaded.workspace_dir, ignore_errors=True)
+        print("✅ Automations consume the stream in batches")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Streaming reader test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_binary_snapshot():
+    """Test the binary prospect snapshot and its JSON fallback"""
+    print("⚡ Testing binary prospect snapshot...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        expected = crm.load_crm_data()
+        crm.build_snapshot()
+        
+        snapshot = crm.load_crm_data()
+        if not isinstance(snapshot, crm_automations.ProspectTable) or snapshot.snapshot_source is None:
+            print("❌ load_crm_data did not use the snapshot")
+            return False
+        if {name: dict(record) for name, record in snapshot.items()} != expected:
+            print("❌ Snapshot contents differ from the JSON export")
+            return False
+        batches = [batch for batch, _ in crm._read_prospect_batches(20)]
+        if not all(isinstance(batch, crm_automations.ProspectTable) for batch in batches) or \
+                {name: dict(record) for batch in batches for name, record in batch.items()} != expected:
+            print("❌ Snapshot batches differ from the JSON export")
+            return False
+        print(f"✅ Snapshot of {len(snapshot)} prospects matches the JSON")
+        
+        # A rewritten export makes the snapshot stale
+        data_file = os.path.join(workspace, 'filtered_crm_data.json')
+        os.utime(data_file, (time.time() + 5, time.time() + 5))
+        if isinstance(crm.load_crm_data(), crm_automations.ProspectTable):
+            print("❌ Stale snapshot was used")
+            return False
+        
+        # So does a snapshot from another format version
+        crm.build_snapshot()
+        with open(crm.snapshot_file, 'r+b') as f:
+            f.seek(8)
+            f.write((crm_automations.SNAPSHOT_VERSION + 1).to_bytes(4, 'little'))
+        crm_automations.prospect_cache.invalidate(crm.snapshot_file)
+        if crm.load_crm_data() != expected:
+            print("❌ Did not fall back to JSON for an unknown snapshot version")
+            return False
+        print("✅ Falls back to JSON when the snapshot is stale or incompatible")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Snapshot test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_incremental_rescoring():
+    """Test that only prospects with changed score inputs are re-scored"""
+    print("⏭️  Testing incremental re-scoring...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        total = len(crm.load_crm_data())
+        crm.auto_score_update()
+        if crm.last_score_skipped != 0:
+            print("❌ First run skipped prospects without fingerprints")
+            return False
+        
+        # Prospects whose score did not move get no user record (and so no
+        # fingerprint); everything that has one is skipped from now on
+        recorded = len(user_files(workspace))
+        if recorded == total or recorded != len([name for name, record in
+                                                 crm.get_many_user_data(crm.load_crm_data()).items() if record]):
+            print("❌ User records written for prospects whose score did not change")
+            return False
+        
+        crm.auto_score_update()
+        if crm.last_score_skipped != recorded:
+            print(f"❌ Second run re-scored {recorded - crm.last_score_skipped} unchanged prospects")
+            return False
+        print(f"✅ Unchanged prospects skipped ({recorded} of {total}; no records created for the rest)")
+        
+        user_data = crm.get_user_data('Business Company 01')
+        user_data['status'] = 'hot'
+        crm.save_user_data('Business Company 01', user_data)
+        if crm.auto_score_update() != 1 or crm.last_score_skipped != total - 1:
+            print("❌ Changed prospect was not the only one re-scored")
+            return False
+        print("✅ Only the changed prospect was re-scored")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Incremental re-scoring test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_timestamp_normalization():
+    """Test that mixed naive/aware timestamps are compared consistently"""
+    print("🕒 Testing timestamp normalization...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        if crm_automations.to_epoch('2026-02-13T14:30:00Z') != crm_automations.to_epoch('2026-02-13T14:30:00+00:00'):
+            print("❌ 'Z' and '+00:00' parse differently")
+            return False
+        
+        now = datetime.now()
+        crm = crm_automations.CRMAutomations(workspace)
+        user_data = {'next_followup': (now - timedelta(days=3)).astimezone().isoformat()}
+        entry = crm._overdue_entry('PlanHub', user_data, crm_automations.epoch_now(now))
+        if not entry or entry['days_overdue'] != 3:
+            print(f"❌ Aware follow-up date not handled: {entry}")
+            return False
+        
+        prospect = {'overall_score': 0, 'latest_contact': (now - timedelta(days=2)).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        prospect_ts = dict(prospect, latest_contact_ts=crm_automations.to_epoch(prospect['latest_contact']))
+        if not (crm.calculate_auto_score(prospect, {}, now) == crm.calculate_auto_score(prospect_ts, {}, now) == 50):
+            print("❌ Recency bonus not applied to a UTC contact date")
+            return False
+        
+        print("✅ Naive and aware timestamps normalized to epoch seconds")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Timestamp normalization test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_followup_index():
+    """Test the due-date index behind overdue and due-soon queries"""
+    print("📅 Testing follow-up due-date index...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        now = datetime.now()
+        followups = {
+            'CTI Foods': {'next_followup': (now - timedelta(days=4)).isoformat()},
+            'PlanHub': {'next_followup': (now - timedelta(hours=2)).astimezone().isoformat()},
+            'Monogram Foods': {'next_followup': (now + timedelta(hours=5)).isoformat()},
+            'BuildingConnected': {'next_followup': (now + timedelta(days=3)).isoformat()},
+            'Not A Prospect': {'next_followup': (now - timedelta(days=1)).isoformat()}
+        }
+        
+        for backend in ('json', 'sqlite'):
+            store = crm_automations.open_user_data_store(workspace, backend)
+            crm = crm_automations.CRMAutomations(workspace, user_store=store)
+            crm.save_many_user_data(followups)
+            
+            overdue = [company for _, company in crm.overdue_followups(now)]
+            due_soon = [company for _, company in crm.followups_due_within(24, now)]
+            if overdue != ['CTI Foods', 'PlanHub'] or due_soon != ['Monogram Foods']:
+                print(f"❌ {backend}: overdue={overdue} due_soon={due_soon}")
+                return False
+            
+            # Clearing a follow-up must drop it from the index
+            crm.save_user_data('PlanHub', {'status': 'warm'})
+            if [company for _, company in crm.overdue_followups(now)] != ['CTI Foods']:
+                print(f"❌ {backend}: index not updated on save")
+                return False
+            store.close()
+        
+        # The JSON store's index persists and is reloaded, not rebuilt
+        user_dir = os.path.join(workspace, 'user_data')
+        rebuilds = []
+        
+        def reopen():
+            store = crm_automations.JsonDirUserDataStore(user_dir)
+            rebuild = store._rebuild_followup_index
+            store._rebuild_followup_index = lambda index: rebuilds.append(1) or rebuild(index)
+            return [company for _, company in store.followups_due_before(crm_automations.epoch_now(now))]
+        
+        if reopen() != ['CTI Foods', 'Not A Prospect'] or rebuilds:
+            print("❌ Persisted follow-up index did not reload")
+            return False
+        
+        # Files written or edited around the store no longer match the stamp
+        with open(os.path.join(user_dir, 'Hand Edited Co.json'), 'w') as f:
+            json.dump({'next_followup': (now - timedelta(days=2)).isoformat()}, f)
+        if reopen() != ['CTI Foods', 'Hand Edited Co', 'Not A Prospect'] or len(rebuilds) != 1:
+            print("❌ Follow-up in a hand-written file was missed")
+            return False
+        with open(os.path.join(user_dir, 'CTI Foods.json'), 'w') as f:
+            json.dump({'status': 'hot'}, f)
+        if reopen() != ['Hand Edited Co', 'Not A Prospect'] or len(rebuilds) != 2:
+            print("❌ Follow-up cleared by an in-place edit is still indexed")
+            return False
+        store = crm_automations.JsonDirUserDataStore(user_dir)
+        if store.rebuild_followup_index() != len(store.followups_due_between(0, float('inf'))):
+            print("❌ rebuild-followup-index did not rescan the files")
+            return False
+        
+        print("✅ Overdue and due-soon queries served from the index (JSON and SQLite)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Follow-up index test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+FAKE_OPENCLAW = """#!/usr/bin/env python3
+import json, os, sys, time
+log_dir = os.path.dirname(os.path.abspath(__file__))
+args = sys.argv[1:]
+joined = ' '.join(args)
+time.sleep(0.2)
+with open(os.path.join(log_dir, 'calls.jsonl'), 'a') as f:
+    f.write(json.dumps(args) + '\\n')
+if 'broken' in joined:
+    sys.exit('permanent failure')
+if 'flaky' in joined:
+    marker = os.path.join(log_dir, 'flaky_seen')
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        sys.exit('transient failure')
+"""
+
+def make_fake_openclaw(directory):
+    """Write a fake openclaw executable that logs calls and fails on request"""
+    path = os.path.join(directory, 'openclaw')
+    with open(path, 'w') as f:
+        f.write(FAKE_OPENCLAW)
+    os.chmod(path, 0o755)
+    return path
+
+def test_openclaw_dispatch():
+    """Test pooled openclaw dispatch with retries and spooling, using a fake binary"""
+    print("📮 Testing openclaw dispatch queue...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.dispatcher.binary = make_fake_openclaw(workspace)
+        crm.dispatcher.backoff = 0.01
+        
+        when = (datetime.now() + timedelta(days=1)).isoformat()
+        reminders = [(f"Company {i}", {'id': i, 'type': 'phone_call', 'datetime': when}) for i in range(8)]
+        reminders += [("flaky Co", {'id': 'f', 'type': 'email', 'datetime': when}),
+                      ("broken Co", {'id': 'b', 'type': 'email', 'datetime': when})]
+        
+        start = time.time()
+        created = crm.create_followup_reminders(reminders)
+        elapsed = time.time() - start
+        
+        if created != 9:
+            print(f"❌ Expected 9 reminders created, got {created}")
+            return False
+        # 10 calls of 0.2s each must overlap in the pool rather than run back to back
+        if elapsed > 2.0:
+            print(f"❌ Dispatch was not concurrent ({elapsed:.2f}s)")
+            return False
+        
+        with open(os.path.join(workspace, 'calls.jsonl')) as f:
+            calls = [json.loads(line) for line in f]
+        if sum(1 for args in calls if 'crm_followup_flaky Co_f' in args) != 2:
+            print("❌ Transient failure was not retried")
+            return False
+        
+        spooled = crm.dispatcher.spooled()
+        if [entry['label'] for entry in spooled] != ['broken Co'] or 'permanent failure' not in spooled[0]['error']:
+            print(f"❌ Unexpected spool contents: {spooled}")
+            return False
+        
+        # Once the failure clears, flushing the spool delivers the call and empties it
+        with open(crm.dispatcher.binary, 'w') as f:
+            f.write(FAKE_OPENCLAW.replace("'broken' in joined", "False"))
+        if crm.retry_spooled_messages() != 1 or crm.dispatcher.spooled():
+            print("❌ Spooled call was not delivered on retry")
+            return False
+        
+        # A missing executable is spooled straight away instead of retried
+        crm.dispatcher.binary = os.path.join(workspace, 'no-such-openclaw')
+        if crm.dispatcher.send(["message", "send", "--message", "hi"]) or len(crm.dispatcher.spooled()) != 1:
+            print("❌ Missing executable was not spooled")
+            return False
+        
+        print(f"✅ 10 reminders dispatched in {elapsed:.2f}s; retry and spool behave")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Openclaw dispatch test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_async_runtime():
+    """Test the asyncio runtime against the blocking automation passes"""
+    print("⚡ Testing asyncio automation runtime...")
+    
+    workspaces = [make_test_workspace(), make_test_workspace()]
+    try:
+        sys.path.append('.')
+        import asyncio
+        import crm_automations
+        
+        seed = {
+            'CTI Foods': {'status': 'cold', 'last_contacted': datetime.now().isoformat(),
+                          'next_followup': (datetime.now() - timedelta(days=2)).isoformat()},
+            'PlanHub': {'status': 'new', 'priority_tags': ['urgent', 'large_project']}
+        }
+        blocking, concurrent = [crm_automations.CRMAutomations(w, stream=True) for w in workspaces]
+        for crm in (blocking, concurrent):
+            crm.save_many_user_data(seed)
+            crm.dispatcher.binary = make_fake_openclaw(crm.workspace_dir)
+        
+        expected = blocking.run_full_automation()
+        
+        # Read-ahead batches hold the same prospects and user data as the blocking iterator
+        async def collect_batches():
+            return [(dict(prospects), user_records)
+                    async for prospects, user_records in concurrent.aiter_prospect_batches(batch_size=7)]
+        batches = asyncio.run(collect_batches())
+        if batches != [(dict(prospects), user_records)
+                       for prospects, user_records in concurrent.iter_prospect_batches(batch_size=7)]:
+            print("❌ Async batches differ from iter_prospect_batches()")
+            return False
+        
+        actual = asyncio.run(concurrent.run_full_automation_async())
+        
+        if [entry['company'] for entry in actual['overdue']] != ['CTI Foods'] or \
+                {key: actual[key] for key in ('score_updates', 'pipeline_updates')} != \
+                {key: expected[key] for key in ('score_updates', 'pipeline_updates')}:
+            print("❌ Async run differs from the blocking run")
+            return False
+        
+        volatile = ('score_updated', 'status_auto_updated')
+        names = blocking.load_crm_data().keys()
+        records = [crm.get_many_user_data(names) for crm in (blocking, concurrent)]
+        for batch in records:
+            for record in batch.values():
+                for key in volatile:
+                    record.pop(key, None)
+        if records[0] != records[1]:
+            print("❌ Async run saved different user data")
+            return False
+        
+        # The semaphore caps in-flight openclaw calls at max_workers
+        dispatcher = concurrent.dispatcher
+        dispatcher.max_workers = 2
+        for i in range(4):
+            dispatcher.submit(["message", "send", "--message", f"ping {i}"])
+        start = time.time()
+        results = dispatcher.flush()
+        elapsed = time.time() - start
+        if not all(result['ok'] for result in results) or elapsed < 0.4:
+            print(f"❌ In-flight cap not respected ({elapsed:.2f}s for 4 calls, 2 at a time)")
+            return False
+        
+        print("✅ Async runtime matches the blocking passes; in-flight calls capped")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Async runtime test failed: {e}")
+        return False
+    finally:
+        for workspace in workspaces:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+def test_automation_daemon():
+    """Test the long-running daemon: schedule maths, change-triggered scoring and the control socket"""
+    print("🛰️  Testing automation daemon...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import asyncio
+        import threading
+        import crm_automations
+        
+        # Friday 17:00 seen from Wednesday noon is two days ahead; a passed slot rolls to next week
+        wednesday = datetime(2026, 10, 14, 12, 0)
+        if crm_automations.next_scheduled_run(17, 0, 4, wednesday) != datetime(2026, 10, 16, 17, 0).timestamp() or \
+                crm_automations.next_scheduled_run(9, 0, 2, wednesday) != datetime(2026, 10, 21, 9, 0).timestamp():
+            print("❌ next_scheduled_run() picked the wrong time")
+            return False
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.dispatcher.binary = make_fake_openclaw(workspace)
+        daemon = crm_automations.AutomationDaemon(crm, poll_interval=0.05)
+        thread = threading.Thread(target=asyncio.run, args=(daemon.serve(),))
+        thread.start()
+        
+        def wait_for(condition, timeout=5):
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                if condition():
+                    return True
+                time.sleep(0.05)
+            return False
+        
+        try:
+            if not wait_for(lambda: 'update-scores' in daemon.last_runs):
+                print("❌ Daemon did not score on startup")
+                return False
+            
+            # A write from another process is picked up and re-scored within seconds
+            writer = crm_automations.CRMAutomations(workspace)
+            writer.save_user_data('PlanHub', {'status': 'hot', 'priority_tags': ['urgent']})
+            if not wait_for(lambda: writer.get_user_data('PlanHub').get('score_fingerprint')):
+                print("❌ Changed user data was not re-scored")
+                return False
+            
+            status = crm_automations.send_daemon_command(daemon.socket_path, 'status')
+            if not status['ok'] or set(status['result']['next_runs']) != \
+                    {name for name, *_ in crm_automations.DAEMON_SCHEDULE}:
+                print(f"❌ Unexpected status response: {status}")
+                return False
+            
+            # Prospect data stays warm: on-demand runs are served from the cache
+            misses = crm_automations.prospect_cache.stats()['misses']
+            response = crm_automations.send_daemon_command(daemon.socket_path, 'update-scores')
+            if not response['ok'] or crm_automations.prospect_cache.stats()['misses'] != misses:
+                print(f"❌ On-demand run reloaded data or failed: {response}")
+                return False
+            
+            if crm_automations.send_daemon_command(daemon.socket_path, 'no-such-job')['ok']:
+                print("❌ Unknown command was accepted")
+                return False
+        finally:
+            crm_automations.send_daemon_command(daemon.socket_path, 'stop')
+            thread.join(timeout=10)
+        
+        if thread.is_alive() or os.path.exists(daemon.socket_path):
+            print("❌ Daemon did not shut down cleanly")
+            return False
+        
+        print("✅ Daemon scored on change, answered the control socket and stopped cleanly")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Automation daemon test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_benchmark_suite():
+    """Smoke-test the benchmark suite on a tiny synthetic book"""
+    print("⏱️  Testing benchmark suite...")
+    
+    workspace = tempfile.mkdtemp(prefix='crm_test_')
+    try:
+        import subprocess
+        output = os.path.join(workspace, 'results.json')
+        subprocess.run([sys.executable, 'benchmark-crm.py', '--sizes', '50', '--output', output,
+                        '--workdir', workspace], check=True, stdout=subprocess.DEVNULL)
+        
+        with open(output, 'r') as f:
+            report = json.load(f)
+        results = {entry['automation']: entry for entry in report['results']}
+        expected = ['load', 'check-overdue', 'update-scores', 'update-scores-incremental',
+                    'pipeline-automation', 'weekly-report']
+        if list(results) != expected or any(entry['size'] != 50 for entry in results.values()):
+            print(f"❌ Unexpected benchmark entries: {list(results)}")
+            return False
+        if results['load']['result'] != 50 or not all(entry['peak_rss_kb'] > 0 for entry in results.values()):
+            print("❌ Benchmark measurements look wrong")
+            return False
+        # Synthetic workspaces are cleaned up unless --keep is given
+        if os.listdir(workspace) != ['results.json']:
+            print(f"❌ Benchmark left files behind: {os.listdir(workspace)}")
+            return False
+        
+        print(f"✅ Benchmarked {len(results)} automations; full update-scores took {results['update-scores']['seconds']:.3f}s")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Benchmark suite test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_synthetic_generator():
+    """Test sharded synthetic data generation against a recount of its output"""
+    print("🏭 Testing synthetic data generator...")
+    
+    workspace = tempfile.mkdtemp(prefix='crm_test_')
+    try:
+        import subprocess
+        sys.path.append('.')
+        import crm_automations
+        
+        books = {}
+        for workers in (1, 3):
+            output = os.path.join(workspace, f'book_{workers}.json')
+            subprocess.run([sys.executable, 'generate-data.py', '--count', '500', '--shard-size', '120',
+                            '--workers', str(workers), '--seed', '7', '--now', '1790000000', '--category-mix', 'Construction=1,Food Processing=1',
+                            '--relevant-emails', '1-2', '--output', output, '--no-snapshot'],
+                           check=True, stdout=subprocess.DEVNULL)
+            with open(output, 'r') as f:
+                books[workers] = json.load(f)
+        
+        # Shards are seeded individually, so the worker count does not change the book
+        if books[1]['filtered_prospects'] != books[3]['filtered_prospects']:
+            print("❌ Output depends on the number of workers")
+            return False
+        
+        prospects = books[3]['filtered_prospects']
+        stats = books[3]['summary_stats']
+        categories = {}
+        for prospect in prospects.values():
+            categories[prospect['category']] = categories.get(prospect['category'], 0) + 1
+        if len(prospects) != 500 or stats['total_prospects'] != 500 or stats['categories'] != categories or \
+                stats['total_emails'] != sum(p['total_emails'] for p in prospects.values()):
+            print(f"❌ summary_stats do not match the prospects: {stats}")
+            return False
+        if set(categories) != {'Construction', 'Food Processing'} or \
+                not all(1 <= len(p['relevant_emails']) <= 2 for p in prospects.values()):
+            print("❌ Category mix or email distribution ignored")
+            return False
+        
+        # Generated books with user data are usable by the automations as-is
+        subprocess.run([sys.executable, 'generate-data.py', '--count', '300', '--user-data', 'sqlite',
+                        '--output', os.path.join(workspace, 'filtered_crm_data.json')],
+                       check=True, stdout=subprocess.DEVNULL)
+        crm = crm_automations.CRMAutomations(workspace)
+        if len(crm.user_store.companies()) != 300 or len(crm.load_snapshot() or ()) != 300 or \
+                len(crm.load_search_index()) != 300 or crm.load_search_index()._buffer is None:
+            print("❌ Generated user data, snapshot or search index missing")
+            return False
+        
+        print(f"✅ Generated 500 prospects identically on 1 and 3 workers; {stats['active_prospects']} active")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Synthetic generator test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_automation_metrics():
+    """Test per-phase timers, counters and the JSON/Prometheus metrics dumps"""
+    print("📏 Testing automation metrics...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        crm = crm_automations.CRMAutomations(workspace, user_store=crm_automations.JsonDirUserDataStore(
+            os.path.join(workspace, 'user_data')))
+        crm.dispatcher.binary = make_fake_openclaw(workspace)
+        crm.save_user_data('CTI Foods', {'next_followup': (datetime.now() - timedelta(days=1)).isoformat()})
+        crm_automations.prospect_cache.invalidate()
+        prospect_count = len(crm_automations.prospect_cache.get(crm.data_file, crm_automations._parse_prospect_file))
+        crm_automations.prospect_cache.invalidate()
+        
+        with crm.instrumented('full-automation', profile=True):
+            crm.run_full_automation()
+        last_run = crm.metrics.last_run
+        
+        counters = last_run['counters']
+        if counters.get('prospects_scanned') != prospect_count or counters.get('subprocesses_spawned') != 1 or \
+                counters.get('user_records_read', 0) < prospect_count or counters.get('files_read', 0) < 2 or \
+                counters.get('bytes_parsed') != os.path.getsize(crm.data_file):
+            print(f"❌ Unexpected run counters: {counters}")
+            return False
+        if not {'parse_prospects', 'user_data_read', 'scoring', 'openclaw'} <= set(last_run['phases']):
+            print(f"❌ Missing phases: {sorted(last_run['phases'])}")
+            return False
+        
+        with open(os.path.join(workspace, 'crm_metrics.json'), 'r') as f:
+            dumped = json.load(f)
+        with open(os.path.join(workspace, 'crm_metrics.prom'), 'r') as f:
+            prom = f.read()
+        if dumped['last_run']['command'] != 'full-automation' or \
+                'crm_phase_seconds_total{phase="scoring"}' not in prom or \
+                'crm_runs_total{command="full-automation"}' not in prom or \
+                not os.path.exists(os.path.join(workspace, 'crm_profile_full-automation.prof')):
+            print("❌ Metrics or profile files incomplete")
+            return False
+        
+        # Every sample line is "name{labels} value" or "name value"
+        for line in prom.splitlines():
+            if not line.startswith('#'):
+                float(line.rsplit(' ', 1)[1])
+        
+        print(f"✅ Run metrics recorded: {last_run['duration_seconds']:.3f}s over {len(last_run['phases'])} phases")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Automation metrics test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_api_server():
+    """Test the API server's filtering, paging, user data writes, gzip and ETags"""
+    print("🌐 Testing API server...")
+    
+    workspace = make_test_workspace()
+    shutil.copy('crm-system.html', workspace)
+    server = None
+    try:
+        sys.path.append('.')
+        import gzip
+        import threading
+        import urllib.error
+        import urllib.request
+        import crm_automations
+        import crm_server
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.save_many_user_data({
+            'CTI Foods': {'status': 'hot', 'next_followup': (datetime.now() - timedelta(days=3)).isoformat()},
+            'PlanHub': {'status': 'warm', 'notes': 'Asked about urethane cement'}
+        })
+        server = crm_server.make_server(crm, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        def get(path, headers=None):
+            return urllib.request.urlopen(urllib.request.Request(base + path, headers=headers or {}))
+        
+        def get_json(path):
+            return json.load(get(path))
+        
+        # Server-side ordering matches sorting the whole book by name
+        names = sorted(crm.load_crm_data().keys(), key=str.lower)
+        pages = [get_json(f"/api/prospects?sort=name&page_size=20&page={page}") for page in (1, 2, 3)]
+        if [item['name'] for page in pages for item in page['items']] != names or pages[0]['pages'] != 3:
+            print("❌ Pages do not cover the book in name order")
+            return False
+        
+        overdue = get_json("/api/prospects?view=followups")
+        searched = get_json("/api/prospects?search=URETHANE")
+        if [item['name'] for item in overdue['items']] != ['CTI Foods'] or \
+                [item['name'] for item in searched['items']] != ['PlanHub'] or \
+                get_json("/api/stats")['due'] != 1:
+            print("❌ Overdue view, search or stats wrong")
+            return False
+        
+        # Dashboard edits are saved to the user data store and show up in the next query
+        request = urllib.request.Request(base + "/api/user-data/PlanHub", method='POST',
+                                         data=json.dumps({'status': 'hot'}).encode('utf-8'))
+        json.load(urllib.request.urlopen(request))
+        hot = get_json("/api/prospects?view=hot&sort=name")
+        if [item['name'] for item in hot['items']] != ['CTI Foods', 'PlanHub'] or \
+                crm.user_store.get('PlanHub').get('notes') != 'Asked about urethane cement':
+            print("❌ User data update not applied")
+            return False
+        
+        response = get("/crm-system.html", {'Accept-Encoding': 'gzip'})
+        with open('crm-system.html', 'rb') as f:
+            if response.headers['Content-Encoding'] != 'gzip' or gzip.decompress(response.read()) != f.read():
+                print("❌ Static file not served gzipped")
+                return False
+        try:
+            get("/crm-system.html", {'If-None-Match': response.headers['ETag']})
+            print("❌ Matching ETag did not return 304")
+            return False
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+        
+        # Derived copies of the prospect data are as private as the user data
+        crm.build_snapshot()
+        crm.build_search_index()
+        crm.dashboard_aggregates()
+        derived = ["/" + os.path.basename(path) for path in (crm.snapshot_file, crm.search_index_file,
+                                                             crm.aggregates_file)]
+        for path in ["/user_data.db", "/api/prospects?sort=bogus", "/api/prospects/No%20Such%20Co"] + derived:
+            try:
+                get(path)
+                print(f"❌ {path} should have failed")
+                return False
+            except urllib.error.HTTPError:
+                pass
+        
+        print(f"✅ API served {len(names)} prospects in pages with filters, gzip and ETags")
+        return True
+        
+    except Exception as e:
+        print(f"❌ API server test failed: {e}")
+        return False
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_secondary_indexes():
+    """Test that indexed filters, range queries and top-K match a full scan"""
+    print("🗂️  Testing secondary indexes...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        rng = random.Random(19)
+        now = int(time.time())
+        categories = ['Food Processing', 'Construction', 'Industrial/Manufacturing', None]
+        prospects, user_records = {}, {}
+        for i in range(3000):
+            prospects[f"Company {i}"] = {
+                'category': rng.choice(categories),
+                'industry': rng.choice(['Bakery', 'Dairy', 'Concrete']),
+                'relationship_strength': rng.choice(['strong', 'medium', 'weak']),
+                'overall_score': rng.randint(0, 100),
+                'current_lead_score': rng.randint(0, 20),
+                'latest_contact_ts': rng.choice([None, now - rng.randint(0, 200) * 86400])
+            }
+            if rng.random() < 0.5:
+                user_records[f"Company {i}"] = {
+                    'status': rng.choice(['hot', 'warm', 'cold']),
+                    'next_followup': (datetime.now() + timedelta(days=rng.randint(-10, 10))).isoformat()
+                }
+        index = crm_automations.ProspectIndex.build(prospects, user_records, now)
+        names = index.names
+        
+        def scan(status, category, low, high, field):
+            rows = [row for row, name in enumerate(names)
+                    if (user_records.get(name) or {}).get('status') == status
+                    and prospects[name]['category'] == category
+                    and low <= prospects[name]['overall_score'] <= high]
+            return sorted(rows, key=lambda row: (-index.value(row, field), row))
+        
+        for status, category in (('hot', 'Construction'), ('cold', None), ('warm', 'Food Processing')):
+            mask = index.mask(status=status, category=category)
+            for low, high, field, offset in ((50, 100, 'current_lead_score', 0), (0, 10, 'overall_score', 5),
+                                             (0, 100, 'overall_score', 0), (30, 30, 'latest_contact', 0)):
+                expected = scan(status, category, low, high, field)
+                total, rows = index.query(mask, {'overall_score': (low, high)}, field, offset, 10)
+                if total != len(expected) or rows != expected[offset:offset + 10]:
+                    print(f"❌ Indexed query differs from a scan for {status}/{category}/{field}")
+                    return False
+        
+        by_score = sorted(range(len(names)), key=lambda row: (-prospects[names[row]]['overall_score'], row))
+        if index.top('overall_score', 25) != [names[row] for row in by_score[:25]] or \
+                index.query(index.mask(industry='Dairy'))[0] != sum(1 for p in prospects.values() if p['industry'] == 'Dairy'):
+            print("❌ Top-K or count differs from a scan")
+            return False
+        
+        def hot_by_score():
+            return index.query(order_by='custom_score', limit=40, equals={'status': 'hot'})[1]
+        
+        # Edits move a prospect between status bitmaps, follow-up positions and composite indexes
+        hot_by_score()
+        index.update_user_data('Company 7', {'status': 'hot', 'custom_score': 1000,
+                                             'next_followup': (datetime.now() - timedelta(days=30)).isoformat()})
+        total, overdue = index.query(ranges={'next_followup': (None, now - 1)}, order_by='next_followup', limit=1)
+        expected = sorted((row for row, name in enumerate(names) if index.value(row, 'status') == 'hot'),
+                          key=lambda row: (-index.value(row, 'custom_score'), row))[:40]
+        if names[overdue[0]] != 'Company 7' or hot_by_score() != expected or names[expected[0]] != 'Company 7':
+            print("❌ Index not updated after a user data edit")
+            return False
+        
+        # CRMAutomations keeps its index in step with saved user data
+        crm = crm_automations.CRMAutomations(workspace)
+        hot_before = crm.prospect_index().mask(status='hot').bit_count()
+        crm.save_user_data('CTI Foods', {'status': 'hot'})
+        if crm.prospect_index().mask(status='hot').bit_count() != hot_before + 1 or \
+                'Hot Leads: 1' not in crm.generate_weekly_report():
+            print("❌ Automation index not kept in step with saved user data")
+            return False
+        
+        print(f"✅ Indexed filters, ranges and top-K matched full scans over {len(names)} prospects")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Secondary index test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_search_index():
+    """Test the full-text search index: tokenizing, prefixes, ranking, the index file and the API"""
+    print("🔎 Testing full-text search index...")
+    
+    workspace = make_test_workspace()
+    shutil.copy('deep-intelligence.json', workspace)
+    server = None
+    try:
+        sys.path.append('.')
+        import threading
+        import urllib.request
+        import crm_automations
+        import crm_server
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        index = crm.load_search_index()
+        
+        # Every word must match, exactly or as a prefix; rarer and name matches rank higher
+        hits = index.search('epoxy quote')
+        prospects = crm.load_crm_data()
+        for hit in hits:
+            prospect = prospects.get(hit['name'], {})
+            words = set(crm_automations.tokenize(json.dumps(prospect.get('relevant_emails', []))))
+            if hit['sources'] == ['prospect'] and not ({'epoxy', 'quote'} <= words):
+                print(f"❌ {hit['name']} matched without both words")
+                return False
+        if not {hit['name'] for hit in index.search('floo', None)} >= {hit['name'] for hit in index.search('flooring', None)} or \
+                index.search('nosuchword') or index.search('   '):
+            print("❌ Prefix or empty-query matching wrong")
+            return False
+        
+        # Intelligence entries join the prospect whose contacts share their domain
+        cti = next(hit for hit in index.search('ctifoods') if hit['name'] == 'CTI Foods')
+        if cti['sources'] != ['prospect', 'intelligence'] or not index.search('get back'):
+            print(f"❌ Deep-intelligence text not indexed: {cti}")
+            return False
+        
+        # The index file round-trips and is used while it matches the data files
+        crm.build_search_index()
+        reopened = crm_automations.CRMAutomations(workspace).load_search_index()
+        if reopened._buffer is None or reopened.search('flooring') != index.search('flooring'):
+            print("❌ Search index file differs from the in-memory index")
+            return False
+        with open(os.path.join(workspace, 'filtered_crm_data.json'), 'r') as f:
+            data = json.load(f)
+        data['filtered_prospects']['Zeta Epoxy Works'] = {'category': 'Construction', 'relevant_emails': []}
+        with open(os.path.join(workspace, 'filtered_crm_data.json'), 'w') as f:
+            json.dump(data, f)
+        if [hit['name'] for hit in crm.load_search_index().search('zeta')] != ['Zeta Epoxy Works']:
+            print("❌ Stale search index file was used")
+            return False
+        
+        server = crm_server.make_server(crm, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        searched = json.load(urllib.request.urlopen(base + "/api/search?q=ctifoods&limit=5"))
+        filtered = json.load(urllib.request.urlopen(base + "/api/prospects?search=flooring&sort=name"))
+        expected = sorted((hit['name'] for hit in index.search('flooring', None) if 'prospect' in hit['sources']),
+                          key=str.lower)
+        if searched['items'][0]['name'] != 'CTI Foods' or not searched['items'][0]['in_book'] or \
+                [item['name'] for item in filtered['items']] != expected:
+            print("❌ API search results wrong")
+            return False
+        
+        print(f"✅ Indexed {len(index.terms)} words across {len(index)} companies; search ranks and filters")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Search index test failed: {e}")
+        return False
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_dashboard_aggregates():
+    """Test that materialized aggregates match a full scan and follow every write path"""
+    print("📈 Testing dashboard aggregates...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        
+        def scan(crm):
+            prospects = crm.load_crm_data()
+            records = crm.user_store.get_many(prospects.keys())
+            statuses, categories = {}, {}
+            for company_name, prospect in prospects.items():
+                status = records[company_name].get('status') or crm_automations.UNSET_STATUS
+                statuses[status] = statuses.get(status, 0) + 1
+                category = prospect.get('category', 'Unknown')
+                categories[category] = categories.get(category, 0) + 1
+            overdue = sum(1 for data in records.values()
+                          if (crm_automations.to_epoch(data.get('next_followup')) or float('inf')) < time.time())
+            return len(prospects), statuses, categories, overdue
+        
+        def counts(aggregates):
+            return aggregates.total, aggregates.statuses, aggregates.categories, aggregates.overdue()
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        if counts(crm.dashboard_aggregates()) != scan(crm) or not os.path.exists(crm.aggregates_file):
+            print("❌ Aggregates differ from a full scan")
+            return False
+        
+        # Single saves and unit of work commits apply deltas and keep the file current
+        overdue = (datetime.now() - timedelta(days=2)).isoformat()
+        crm.save_user_data('CTI Foods', {'status': 'hot', 'next_followup': overdue})
+        other = crm_automations.CRMAutomations(workspace)
+        with other.unit_of_work():
+            other.save_user_data('Monogram Foods', {'status': 'new'})
+        fresh = crm_automations.CRMAutomations(workspace)
+        saved = crm_automations.DashboardAggregates.load(fresh.aggregates_file)
+        if saved.sources != fresh._aggregate_sources() or counts(saved) != scan(fresh) or \
+                saved.statuses.get('hot') != 1 or saved.overdue() != 1:
+            print("❌ Aggregates not kept in step with saved user data")
+            return False
+        if 'Hot Leads: 1' not in fresh.generate_weekly_report() or 'New Prospects: 1' not in fresh.generate_weekly_report():
+            print("❌ Weekly report not answered from the aggregates")
+            return False
+        
+        # A write that bypasses CRMAutomations is caught by the store's generation
+        fresh.user_store.put('CTI Foods', {'status': 'cold'})
+        if counts(crm.dashboard_aggregates()) != scan(crm) or crm.dashboard_aggregates().statuses.get('hot'):
+            print("❌ Outside write did not trigger a rebuild")
+            return False
+        
+        # So is a file edited in place, which leaves the directory mtime alone
+        signature = crm.user_store.change_signature()
+        with open(os.path.join(workspace, 'user_data', 'CTI Foods.json'), 'r+') as f:
+            f.write(json.dumps({'status': 'hot'}))
+            f.truncate()
+        if crm.user_store.change_signature() == signature or crm.dashboard_aggregates().statuses.get('hot') != 1:
+            print("❌ In-place edit of a user file was not noticed")
+            return False
+        
+        # SQLite's generation survives WAL checkpoints and reopening
+        db_path = os.path.join(workspace, 'generation.db')
+        store = crm_automations.SQLiteUserDataStore(db_path)
+        store.put_many({'A': {'status': 'hot'}, 'B': {}})
+        store.put('A', {'status': 'warm'})
+        generation = store.write_generation()
+        store.close()
+        store = crm_automations.SQLiteUserDataStore(db_path)
+        if generation != 2 or store.write_generation() != generation:
+            print("❌ SQLite write generation not stable")
+            return False
+        store.close()
+        
+        print(f"✅ Aggregates matched full scans across saves, commits and outside writes")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Dashboard aggregates test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_change_feed():
+    """Test the versioned change feed: user data deltas, export diffs, paging, floors and compaction"""
+    print("🔁 Testing change feed...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import crm_automations
+        from crm_server import ProspectCatalog
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.save_user_data('CTI Foods', {'status': 'warm'})
+        if os.path.exists(crm.change_feed_file):
+            print("❌ Change feed created before any client asked for it")
+            return False
+        
+        # A new client reloads everything, then follows deltas from the version it was given
+        start = crm.changes_since(0)
+        crm.save_user_data('CTI Foods', {'status': 'hot'})
+        with crm.unit_of_work():
+            crm.save_user_data('Monogram Foods', {'status': 'cold'})
+        crm.save_user_data('CTI Foods', {'status': 'hot', 'notes': 'Called back'})
+        delta = crm.changes_since(start['version'])
+        if not start['reset'] or delta['reset'] or delta['deletes'] != {'prospects': [], 'user_data': []} or \
+                delta['upserts']['user_data'] != {'Monogram Foods': {'status': 'cold'},
+                                                  'CTI Foods': {'status': 'hot', 'notes': 'Called back'}}:
+            print("❌ User data delta wrong")
+            return False
+        
+        first = crm.changes_since(start['version'], limit=1)
+        rest = crm.changes_since(first['version'], limit=1)
+        if not first['more'] or list(first['upserts']['user_data']) != ['Monogram Foods'] or \
+                list(rest['upserts']['user_data']) != ['CTI Foods'] or crm.changes_since(rest['version'])['more']:
+            print("❌ Paged deltas wrong")
+            return False
+        
+        # A regenerated export is diffed against the last one
+        data_file = os.path.join(workspace, 'filtered_crm_data.json')
+        with open(data_file, 'r') as f:
+            data = json.load(f)
+        prospects = data['filtered_prospects']
+        prospects['Springfield Industries']['overall_score'] = 999
+        del prospects['PlanHub']
+        prospects['Brand New Dairy'] = dict(prospects['CTI Foods'], category='Food Processing')
+        with open(data_file, 'w') as f:
+            json.dump(data, f)
+        version = rest['version']
+        delta = crm.changes_since(version)
+        if set(delta['upserts']['prospects']) != {'Springfield Industries', 'Brand New Dairy'} or \
+                delta['upserts']['prospects']['Springfield Industries']['overall_score'] != 999 or \
+                delta['deletes']['prospects'] != ['PlanHub'] or delta['upserts']['user_data']:
+            print("❌ Export regeneration delta wrong")
+            return False
+        
+        # Served over the API; a write that bypassed the feed forces a reload
+        catalog = ProspectCatalog(crm)
+        if catalog.changes({'since': [str(delta['version'])]})['upserts'] != {'prospects': {}, 'user_data': {}}:
+            print("❌ API change feed wrong")
+            return False
+        crm.user_store.put('CTI Foods', {'status': 'cold'})
+        if not crm.changes_since(delta['version'])['reset']:
+            print("❌ Unlogged write did not raise the floor")
+            return False
+        
+        # Compaction drops old deletions and raises the floor past them
+        feed = crm.change_feed()
+        if feed.compact(retention_days=30) != 0 or feed.compact(retention_days=0, now=time.time() + 60) != 1 or \
+                not crm.changes_since(version)['reset']:
+            print("❌ Compaction did not drop the old deletion")
+            return False
+        
+        print(f"✅ Change feed served deltas up to version {feed.version()} and compacted")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Change feed test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_streaming_export():
+    """Test CSV/NDJSON exports: chunking, columns, gzip, dashboard filters and the streamed API response"""
+    print("📤 Testing streaming export...")
+    
+    workspace = make_test_workspace()
+    server = None
+    try:
+        sys.path.append('.')
+        import csv
+        import gzip
+        import threading
+        import urllib.request
+        import crm_automations
+        import crm_server
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.save_many_user_data({
+            'CTI Foods': {'status': 'hot', 'priority_tags': ['urgent', 'large'],
+                          'next_followup': (datetime.now() - timedelta(days=3)).isoformat()},
+            'PlanHub': {'status': 'hot', 'notes': 'Asked about "urethane", cement'}
+        })
+        names = list(crm.load_crm_data().keys())
+        
+        path = os.path.join(workspace, 'book.csv')
+        if crm.export_prospects(path) != len(names):
+            print("❌ Export row count wrong")
+            return False
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        cti = next(row for row in rows if row['company'] == 'CTI Foods')
+        planhub = next(row for row in rows if row['company'] == 'PlanHub')
+        if tuple(rows[0]) != crm_automations.EXPORT_COLUMNS or [row['company'] for row in rows] != names or \
+                cti['priority_tags'] != 'urgent, large' or planhub['notes'] != 'Asked about "urethane", cement':
+            print("❌ CSV export content wrong")
+            return False
+        
+        # Dashboard filters and column selection, gzipped NDJSON
+        path = os.path.join(workspace, 'hot.ndjson.gz')
+        crm.export_prospects(path, columns=('company', 'status', 'priority_tags'), status='hot')
+        with gzip.open(path, 'rt') as f:
+            hot = [json.loads(line) for line in f]
+        if hot != [{'company': 'CTI Foods', 'status': 'hot', 'priority_tags': ['urgent', 'large']},
+                   {'company': 'PlanHub', 'status': 'hot', 'priority_tags': []}]:
+            print("❌ Filtered NDJSON export wrong")
+            return False
+        
+        records = list(crm.iter_dashboard_records())
+        chunks = list(crm_automations.iter_export_chunks(records, 'ndjson', chunk_size=1024))
+        if len(chunks) < 3 or any(len(chunk) > 4096 for chunk in chunks) or \
+                b''.join(chunks).count(b'\n') != len(names):
+            print("❌ Export not written in bounded chunks")
+            return False
+        
+        # The server streams the same filters from its indexes, in the dashboard's sort order
+        catalog = crm_server.ProspectCatalog(crm)
+        searches = (('', 'food', '', ''), ('urethane', '', '', ''), ('', 'followups', '', ''),
+                    ('', 'hot', 'hot', 'Construction'), ('', '', 'new', ''))
+        for search, view, status, category in searches:
+            filters = {'search': search, 'view': view, 'status': status, 'category': category}
+            predicate = crm_automations.dashboard_filter(search_index=crm.load_search_index(), **filters)
+            expected = sorted(name for name, record in crm.iter_dashboard_records(predicate))
+            params = {name: [value] for name, value in filters.items() if value}
+            _, streamed = catalog.export(dict(params, format=['ndjson'], columns=['company']))
+            exported = [json.loads(line)['company'] for line in b''.join(streamed).decode('utf-8').splitlines()]
+            in_order = [item['name'] for item in catalog.query(dict(params, page_size=['500']))['items']]
+            if sorted(exported) != expected or exported != in_order:
+                print(f"❌ Server export differs from the dashboard filters for {filters}")
+                return False
+        
+        server = crm_server.make_server(crm, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/api/export?view=hot",
+                                         headers={'Accept-Encoding': 'gzip'})
+        with urllib.request.urlopen(request) as response:
+            body = gzip.decompress(response.read()).decode('utf-8')
+            streamed = response.headers.get('Transfer-Encoding') == 'chunked'
+        if not streamed or [row['company'] for row in csv.DictReader(body.splitlines())] != ['CTI Foods', 'PlanHub']:
+            print("❌ API export not streamed")
+            return False
+        
+        print(f"✅ Exported {len(names)} prospects in {len(chunks)} chunks; server and CLI filters agree")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Streaming export test failed: {e}")
+        return False
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_mail_merge():
+    """Test compiled mail-merge templates: validation, skipped prospects and ordered batch rendering across processes"""
+    print("✉️  Testing mail merge...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import gzip
+        import crm_automations
+        
+        shutil.copy('email-templates.json', workspace)
+        crm = crm_automations.CRMAutomations(workspace)
+        prospects = crm.load_crm_data()
+        food = [name for name, prospect in prospects.items() if prospect.get('category') == 'Food Processing']
+        
+        path = os.path.join(workspace, 'food.ndjson')
+        result = crm.render_campaign('food_processing_specialist', path, category='Food Processing')
+        with open(path) as f:
+            emails = [json.loads(line) for line in f]
+        first = emails[0]
+        if result != {'rendered': len(food), 'skipped': 0} or [email['company'] for email in emails] != food or \
+                '{{' in first['body'] or f"Hello {first['company']} Team" not in first['body']:
+            print("❌ Food Processing campaign rendered wrong")
+            return False
+        
+        # Placeholders nothing fills in are refused before rendering
+        try:
+            crm.render_campaign('construction_bid_response', path)
+            print("❌ Unresolved {{project_name}} not rejected")
+            return False
+        except crm_automations.TemplateError:
+            pass
+        
+        # Literal braces survive; prospects without contacts are skipped; order holds across workers
+        with open(os.path.join(workspace, 'email-templates.json'), 'w') as f:
+            json.dump({'templates': {'contact': {
+                'subject': '{{ project_name }} for {{company_name}}',
+                'body': 'Hi {{contact_name}}, {a {b}} {{category_lower}} {{unknown'
+            }}}, f)
+        batch_size, crm_automations.MAIL_MERGE_BATCH_SIZE = crm_automations.MAIL_MERGE_BATCH_SIZE, 2
+        variables = {'project_name': 'Floor'}
+        serial, parallel = (os.path.join(workspace, name) for name in ('serial.ndjson', 'parallel.ndjson.gz'))
+        result = crm.render_campaign('contact', serial, variables, workers=1)
+        crm.render_campaign('contact', parallel, variables, workers=3)
+        crm_automations.MAIL_MERGE_BATCH_SIZE = batch_size
+        with open(serial, 'rb') as f, gzip.open(parallel, 'rb') as g:
+            serial_bytes, parallel_bytes = f.read(), g.read()
+        with_contacts = [name for name, prospect in prospects.items() if prospect.get('contacts')]
+        emails = [json.loads(line) for line in serial_bytes.splitlines()]
+        if result != {'rendered': len(with_contacts), 'skipped': len(prospects) - len(with_contacts)} or \
+                [email['company'] for email in emails] != with_contacts or serial_bytes != parallel_bytes:
+            print("❌ Contact campaign skipped or ordered wrong")
+            return False
+        company = with_contacts[0]
+        contact, details = max(prospects[company]['contacts'].items(), key=lambda item: item[1]['email_count'])
+        category = prospects[company]['category'].lower()
+        if emails[0] != {'company': company, 'to': details['email'], 'subject': f"Floor for {company}",
+                         'body': f"Hi {contact}, " + "{a {b}} " + category + " {{unknown"}:
+            print(f"❌ Email rendered wrong: {emails[0]}")
+            return False
+        
+        print(f"✅ Rendered {len(food)} Food Processing emails; {len(with_contacts)} contact emails match across workers")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Mail merge test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def test_parallel_evaluation():
+    """Test that scoring and pipeline evaluation across worker processes match the in-process run"""
+    print("🧵 Testing parallel evaluation...")
+    
+    workspaces = [make_test_workspace(), make_test_workspace()]
+    batch_size = None
+    try:
+        sys.path.append('.')
+        import contextlib
+        import io
+        import crm_automations
+        
+        seed = {
+            'CTI Foods': {'status': 'cold', 'last_contacted': datetime.now().isoformat()},
+            'PlanHub': {'status': 'new', 'priority_tags': ['urgent', 'large_project']},
+            'Business Company 07': {'status': 'warm', 'custom_score': 120,
+                                    'next_followup': (datetime.now() - timedelta(days=2)).isoformat()}
+        }
+        serial = crm_automations.CRMAutomations(workspaces[0])
+        parallel = crm_automations.CRMAutomations(workspaces[1], workers=2)
+        # Several small batches, so more are read than the workers have in flight
+        batch_size, crm_automations.STREAM_BATCH_SIZE = crm_automations.STREAM_BATCH_SIZE, 10
+        
+        outcomes = []
+        for crm in (serial, parallel):
+            crm.save_many_user_data(seed)
+            log = io.StringIO()
+            with contextlib.redirect_stdout(log):
+                results = [crm.auto_score_update(force=True), crm.pipeline_automation()]
+                crm.save_user_data('PlanHub', dict(crm.get_user_data('PlanHub'), status='cold', priority_tags=[]))
+                full = crm.run_full_automation()
+                results.append({key: full[key] for key in ('score_updates', 'score_skipped', 'pipeline_updates')})
+                results.append([entry['company'] for entry in full['overdue']])
+            records = crm.get_many_user_data(crm.load_crm_data())
+            for record in records.values():
+                for key in ('score_updated', 'status_auto_updated'):
+                    record.pop(key, None)
+            outcomes.append((results, log.getvalue().splitlines(), records))
+        
+        (results, log, records), parallel_outcome = outcomes
+        if results != parallel_outcome[0] or log != parallel_outcome[1]:
+            print(f"❌ Parallel run reported differently: {results} vs {parallel_outcome[0]}")
+            return False
+        if records != parallel_outcome[2]:
+            print("❌ Parallel run saved different user data")
+            return False
+        if not results[0] or not results[1]:
+            print("❌ Nothing was re-scored or promoted")
+            return False
+        
+        print(f"✅ 2 workers match in-process evaluation ({results[0]} score, {results[1]} pipeline updates)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Parallel evaluation test failed: {e}")
+        return False
+    finally:
+        if batch_size:
+            crm_automations.STREAM_BATCH_SIZE = batch_size
+        for workspace in workspaces:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+def test_corrupt_user_data():
+    """Test that one unreadable user file is logged and treated as empty by every automation"""
+    print("🩹 Testing corrupt user data...")
+    
+    workspace = make_test_workspace()
+    try:
+        sys.path.append('.')
+        import contextlib
+        import io
+        import crm_automations
+        
+        crm = crm_automations.CRMAutomations(workspace)
+        crm.save_user_data('PlanHub', {'status': 'new'})
+        corrupt_file = os.path.join(workspace, 'user_data', 'CTI Foods.json')
+        with open(corrupt_file, 'w') as f:
+            f.write('{bad')
+        
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            scores = crm.auto_score_update()
+            pipeline = crm.pipeline_automation()
+            full = crm.run_full_automation(force=True)
+            report = crm.generate_weekly_report()
+        
+        with open(corrupt_file) as f:
+            corrupt = f.read()
+        if not scores or not pipeline or not report or 'CTI Foods' not in log.getvalue() or corrupt != '{bad':
+            print(f"❌ Automations did not get past the corrupt file ({scores}, {pipeline}, {full})")
+            return False
+        if 'status_auto_updated' not in crm.get_user_data('PlanHub'):
+            print("❌ Other companies were not processed")
+            return False
+        
+        print(f"✅ {scores} scores and {pipeline} pipeline updates around an unreadable user file")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Corrupt user data test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
 def test_web_files():
     """Test web interface files"""
     print("🌐 Testing web interface files...")
@@ -236,7 +1886,33 @@ def run_full_test_suite():
         ("Email Templates", test_email_templates),
         ("User Data System", test_user_data_system),
         ("Web Interface Files", test_web_files),
-        ("Automation Functions", test_automation_functions)
+        ("Automation Functions", test_automation_functions),
+        ("Prospect Cache", test_prospect_cache),
+        ("SQLite User Store", test_sqlite_user_store),
+        ("Write Coalescing", test_unit_of_work),
+        ("Fused Full Automation", test_fused_full_automation),
+        ("Batch Scoring Parity", test_batch_scoring_parity),
+        ("Compact Prospect Table", test_prospect_table),
+        ("Streaming Reader", test_streaming_reader),
+        ("Binary Snapshot", test_binary_snapshot),
+        ("Incremental Re-scoring", test_incremental_rescoring),
+        ("Timestamp Normalization", test_timestamp_normalization),
+        ("Follow-up Index", test_followup_index),
+        ("Openclaw Dispatch", test_openclaw_dispatch),
+        ("Async Runtime", test_async_runtime),
+        ("Automation Daemon", test_automation_daemon),
+        ("Benchmark Suite", test_benchmark_suite),
+        ("Synthetic Generator", test_synthetic_generator),
+        ("Automation Metrics", test_automation_metrics),
+        ("API Server", test_api_server),
+        ("Secondary Indexes", test_secondary_indexes),
+        ("Search Index", test_search_index),
+        ("Dashboard Aggregates", test_dashboard_aggregates),
+        ("Change Feed", test_change_feed),
+        ("Streaming Export", test_streaming_export),
+        ("Mail Merge", test_mail_merge),
+        ("Parallel Evaluation", test_parallel_evaluation),
+        ("Corrupt User Data", test_corrupt_user_data)
     ]
     
     passed = 0